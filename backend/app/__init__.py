@@ -64,8 +64,17 @@ def create_app() -> Flask:
     app = Flask(__name__)
     app.config.from_object(Config)
 
+    # Serialización JSON rápida (orjson con fallback stdlib) para todos los jsonify
+    from .utils.json_response import OrjsonProvider
+    app.json = OrjsonProvider(app)
+
     # Configuración CORS
-    CORS(app, resources={r"/api/*": {"origins": app.config.get("CORS_ORIGINS", "*")}}, supports_credentials=False)
+    CORS(
+        app,
+        resources={r"/api/*": {"origins": app.config.get("CORS_ORIGINS", "*")}},
+        supports_credentials=False,
+        expose_headers=["X-Next-Cursor", "X-Total-Count"],
+    )
 
     # Importación de modelos para asegurar registro en SQLAlchemy
     from .models import (  # noqa: F401
@@ -76,6 +85,12 @@ def create_app() -> Flask:
         alert,
         log_entry,
         alert_status_history,
+        device_health,
+        sla_rollup,
+        refresh_token,
+        device_snapshot,
+        ai_gate_decision,
+        tenant_version,
     )
 
     # Inicialización de la base de datos
@@ -104,6 +119,7 @@ def create_app() -> Flask:
     from .routes.subscription_routes import sub_bp
     from .routes.health_routes import health_bp
     from .routes.sla_routes import sla_bp
+    from .routes.event_routes import events_bp
 
     app.register_blueprint(auth_bp, url_prefix="/api")
     app.register_blueprint(device_bp, url_prefix="/api")
@@ -113,9 +129,15 @@ def create_app() -> Flask:
     app.register_blueprint(sub_bp, url_prefix="/api")
     app.register_blueprint(health_bp, url_prefix="/api")
     app.register_blueprint(sla_bp, url_prefix="/api")
+    app.register_blueprint(events_bp, url_prefix="/api")
+
+    # Comandos CLI de mantenimiento
+    from .commands import register_commands
+    register_commands(app)
 
     # Exenciones de Rate Limit
     limiter.exempt(sla_bp)
+    limiter.exempt(events_bp)
     if app.view_functions.get("static"):
         limiter.exempt(app.view_functions["static"])
 
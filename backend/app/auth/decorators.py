@@ -1,21 +1,25 @@
 """
 Decoradores de autorización:
 
-- require_auth(role=None): exige token JWT válido y opcionalmente rol.
+- require_auth(role=None, ticket_purpose=None): exige token JWT válido y opcionalmente rol.
 """
 from functools import wraps
 from flask import request, jsonify, g
-from .jwt_utils import decode_jwt
+from . import token_cache
 from .errors import AuthTokenExpired, AuthTokenInvalid
 import logging
 
 logger = logging.getLogger(__name__)
 
-def require_auth(role: str | None = None):
+def require_auth(role: str | None = None, ticket_purpose: str | None = None):
     """
     Decorador para proteger endpoints con JWT.
     - Lee Authorization Bearer <token>
-    - Decodifica y adjunta g.user_id, g.tenant_id, g.role
+    - Si ticket_purpose, acepta también ?ticket=<token> (EventSource no permite headers),
+      solo si es un ticket de vida corta emitido para ese uso (claim "purpose"). El JWT de
+      sesión nunca viaja en la URL (quedaría en logs de acceso e historial).
+    - Los tokens con "purpose" no valen como credencial en el header
+    - Decodifica (con caché de claims hasta `exp`, ver token_cache) y adjunta g.user_id, g.tenant_id, g.role
     - Si role está definido, valida autorización (403 si no cumple)
     Respuestas 401 incluyen razón estructurada:
       {"error":"unauthorized","reason":"missing_header|malformed|decode_error|expired"}
@@ -24,6 +28,10 @@ def require_auth(role: str | None = None):
         @wraps(fn)
         def wrapper(*args, **kwargs):
             auth_header = request.headers.get("Authorization", "")
+            from_query = False
+            if not auth_header and ticket_purpose and request.args.get("ticket"):
+                auth_header = f"Bearer {request.args.get('ticket')}"
+                from_query = True
             if not auth_header:
                 logger.warning("[AUTH] AUTH 401: missing Authorization header")
                 return jsonify({"error": "unauthorized", "reason": "missing_header"}), 401
@@ -35,12 +43,20 @@ def require_auth(role: str | None = None):
                 logger.warning("[AUTH] AUTH 401: empty token after Bearer")
                 return jsonify({"error": "unauthorized", "reason": "malformed"}), 401
             try:
-                claims = decode_jwt(token)
-            except AuthTokenExpired:
-                logger.warning("[AUTH] AUTH 401: token expirado")
+                claims = token_cache.decode(token)
+            except AuthTokenExpired as exc:
+                # Reintentos con un token ya rechazado (caché negativa) solo a DEBUG
+                log = logger.debug if getattr(exc, "cached", False) else logger.warning
+                log("[AUTH] AUTH 401: token expirado")
                 return jsonify({"error": "unauthorized", "reason": "expired", "message": "Token expirado"}), 401
-            except AuthTokenInvalid:
-                logger.warning("[AUTH] AUTH 401: token inválido")
+            except AuthTokenInvalid as exc:
+                log = logger.debug if getattr(exc, "cached", False) else logger.warning
+                log("[AUTH] AUTH 401: token inválido")
+                return jsonify({"error": "unauthorized", "reason": "invalid", "message": "Token inválido"}), 401
+
+            expected_purpose = ticket_purpose if from_query else None
+            if claims.get("purpose") != expected_purpose:
+                logger.warning("[AUTH] AUTH 401: propósito de token no válido para esta vía")
                 return jsonify({"error": "unauthorized", "reason": "invalid", "message": "Token inválido"}), 401
 
             user_id = claims.get("sub")
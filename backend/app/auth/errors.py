@@ -11,3 +11,11 @@ class AuthTokenExpired(AuthTokenError):
 
 class AuthTokenInvalid(AuthTokenError):
     """Token inválido o mal formado."""
+
+
+class RefreshTokenInvalid(AuthTokenError):
+    """Refresh token desconocido, expirado o revocado."""
+
+
+class RefreshTokenReused(RefreshTokenInvalid):
+    """Refresh token ya rotado presentado de nuevo: la sesión completa queda revocada."""
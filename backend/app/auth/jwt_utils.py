@@ -1,7 +1,7 @@
 """
 Utilidades JWT:
 
-- create_jwt(user_id, tenant_id, role, expires_minutes)
+- create_jwt(user_id, tenant_id, role, expires_minutes, purpose=None)
 - decode_jwt(token)
 """
 from datetime import datetime, timezone
@@ -23,13 +23,18 @@ def _get_secret():
         # Outside of app context
         return Config.JWT_SECRET_KEY
 
-def create_jwt(user_id: int | str, tenant_id: int, role: str, expires_minutes: int = None, issuer: str | None = None) -> str:
+def create_jwt(user_id: int | str, tenant_id: int, role: str, expires_minutes: int = None, issuer: str | None = None,
+               purpose: str | None = None, expires_seconds: int | None = None) -> str:
     """
     Emite un JWT con expiración obligatoria.
+    - purpose: restringe el token a un uso (claim "purpose", ej. ticket del stream SSE);
+      require_auth rechaza estos tokens como credencial general.
+    - expires_seconds: expiración en segundos (tiene prioridad sobre expires_minutes).
     """
     exp_minutes = expires_minutes if expires_minutes is not None else Config.TOKEN_EXP_MINUTES
     now = datetime.now(timezone.utc)
-    exp_ts = int(now.timestamp()) + int(exp_minutes) * 60
+    ttl = int(expires_seconds) if expires_seconds is not None else int(exp_minutes) * 60
+    exp_ts = int(now.timestamp()) + ttl
     payload: Dict[str, Any] = {
         "sub": str(user_id),
         "tenant_id": tenant_id,
@@ -37,6 +42,8 @@ def create_jwt(user_id: int | str, tenant_id: int, role: str, expires_minutes: i
         "exp": exp_ts,
         "iat": int(now.timestamp()),
     }
+    if purpose:
+        payload["purpose"] = purpose
     issuer = issuer or getattr(Config, "JWT_ISSUER", None)
     if issuer:
         payload["iss"] = issuer
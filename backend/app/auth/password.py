@@ -1,14 +1,116 @@
 """
 Gestión de contraseñas:
 
-- hash_password(plain): genera hash seguro con bcrypt.
+- hash_password(plain): genera hash seguro con bcrypt (costo BCRYPT_ROUNDS).
 - verify_password(plain, hashed): compara contraseña.
+- needs_rehash(hashed): indica si el hash usa un costo distinto al configurado.
+
+bcrypt cuesta ~250ms de CPU por llamada con costo 12. Las operaciones se ejecutan en un
+pool dedicado y acotado (BCRYPT_MAX_WORKERS) con una cola máxima (BCRYPT_MAX_QUEUE):
+si está saturado se lanza `PasswordHasherBusy` de inmediato (las rutas responden 503)
+en lugar de encolar sin límite.
+
+El hilo de la petición sigue esperando el resultado (`future.result`, hasta
+BCRYPT_TIMEOUT_SEC): el pool acota la CPU dedicada a bcrypt y rechaza rápido el exceso,
+pero no libera al hilo que hace login. Solo beneficia al resto de endpoints con workers
+con hilos (gthread, ver backend/gunicorn.conf.py) o asíncronos: pyca/bcrypt libera el GIL
+y los demás hilos del proceso siguen atendiendo. Con el worker sync de gunicorn (un hilo)
+el proceso queda ocupado durante todo el hash igual que sin pool.
 """
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
 import bcrypt
 
-def hash_password(plain_password: str) -> str:
-    salt = bcrypt.gensalt(rounds=12)
+from ..config import Config
+from .. import metrics
+
+
+class PasswordHasherBusy(Exception):
+    """El pool de bcrypt está saturado (o la operación superó BCRYPT_TIMEOUT_SEC)."""
+
+
+_executor = None
+_slots = None
+_init_lock = threading.Lock()
+
+
+def _pool():
+    """Crea perezosamente el pool y el semáforo de admisión (workers + cola)."""
+    global _executor, _slots
+    if _executor is None:
+        with _init_lock:
+            if _executor is None:
+                workers = max(int(getattr(Config, "BCRYPT_MAX_WORKERS", 2)), 1)
+                queue = max(int(getattr(Config, "BCRYPT_MAX_QUEUE", 8)), 0)
+                _slots = threading.BoundedSemaphore(workers + queue)
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+    return _executor, _slots
+
+
+def _run(op: str, fn, *args):
+    """Ejecuta `fn` en el pool acotado y registra latencia (cola + cómputo)."""
+    executor, slots = _pool()
+    if not slots.acquire(blocking=False):
+        metrics.observe_password_hash(op, "rejected", 0.0, 0.0)
+        raise PasswordHasherBusy("[WARNING] bcrypt saturado")
+
+    enqueued = time.perf_counter()
+    started = []
+
+    def _task():
+        started.append(time.perf_counter())
+        return fn(*args)
+
+    future = executor.submit(_task)
+    # El cupo se libera cuando la tarea termina (aunque el llamador haya abandonado la espera)
+    future.add_done_callback(lambda _f: slots.release())
+    try:
+        # Bloquea este hilo; los demás hilos del worker (gthread) siguen atendiendo
+        result = future.result(timeout=float(getattr(Config, "BCRYPT_TIMEOUT_SEC", 5)))
+    except FutureTimeout:
+        metrics.observe_password_hash(op, "timeout", time.perf_counter() - enqueued, 0.0)
+        raise PasswordHasherBusy("[WARNING] bcrypt timeout")
+    finished = time.perf_counter()
+    run = finished - (started[0] if started else enqueued)
+    metrics.observe_password_hash(op, "ok", finished - enqueued, run)
+    return result
+
+
+def _rounds() -> int:
+    return int(getattr(Config, "BCRYPT_ROUNDS", 12))
+
+
+def _hash(plain_password: str, rounds: int) -> str:
+    salt = bcrypt.gensalt(rounds=rounds)
     return bcrypt.hashpw(plain_password.encode("utf-8"), salt).decode("utf-8")
 
+
+def _check(plain_password: str, hashed_password: str) -> bool:
+    return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
+
+
+def hash_password(plain_password: str) -> str:
+    """
+    Raises:
+        PasswordHasherBusy: Si el pool de bcrypt está saturado.
+    """
+    return _run("hash", _hash, plain_password, _rounds())
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
\ No newline at end of file
+    """
+    Raises:
+        PasswordHasherBusy: Si el pool de bcrypt está saturado.
+    """
+    return _run("verify", _check, plain_password, hashed_password)
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """True si el hash ($2b$<costo>$...) no usa el costo configurado en BCRYPT_ROUNDS."""
+    try:
+        return int(hashed_password.split("$")[2]) != _rounds()
+    except (AttributeError, IndexError, ValueError):
+        return False
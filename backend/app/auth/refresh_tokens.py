@@ -0,0 +1,151 @@
+"""
+Refresh tokens rotativos:
+
+- issue(user): emite un token opaco de una familia nueva (login) o existente (rotación).
+- rotate(raw): canjea un token vigente por uno nuevo y devuelve el usuario, sin bcrypt.
+- revoke(raw): revoca la familia del token (logout).
+
+El token es aleatorio (256 bits), así que basta un SHA-256 para almacenarlo: la
+validación es una búsqueda por índice único, sin costo de CPU apreciable. Un token ya
+rotado que se presenta de nuevo revoca toda la familia (detección de reutilización).
+"""
+from __future__ import annotations
+
+import logging
+import secrets
+from datetime import datetime, timedelta, timezone
+from hashlib import sha256
+from typing import Optional, Tuple
+
+from sqlalchemy import update
+
+from ..config import Config
+from ..db import db
+from .. import metrics
+from ..models.refresh_token import RefreshToken
+from ..models.user import User
+from .errors import RefreshTokenInvalid, RefreshTokenReused
+
+logger = logging.getLogger(__name__)
+
+
+def _hash(raw: str) -> str:
+    return sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _utc_naive(value: datetime) -> datetime:
+    """Normaliza a UTC sin tzinfo (SQLite devuelve naive, PostgreSQL aware)."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def issue(user: User, family_id: Optional[str] = None) -> str:
+    """
+    Emite un refresh token (pendiente de commit).
+
+    Args:
+        user (User): Dueño de la sesión.
+        family_id (Optional[str]): Familia existente (rotación); None crea una sesión nueva.
+
+    Returns:
+        str: Token en claro para entregar al cliente (no se almacena).
+    """
+    raw = secrets.token_urlsafe(32)
+    db.session.add(RefreshToken(
+        user_id=user.id,
+        tenant_id=user.tenant_id,
+        family_id=family_id or secrets.token_hex(16),
+        token_hash=_hash(raw),
+        expires_at=datetime.utcnow() + timedelta(days=int(getattr(Config, "REFRESH_TOKEN_EXP_DAYS", 14))),
+    ))
+    return raw
+
+
+def _revoke_family(family_id: str, now: datetime) -> None:
+    db.session.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=now)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def rotate(raw: str) -> Tuple[User, str]:
+    """
+    Canjea un refresh token vigente por uno nuevo de la misma familia (hace commit).
+
+    Args:
+        raw (str): Token presentado por el cliente.
+
+    Returns:
+        Tuple[User, str]: Usuario de la sesión y el nuevo refresh token.
+
+    Raises:
+        RefreshTokenReused: El token ya había sido rotado; la familia queda revocada.
+        RefreshTokenInvalid: Token desconocido, expirado o revocado.
+    """
+    row = RefreshToken.query.filter_by(token_hash=_hash(raw or "")).first()
+    if row is None or row.revoked_at is not None:
+        metrics.inc_auth_session("refresh_rejected")
+        raise RefreshTokenInvalid("Refresh token inválido")
+
+    now = datetime.utcnow()
+    # El UPDATE condicional decide la carrera entre dos canjes simultáneos del mismo token
+    claimed = db.session.execute(
+        update(RefreshToken)
+        .where(RefreshToken.id == row.id, RefreshToken.rotated_at.is_(None), RefreshToken.revoked_at.is_(None))
+        .values(rotated_at=now)
+        .execution_options(synchronize_session=False)
+    ).rowcount == 1
+    if not claimed:
+        _revoke_family(row.family_id, now)
+        db.session.commit()
+        metrics.inc_auth_session("reuse_detected")
+        logger.warning("[AUTH] refresh token reutilizado: sesión revocada sub=%s family=%s", row.user_id, row.family_id)
+        raise RefreshTokenReused("Refresh token reutilizado")
+
+    if _utc_naive(row.expires_at) <= now:
+        db.session.rollback()
+        metrics.inc_auth_session("refresh_rejected")
+        raise RefreshTokenInvalid("Refresh token expirado")
+
+    user = db.session.get(User, row.user_id)
+    if user is None:
+        _revoke_family(row.family_id, now)
+        db.session.commit()
+        metrics.inc_auth_session("refresh_rejected")
+        raise RefreshTokenInvalid("Usuario inexistente")
+
+    new_raw = issue(user, family_id=row.family_id)
+    db.session.commit()
+    metrics.inc_auth_session("refresh")
+    return user, new_raw
+
+
+def revoke(raw: str) -> bool:
+    """
+    Revoca la sesión (familia) del token; idempotente (hace commit).
+
+    Returns:
+        bool: True si el token existía.
+    """
+    row = RefreshToken.query.filter_by(token_hash=_hash(raw or "")).first()
+    if row is None:
+        return False
+    _revoke_family(row.family_id, datetime.utcnow())
+    db.session.commit()
+    metrics.inc_auth_session("logout")
+    return True
+
+
+def purge_expired() -> int:
+    """
+    Elimina tokens vencidos (hace commit).
+
+    Returns:
+        int: Filas eliminadas.
+    """
+    deleted = RefreshToken.query.filter(RefreshToken.expires_at < datetime.utcnow()).delete(synchronize_session=False)
+    db.session.commit()
+    return int(deleted or 0)
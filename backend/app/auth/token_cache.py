@@ -0,0 +1,136 @@
+"""
+Caché de JWT decodificados para require_auth.
+
+Los dashboards reutilizan el mismo token miles de veces por hora; verificar la firma HMAC
+y las claims en cada petición es trabajo repetido. Este módulo guarda:
+
+- Positivos: claims ya validadas, hasta su `exp` (nunca más allá).
+- Negativos: tokens rechazados recientemente (expirados o inválidos) durante
+  JWT_NEGATIVE_TTL_SEC, para no reverificar ni registrar a WARNING cada reintento.
+
+La clave es un digest SHA-256 de (secreto, emisor, token): el token nunca se guarda en
+claro y un cambio de secreto invalida implícitamente todas las entradas.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from hashlib import sha256
+from typing import Any, Dict, Optional, Tuple
+
+from ..config import Config
+from .. import metrics
+from .errors import AuthTokenExpired, AuthTokenInvalid
+from .jwt_utils import _get_secret, decode_jwt
+
+_lock = threading.Lock()
+# digest -> (expira_en_epoch, claims)
+_positive: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+# digest -> (expira_en_epoch, clase de error)
+_negative: "OrderedDict[str, Tuple[float, type]]" = OrderedDict()
+
+
+def _digest(token: str) -> str:
+    secret = _get_secret() or ""
+    issuer = getattr(Config, "JWT_ISSUER", None) or ""
+    return sha256(f"{secret}\0{issuer}\0{token}".encode("utf-8")).hexdigest()
+
+
+def _store(cache: OrderedDict, key: str, value: tuple) -> None:
+    max_entries = int(getattr(Config, "JWT_CACHE_MAX_ENTRIES", 10000))
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > max_entries:
+        cache.popitem(last=False)
+        metrics.inc_jwt_cache("eviction")
+
+
+def _lookup(key: str, now: float) -> Tuple[Optional[Dict[str, Any]], Optional[type]]:
+    with _lock:
+        item = _positive.get(key)
+        if item is not None:
+            exp, claims = item
+            if exp > now:
+                _positive.move_to_end(key)
+                return dict(claims), None
+            # Expiró mientras estaba cacheado: la firma ya fue verificada, solo cambia el veredicto
+            del _positive[key]
+            _store(_negative, key, (now + _negative_ttl(), AuthTokenExpired))
+            return None, AuthTokenExpired
+        item = _negative.get(key)
+        if item is not None:
+            until, error_cls = item
+            if until > now:
+                return None, error_cls
+            del _negative[key]
+    return None, None
+
+
+def _negative_ttl() -> float:
+    return float(getattr(Config, "JWT_NEGATIVE_TTL_SEC", 60))
+
+
+def decode(token: str) -> Dict[str, Any]:
+    """
+    Equivalente cacheado de `decode_jwt`.
+
+    Args:
+        token (str): JWT recibido en el header Authorization.
+
+    Returns:
+        Dict[str, Any]: Claims validadas (copia).
+
+    Raises:
+        AuthTokenExpired: Token expirado. `cached=True` si el veredicto vino de la caché.
+        AuthTokenInvalid: Token inválido. `cached=True` si el veredicto vino de la caché.
+    """
+    if not getattr(Config, "JWT_CACHE_ENABLED", True):
+        return decode_jwt(token)
+
+    key = _digest(token)
+    now = time.time()
+    claims, error_cls = _lookup(key, now)
+    if claims is not None:
+        metrics.inc_jwt_cache("hit")
+        return claims
+    if error_cls is not None:
+        metrics.inc_jwt_cache("negative_hit")
+        exc = error_cls("Token expirado" if error_cls is AuthTokenExpired else "Token inválido")
+        exc.cached = True
+        raise exc
+
+    metrics.inc_jwt_cache("miss")
+    try:
+        claims = decode_jwt(token)
+    except (AuthTokenExpired, AuthTokenInvalid) as exc:
+        with _lock:
+            _store(_negative, key, (now + _negative_ttl(), type(exc)))
+        raise
+
+    exp = claims.get("exp")
+    if isinstance(exp, (int, float)) and exp > now:
+        with _lock:
+            _store(_positive, key, (float(exp), dict(claims)))
+    return claims
+
+
+def invalidate(token: str) -> None:
+    """Descarta cualquier veredicto cacheado para un token (ej. logout)."""
+    key = _digest(token)
+    with _lock:
+        _positive.pop(key, None)
+        _negative.pop(key, None)
+
+
+def clear() -> None:
+    """Vacía la caché (uso en pruebas o tras rotar el secreto)."""
+    with _lock:
+        _positive.clear()
+        _negative.clear()
+
+
+def stats() -> Dict[str, int]:
+    """Tamaño actual de la caché (los contadores de aciertos están en metrics)."""
+    with _lock:
+        return {"positive_entries": len(_positive), "negative_entries": len(_negative)}
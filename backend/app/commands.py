@@ -0,0 +1,111 @@
+"""
+Comandos CLI de mantenimiento (Flask CLI).
+
+Uso (desde la raíz del proyecto):
+  flask --app run.py reconcile-health [--tenant-id N] [--interval SEGUNDOS]
+  flask --app run.py rebuild-sla-rollups [--tenant-id N]
+  flask --app run.py reconcile-device-counts [--tenant-id N]
+  flask --app run.py purge-refresh-tokens
+  flask --app run.py rotate-credentials
+  flask --app run.py purge-gate-decisions [--days N]
+  flask --app run.py monitor [--tenant-id N] [--interval SEGUNDOS]
+
+Los comandos periódicos aceptan --interval para ejecutarse en bucle (útil como
+proceso sidecar); sin él se ejecutan una sola vez (útil desde cron).
+"""
+import time
+
+import click
+
+
+def register_commands(app) -> None:
+    """
+    Registra los comandos de mantenimiento en la CLI de Flask.
+
+    Args:
+        app (Flask): Instancia de la aplicación.
+    """
+
+    @app.cli.command("reconcile-health")
+    @click.option("--tenant-id", type=int, default=None, help="Restringe a un tenant.")
+    @click.option("--interval", type=int, default=0, help="Segundos entre ejecuciones (0 = una vez).")
+    def reconcile_health(tenant_id, interval):
+        """Repara la salud materializada de dispositivos (tabla device_health)."""
+        from .services.alert_service import reconcile_device_health
+
+        while True:
+            repaired = reconcile_device_health(tenant_id)
+            click.echo(f"[INFO] reconcile-health: {repaired} dispositivos corregidos")
+            if interval <= 0:
+                break
+            time.sleep(interval)
+
+    @app.cli.command("rebuild-sla-rollups")
+    @click.option("--tenant-id", type=int, default=None, help="Restringe a un tenant.")
+    def rebuild_sla_rollups(tenant_id):
+        """Reconstruye los rollups de SLA desde el histórico de estados (carga inicial obligatoria, ver MIGRATIONS.md)."""
+        from .services.sla_service import rebuild_sla_rollups as _rebuild
+
+        rows = _rebuild(tenant_id)
+        click.echo(f"[INFO] rebuild-sla-rollups: {rows} filas generadas")
+
+    @app.cli.command("reconcile-device-counts")
+    @click.option("--tenant-id", type=int, default=None, help="Restringe a un tenant.")
+    def reconcile_device_counts(tenant_id):
+        """Recalcula el contador de dispositivos activos por tenant (backfill/verificación)."""
+        from .services.subscription_service import reconcile_device_counts as _reconcile
+
+        repaired = _reconcile(tenant_id)
+        click.echo(f"[INFO] reconcile-device-counts: {repaired} tenants corregidos")
+
+    @app.cli.command("purge-refresh-tokens")
+    def purge_refresh_tokens():
+        """Elimina refresh tokens vencidos."""
+        from .auth.refresh_tokens import purge_expired
+
+        deleted = purge_expired()
+        click.echo(f"[INFO] purge-refresh-tokens: {deleted} tokens eliminados")
+
+    @app.cli.command("rotate-credentials")
+    def rotate_credentials():
+        """Re-cifra credenciales de dispositivos con la ENCRYPTION_KEY actual."""
+        from .services.device_service import rotate_device_credentials
+
+        rotated, failed = rotate_device_credentials()
+        click.echo(f"[INFO] rotate-credentials: {rotated} dispositivos re-cifrados")
+        if failed:
+            # No retirar la clave anterior hasta corregir estos dispositivos
+            click.echo(f"[ERROR] rotate-credentials: {len(failed)} dispositivos sin re-cifrar: "
+                       f"{', '.join(map(str, failed))}", err=True)
+            raise SystemExit(1)
+
+    @app.cli.command("purge-gate-decisions")
+    @click.option("--days", type=int, default=None, help="Días a conservar (default AI_GATE_DECISION_RETENTION_DAYS).")
+    def purge_gate_decisions(days):
+        """Elimina decisiones antiguas de la compuerta de IA (auditoría)."""
+        from .services.change_detection import purge_decisions
+
+        deleted = purge_decisions(days)
+        click.echo(f"[INFO] purge-gate-decisions: {deleted} decisiones eliminadas")
+
+    @app.cli.command("monitor")
+    @click.option("--tenant-id", type=int, default=None, help="Restringe a un tenant.")
+    @click.option("--interval", type=int, default=0, help="Segundos entre ciclos (0 = una vez).")
+    def monitor(tenant_id, interval):
+        """Ejecuta el ciclo de monitoreo forense (minería, compuerta, IA y alertas)."""
+        import asyncio
+
+        from .models.device import Device
+        from .services.monitoring_service import run_monitoring_cycle
+
+        while True:
+            query = Device.query.filter_by(is_active=True)
+            if tenant_id is not None:
+                query = query.filter_by(tenant_id=tenant_id)
+            devices = query.order_by(Device.id).all()
+            # Un event loop por ciclo; run_monitoring_cycle cierra la sesión de IA al final
+            asyncio.run(run_monitoring_cycle(devices))
+            click.echo(f"[INFO] monitor: ciclo completado ({len(devices)} dispositivos)")
+            if interval <= 0:
+                break
+            time.sleep(interval)
@@ -54,8 +54,21 @@ class Config:
     JWT_SECRET_KEY = os.getenv("JWT_SECRET")
     TOKEN_EXP_MINUTES = int(os.getenv("JWT_EXPIRES_MINUTES", os.getenv("TOKEN_EXP_MINUTES", "60")))
  
+    # Caché de JWT decodificados (require_auth)
+    JWT_CACHE_ENABLED = os.getenv("JWT_CACHE_ENABLED", "1") == "1"
+    JWT_CACHE_MAX_ENTRIES = int(os.getenv("JWT_CACHE_MAX_ENTRIES", "10000"))
+    JWT_NEGATIVE_TTL_SEC = int(os.getenv("JWT_NEGATIVE_TTL_SEC", "60"))
+
+    # Refresh tokens rotativos (/auth/refresh): vigencia deslizante por rotación
+    REFRESH_TOKEN_EXP_DAYS = int(os.getenv("REFRESH_TOKEN_EXP_DAYS", "14"))
+
     # Seguridad: Cifrado Simétrico (Fernet)
     ENCRYPTION_KEY = os.getenv("ENCRYPTION_KEY")
+    # Claves anteriores (separadas por coma) que solo descifran; ver `flask rotate-credentials`
+    ENCRYPTION_KEYS_OLD = os.getenv("ENCRYPTION_KEYS_OLD", "")
+    # Caché en memoria de credenciales descifradas para el poller
+    CREDENTIAL_CACHE_TTL_SEC = int(os.getenv("CREDENTIAL_CACHE_TTL_SEC", "300"))
+    CREDENTIAL_CACHE_MAX_ENTRIES = int(os.getenv("CREDENTIAL_CACHE_MAX_ENTRIES", "1024"))
 
     # CORS
     CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:5173")
@@ -73,6 +86,43 @@ class Config:
     AI_PROVIDER = os.getenv("AI_PROVIDER", AI_ANALYSIS_PROVIDER) # Unified provider config
     AI_TIMEOUT_SEC = int(os.getenv("AI_TIMEOUT_SEC", "20"))
     AI_MAX_TOKENS = int(os.getenv("AI_MAX_TOKENS", "800"))
+    # Pool HTTP compartido con los proveedores de IA (una sesión keep-alive por event loop)
+    AI_HTTP_POOL_LIMIT = int(os.getenv("AI_HTTP_POOL_LIMIT", "100"))
+    AI_HTTP_POOL_PER_HOST = int(os.getenv("AI_HTTP_POOL_PER_HOST", "20"))
+    AI_HTTP_KEEPALIVE_SEC = float(os.getenv("AI_HTTP_KEEPALIVE_SEC", "30"))
+    # Caché de diagnósticos de IA por contenido: auto (Redis si REDIS_URL es redis://) | disk | redis
+    AI_CACHE_ENABLED = os.getenv("AI_CACHE_ENABLED", "1") == "1"
+    AI_CACHE_BACKEND = os.getenv("AI_CACHE_BACKEND", "auto").lower()
+    AI_CACHE_TTL_SEC = int(os.getenv("AI_CACHE_TTL_SEC", "3600"))
+    AI_CACHE_MAX_ENTRIES = int(os.getenv("AI_CACHE_MAX_ENTRIES", "5000"))
+    AI_CACHE_DIR = os.getenv("AI_CACHE_DIR")  # Default: <tmp>/mkmonitor_ai_cache
+    # Despachador de IA: presupuestos por proveedor (0 = sin límite), concurrencia y cola
+    AI_DISPATCH_ENABLED = os.getenv("AI_DISPATCH_ENABLED", "1") == "1"
+    AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", "4"))
+    AI_DISPATCH_MAX_WAIT_SEC = float(os.getenv("AI_DISPATCH_MAX_WAIT_SEC", "300"))
+    AI_DISPATCH_MAX_RETRIES = int(os.getenv("AI_DISPATCH_MAX_RETRIES", "3"))
+    DEEPSEEK_RPM = int(os.getenv("DEEPSEEK_RPM", "60"))
+    DEEPSEEK_TPM = int(os.getenv("DEEPSEEK_TPM", "200000"))
+    GEMINI_RPM = int(os.getenv("GEMINI_RPM", "15"))
+    GEMINI_TPM = int(os.getenv("GEMINI_TPM", "1000000"))
+    # Compactación del contexto enviado a la IA (presupuesto duro en tokens estimados)
+    AI_CONTEXT_COMPACTION_ENABLED = os.getenv("AI_CONTEXT_COMPACTION_ENABLED", "1") == "1"
+    AI_CONTEXT_TOKEN_BUDGET = int(os.getenv("AI_CONTEXT_TOKEN_BUDGET", "3000"))
+    AI_CONTEXT_TOP_INTERFACES = int(os.getenv("AI_CONTEXT_TOP_INTERFACES", "8"))
+    AI_CONTEXT_MAX_LOGS = int(os.getenv("AI_CONTEXT_MAX_LOGS", "50"))
+    AI_CONTEXT_LOG_CHARS = int(os.getenv("AI_CONTEXT_LOG_CHARS", "240"))
+    AI_CONTEXT_MAX_ITEMS = int(os.getenv("AI_CONTEXT_MAX_ITEMS", "20"))
+    # Lotes multi-dispositivo: varios contextos pequeños en una sola solicitud al proveedor
+    AI_BATCH_ENABLED = os.getenv("AI_BATCH_ENABLED", "1") == "1"
+    AI_BATCH_TOKEN_BUDGET = int(os.getenv("AI_BATCH_TOKEN_BUDGET", "6000"))
+    AI_BATCH_MAX_DEVICES = int(os.getenv("AI_BATCH_MAX_DEVICES", "8"))
+    # Espera para reunir análisis concurrentes del ciclo en un lote (0 = sin agrupar)
+    AI_BATCH_WINDOW_MS = int(os.getenv("AI_BATCH_WINDOW_MS", "50"))
+    # Compuerta de cambios: la IA solo se invoca ante cambios materiales o por antigüedad
+    AI_GATE_ENABLED = os.getenv("AI_GATE_ENABLED", "1") == "1"
+    AI_GATE_MAX_STALENESS_SEC = int(os.getenv("AI_GATE_MAX_STALENESS_SEC", "21600"))
+    AI_GATE_ERROR_RATE_PER_MIN = float(os.getenv("AI_GATE_ERROR_RATE_PER_MIN", "5"))
+    AI_GATE_DECISION_RETENTION_DAYS = int(os.getenv("AI_GATE_DECISION_RETENTION_DAYS", "30"))
 
     # Conexión Mikrotik
     ROS_PROVIDER = os.getenv("ROS_PROVIDER", "auto")
@@ -87,9 +137,46 @@ class Config:
     # Monitoreo
     MONITORING_LOG_LIMIT = int(os.getenv("MONITORING_LOG_LIMIT", "200"))
 
+    # Paginación de alertas
+    ALERTS_PAGE_SIZE = int(os.getenv("ALERTS_PAGE_SIZE", "50"))
+    ALERTS_PAGE_MAX = int(os.getenv("ALERTS_PAGE_MAX", "500"))
+    ALERTS_BULK_MAX = int(os.getenv("ALERTS_BULK_MAX", "1000"))
+
+    # Caché de exportaciones de logs (CSV/PDF)
+    EXPORT_CACHE_ENABLED = os.getenv("EXPORT_CACHE_ENABLED", "1") == "1"
+    # Debe ser el mismo directorio (volumen compartido) para la API y el poller, que invalida
+    EXPORT_CACHE_DIR = os.getenv("EXPORT_CACHE_DIR")  # Default: <tmp>/mkmonitor_export_cache
+    EXPORT_CACHE_MAX_MB = int(os.getenv("EXPORT_CACHE_MAX_MB", "256"))
+
+    # Caché de respuestas por tenant (LRU local + Redis opcional)
+    RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "1") == "1"
+    RESPONSE_CACHE_REDIS = os.getenv("RESPONSE_CACHE_REDIS", "1") == "1"
+    RESPONSE_CACHE_TTL_SEC = int(os.getenv("RESPONSE_CACHE_TTL_SEC", "30"))
+    RESPONSE_CACHE_LOCAL_TTL_SEC = int(os.getenv("RESPONSE_CACHE_LOCAL_TTL_SEC", "5"))
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2048"))
+    PLAN_CACHE_TTL_SEC = int(os.getenv("PLAN_CACHE_TTL_SEC", "30"))
+
+    # Eventos en tiempo real (SSE)
+    EVENTS_BACKEND = os.getenv("EVENTS_BACKEND", "auto")  # auto | redis | memory
+    EVENTS_STREAM_MAXLEN = int(os.getenv("EVENTS_STREAM_MAXLEN", "1000"))
+    EVENTS_HEARTBEAT_SEC = int(os.getenv("EVENTS_HEARTBEAT_SEC", "15"))
+    EVENTS_MAX_STREAM_SEC = int(os.getenv("EVENTS_MAX_STREAM_SEC", "300"))
+    # Vida del ticket de conexión al stream (?ticket=); solo se valida al conectar
+    EVENTS_TICKET_TTL_SEC = int(os.getenv("EVENTS_TICKET_TTL_SEC", "60"))
+
+    # Seguridad: bcrypt (pool dedicado y acotado)
+    BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    BCRYPT_MAX_WORKERS = int(os.getenv("BCRYPT_MAX_WORKERS", "2"))
+    BCRYPT_MAX_QUEUE = int(os.getenv("BCRYPT_MAX_QUEUE", "8"))
+    BCRYPT_TIMEOUT_SEC = float(os.getenv("BCRYPT_TIMEOUT_SEC", "5"))
+
     # Seguridad: Anti Fuerza Bruta
     MAX_FAILED_ATTEMPTS = int(os.getenv("MAX_FAILED_ATTEMPTS", "5"))
     LOCKOUT_SECONDS = int(os.getenv("LOCKOUT_SECONDS", "300"))
+    # Backend de contadores de lockout: auto (Redis si REDIS_URL es redis://) | redis | memory
+    LOCKOUT_BACKEND = os.getenv("LOCKOUT_BACKEND", "auto").lower()
+    # Tope de llaves (IP, email) en el backend en memoria; se descartan las más antiguas
+    LOCKOUT_MAX_ENTRIES = int(os.getenv("LOCKOUT_MAX_ENTRIES", "100000"))
 
     # Rate Limiting (Redis)
     REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
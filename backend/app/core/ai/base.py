@@ -1,11 +1,43 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+
+
+class AIRateLimited(Exception):
+    """
+    The provider answered HTTP 429. Raised (instead of a mock response) so the
+    dispatcher can back off and retry rather than emitting a fallback diagnosis.
+    """
+
+    def __init__(self, provider: str, retry_after: Optional[float] = None):
+        super().__init__(f"{provider} rate limited (retry_after={retry_after})")
+        self.provider = provider
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds from a Retry-After header (delta-seconds form only)."""
+    try:
+        return max(float(value), 0.0) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+# Marker set on placeholder responses (provider unreachable, unparseable output, ...)
+FALLBACK_KEY = "fallback"
+
+
+def is_fallback(result: Optional[Dict[str, Any]]) -> bool:
+    """True when `result` is a placeholder rather than a real diagnosis of the device."""
+    return not result or bool(result.get(FALLBACK_KEY))
+
 
 class BaseAIProvider(ABC):
     """
     Abstract base class for AI Providers (Strategy Pattern).
     Defines the contract for analyzing network context.
     """
+    # Identifier used for per-provider budgets (AI dispatcher) and metrics
+    name = "base"
 
     @abstractmethod
     async def analyze(self, context: str, prompt_template: str) -> Dict[str, Any]:
@@ -18,5 +50,8 @@ class BaseAIProvider(ABC):
 
         Returns:
             Dict[str, Any]: Structured diagnosis including status, summary, analysis, etc.
+
+        Raises:
+            AIRateLimited: The provider rejected the request with HTTP 429.
         """
         pass
@@ -1,8 +1,8 @@
 import json
 import logging
-import aiohttp
 from typing import Dict, Any
-from .base import BaseAIProvider
+from .base import FALLBACK_KEY, AIRateLimited, BaseAIProvider, parse_retry_after
+from .http import get_session
 from ...config import Config
 
 logger = logging.getLogger(__name__)
@@ -11,6 +11,8 @@ class DeepSeekProvider(BaseAIProvider):
     """
     Concrete implementation of BaseAIProvider for DeepSeek.
     """
+    name = "deepseek"
+
     def __init__(self):
         self.api_key = Config.DEEPSEEK_API_KEY
         self.api_url = Config.DEEPSEEK_API_URL or "https://api.deepseek.com/v1/chat/completions"
@@ -45,35 +47,41 @@ class DeepSeekProvider(BaseAIProvider):
         logger.info(f"[DeepSeek] Messages count: {len(payload['messages'])}")
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(self.api_url, json=payload, headers=headers, timeout=30) as response:
-                    status_code = response.status
-                    raw_body = await response.text()
-
-                    # Detailed logging after request
-                    logger.info(f"[DeepSeek] Status Code received: {status_code}")
-                    logger.info(f"[DeepSeek] Raw Response Body: {raw_body}")
+            session = get_session()
+            async with session.post(self.api_url, json=payload, headers=headers, timeout=30) as response:
+                status_code = response.status
+                raw_body = await response.text()
 
-                    if status_code != 200:
-                         logger.error(f"[DeepSeek] Request failed with status {status_code}")
-                         return self._mock_response(error=f"HTTP {status_code}: {raw_body}")
+                # Detailed logging after request
+                logger.info(f"[DeepSeek] Status Code received: {status_code}")
+                logger.info(f"[DeepSeek] Raw Response Body: {raw_body}")
 
-                    try:
-                        result = json.loads(raw_body)
-                        content = result['choices'][0]['message']['content']
+                if status_code == 429:
+                    logger.warning("[DeepSeek] Rate limited (HTTP 429)")
+                    raise AIRateLimited(self.name, parse_retry_after(response.headers.get("Retry-After")))
 
-                        # Robust parsing of content
-                        try:
-                            parsed_content = json.loads(content)
-                            return parsed_content
-                        except json.JSONDecodeError:
-                            logger.error("[DeepSeek] Failed to parse content as JSON. Attempting repair.")
-                            return self._fallback_parsing(content)
+                if status_code != 200:
+                     logger.error(f"[DeepSeek] Request failed with status {status_code}")
+                     return self._mock_response(error=f"HTTP {status_code}: {raw_body}")
 
-                    except (KeyError, json.JSONDecodeError) as e:
-                        logger.error(f"[DeepSeek] Failed to parse API response structure: {e}")
-                        return self._mock_response(error=f"Response parsing error: {str(e)}")
+                try:
+                    result = json.loads(raw_body)
+                    content = result['choices'][0]['message']['content']
 
+                    # Robust parsing of content
+                    try:
+                        parsed_content = json.loads(content)
+                        return parsed_content
+                    except json.JSONDecodeError:
+                        logger.error("[DeepSeek] Failed to parse content as JSON. Attempting repair.")
+                        return self._fallback_parsing(content)
+
+                except (KeyError, json.JSONDecodeError) as e:
+                    logger.error(f"[DeepSeek] Failed to parse API response structure: {e}")
+                    return self._mock_response(error=f"Response parsing error: {str(e)}")
+
+        except AIRateLimited:
+            raise
         except Exception as e:
             logger.error(f"[DeepSeek] API request failed: {e}")
             return self._mock_response(error=str(e))
@@ -93,7 +101,8 @@ class DeepSeekProvider(BaseAIProvider):
             "technical_analysis": f"The AI response could not be parsed as JSON. Raw output: {content[:200]}...",
             "security_audit": "Unknown",
             "recommendations": ["Check AI logs"],
-            "confidence_score": 0.0
+            "confidence_score": 0.0,
+            FALLBACK_KEY: True,
         }
 
     def _mock_response(self, error: str = None) -> Dict[str, Any]:
@@ -103,5 +112,6 @@ class DeepSeekProvider(BaseAIProvider):
             "technical_analysis": f"Could not contact DeepSeek. Reason: {error}" if error else "No anomalies detected in local analysis.",
             "security_audit": "N/A",
             "recommendations": ["Check internet connection", "Verify API Key"],
-            "confidence_score": 0.0
+            "confidence_score": 0.0,
+            FALLBACK_KEY: True,
         }
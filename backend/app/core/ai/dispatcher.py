@@ -0,0 +1,322 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import threading
+import time
+import weakref
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from .base import AIRateLimited, BaseAIProvider
+from ...config import Config
+from ... import metrics
+
+logger = logging.getLogger(__name__)
+
+# Priorities (lower runs first)
+PRIORITY_CRITICAL = 0
+PRIORITY_HIGH = 1
+PRIORITY_NORMAL = 2
+
+# Back-off applied when a 429 arrives without a usable Retry-After header
+DEFAULT_RATE_LIMIT_PAUSE_SEC = 10.0
+
+
+class AIDispatchExpired(Exception):
+    """The job waited longer than AI_DISPATCH_MAX_WAIT_SEC or exhausted its 429 retries."""
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap local token estimate (~4 characters per token for JSON/English text)."""
+    return len(text or "") // 4 + 1
+
+
+class TokenBucket:
+    """
+    Per-minute budget refilled continuously. A non-positive limit means unlimited.
+
+    Requests larger than the whole budget are capped to it, so they wait for a full
+    bucket instead of blocking forever. Thread-safe: one bucket is shared by the
+    dispatchers of every event loop in the process (see `get_buckets`).
+    """
+
+    def __init__(self, per_minute: float, clock=time.monotonic):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self._clock = clock
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.capacity <= 0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self, amount: float) -> float:
+        """Seconds until `amount` tokens are available (0 if available now)."""
+        with self._lock:
+            now = self._clock()
+            pause = max(self._paused_until - now, 0.0)
+            if self.unlimited:
+                return pause
+            self._refill(now)
+            missing = min(amount, self.capacity) - self.tokens
+            return max(pause, missing / self.rate if missing > 0 else 0.0)
+
+    def consume(self, amount: float) -> None:
+        if not self.unlimited:
+            with self._lock:
+                self._refill(self._clock())
+                self.tokens -= min(amount, self.capacity)
+
+    def pause(self, seconds: float) -> None:
+        """Stops admissions for `seconds` (provider answered 429) and drains the bucket."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, self._clock() + seconds)
+            if not self.unlimited:
+                self.tokens = 0.0
+                self._updated = self._clock()
+
+
+# Provider budgets are process-wide: every `asyncio.run` gets a new dispatcher (queue and
+# workers are loop-bound), but must not start with a fresh budget nor forget a 429 pause
+_buckets: Dict[str, Tuple[TokenBucket, TokenBucket]] = {}
+_buckets_lock = threading.Lock()
+
+
+def get_buckets(provider_name: str) -> Tuple[TokenBucket, TokenBucket]:
+    """Returns the process-wide (RPM, TPM) buckets of `provider_name` (<NAME>_RPM / <NAME>_TPM)."""
+    with _buckets_lock:
+        buckets = _buckets.get(provider_name)
+        if buckets is None:
+            prefix = provider_name.upper()
+            buckets = _buckets[provider_name] = (
+                TokenBucket(float(getattr(Config, f"{prefix}_RPM", 0) or 0)),
+                TokenBucket(float(getattr(Config, f"{prefix}_TPM", 0) or 0)),
+            )
+        return buckets
+
+
+def reset_buckets() -> None:
+    """Forgets the process-wide budgets (tests, or after changing <NAME>_RPM / <NAME>_TPM)."""
+    with _buckets_lock:
+        _buckets.clear()
+
+
+class _Job:
+    __slots__ = ("key", "provider", "context", "prompt", "priority", "outputs", "enqueued_at", "future", "attempts", "started")
+
+    def __init__(self, key, provider, context, prompt, priority, future, outputs=1):
+        self.key = key
+        self.outputs = outputs
+        self.provider = provider
+        self.context = context
+        self.prompt = prompt
+        self.priority = priority
+        self.enqueued_at = time.monotonic()
+        self.future = future
+        self.attempts = 0
+        self.started = False
+
+
+class AIDispatcher:
+    """
+    Priority queue in front of `BaseAIProvider.analyze` for one provider.
+
+    - Requests-per-minute and tokens-per-minute token buckets (<NAME>_RPM / <NAME>_TPM),
+      shared by every event loop of the process; queue and workers are per loop.
+    - At most AI_MAX_CONCURRENCY requests in flight (one worker task each).
+    - Lower priority value runs first (devices with critical heuristics).
+    - Jobs are coalesced per key (device): a newer submission replaces the queued
+      context and shares its result; callers of an in-flight job share that result.
+    - Jobs queued longer than AI_DISPATCH_MAX_WAIT_SEC expire with AIDispatchExpired.
+    - HTTP 429 pauses the buckets (Retry-After) and requeues the job up to
+      AI_DISPATCH_MAX_RETRIES times, instead of producing a fallback diagnosis.
+    """
+
+    def __init__(self, provider_name: str, rpm: Any, tpm: Any, concurrency: int,
+                 max_wait_sec: float, max_retries: int, completion_tokens: int = 0):
+        self.provider_name = provider_name
+        # A number builds a private bucket; from_config passes the process-wide ones
+        self.rpm = rpm if isinstance(rpm, TokenBucket) else TokenBucket(rpm)
+        self.tpm = tpm if isinstance(tpm, TokenBucket) else TokenBucket(tpm)
+        self.concurrency = max(int(concurrency), 1)
+        self.max_wait_sec = float(max_wait_sec)
+        self.max_retries = int(max_retries)
+        self.completion_tokens = int(completion_tokens)
+        self._heap: List[Tuple[int, int, _Job]] = []
+        self._seq = itertools.count()
+        self._pending: Dict[Hashable, _Job] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._workers: List[asyncio.Task] = []
+
+    @classmethod
+    def from_config(cls, provider_name: str) -> "AIDispatcher":
+        rpm, tpm = get_buckets(provider_name)
+        return cls(
+            provider_name,
+            rpm=rpm,
+            tpm=tpm,
+            concurrency=int(getattr(Config, "AI_MAX_CONCURRENCY", 4)),
+            max_wait_sec=float(getattr(Config, "AI_DISPATCH_MAX_WAIT_SEC", 300)),
+            max_retries=int(getattr(Config, "AI_DISPATCH_MAX_RETRIES", 3)),
+            completion_tokens=int(getattr(Config, "AI_MAX_TOKENS", 800)),
+        )
+
+    def queued(self) -> int:
+        return sum(1 for job in self._pending.values() if not job.started)
+
+    async def submit(self, provider: BaseAIProvider, context: str, prompt: str,
+                     priority: int = PRIORITY_NORMAL, key: Optional[Hashable] = None,
+                     outputs: int = 1) -> Dict[str, Any]:
+        """
+        Queues an analysis and waits for its result.
+
+        `outputs` is the number of diagnoses the response carries (batched prompts);
+        the token budget reserves AI_MAX_TOKENS of completion for each.
+
+        Raises:
+            AIDispatchExpired: Queued too long or rate-limit retries exhausted.
+        """
+        self._ensure_workers()
+        job = self._pending.get(key) if key is not None else None
+        if job is not None:
+            metrics.inc_ai_dispatch(self.provider_name, "coalesced")
+            if not job.started:
+                # Newest snapshot wins; keep the most urgent priority
+                job.provider, job.context, job.prompt = provider, context, prompt
+                if priority < job.priority:
+                    job.priority = priority
+                    self._push(job)
+        else:
+            job = _Job(key, provider, context, prompt, priority, asyncio.get_running_loop().create_future(), outputs)
+            if key is not None:
+                self._pending[key] = job
+            metrics.inc_ai_dispatch(self.provider_name, "queued")
+            self._push(job)
+        # shield: a cancelled caller must not cancel a result shared with others
+        return await asyncio.shield(job.future)
+
+    def _push(self, job: _Job) -> None:
+        heapq.heappush(self._heap, (job.priority, next(self._seq), job))
+        self._wakeup.set()
+
+    def _ensure_workers(self) -> None:
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        self._workers = [w for w in self._workers if not w.done()]
+        while len(self._workers) < self.concurrency:
+            self._workers.append(asyncio.create_task(self._worker()))
+
+    async def _next_job(self) -> _Job:
+        while True:
+            while self._heap:
+                priority, _, job = heapq.heappop(self._heap)
+                # Skip entries superseded by a priority upgrade, or already taken/resolved
+                if job.started or job.future.done() or priority != job.priority:
+                    continue
+                return job
+            self._wakeup.clear()
+            await self._wakeup.wait()
+
+    def _finish(self, job: _Job, result: Any = None, error: Optional[BaseException] = None) -> None:
+        if job.key is not None and self._pending.get(job.key) is job:
+            del self._pending[job.key]
+        if job.future.done():
+            return
+        if error is not None:
+            job.future.set_exception(error)
+        else:
+            job.future.set_result(result)
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._next_job()
+            if time.monotonic() - job.enqueued_at > self.max_wait_sec:
+                metrics.inc_ai_dispatch(self.provider_name, "expired")
+                self._finish(job, error=AIDispatchExpired(f"{self.provider_name}: queued longer than {self.max_wait_sec:.0f}s"))
+                continue
+
+            tokens = estimate_tokens(job.context) + estimate_tokens(job.prompt) + self.completion_tokens * job.outputs
+            wait = max(self.rpm.delay(1), self.tpm.delay(tokens))
+            if wait > 0:
+                # Give the slot back so a more urgent job can take it once budget frees up
+                self._push(job)
+                await asyncio.sleep(min(wait, self.max_wait_sec))
+                continue
+
+            self.rpm.consume(1)
+            self.tpm.consume(tokens)
+            job.started = True
+            job.attempts += 1
+            try:
+                result = await job.provider.analyze(job.context, job.prompt)
+            except AIRateLimited as e:
+                pause = e.retry_after if e.retry_after is not None else DEFAULT_RATE_LIMIT_PAUSE_SEC
+                self.rpm.pause(pause)
+                self.tpm.pause(pause)
+                metrics.inc_ai_requests(self.provider_name, False)
+                metrics.inc_ai_dispatch(self.provider_name, "rate_limited")
+                if job.attempts > self.max_retries:
+                    self._finish(job, error=AIDispatchExpired(f"{self.provider_name}: rate limited after {job.attempts} attempts"))
+                else:
+                    logger.warning("[AI] %s 429: pausa de %.1fs, reintento %s/%s", self.provider_name, pause, job.attempts, self.max_retries)
+                    job.started = False
+                    self._push(job)
+                continue
+            except Exception as e:
+                metrics.inc_ai_requests(self.provider_name, False)
+                self._finish(job, error=e)
+                continue
+            metrics.inc_ai_requests(self.provider_name, True)
+            metrics.inc_ai_dispatch(self.provider_name, "completed")
+            self._finish(job, result=result)
+
+    async def shutdown(self) -> None:
+        """Cancels workers and fails whatever is still queued."""
+        for w in self._workers:
+            w.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        for job in list(self._pending.values()):
+            self._finish(job, error=AIDispatchExpired(f"{self.provider_name}: dispatcher shut down"))
+        self._heap.clear()
+
+
+# One dispatcher per (event loop, provider): queues and worker tasks are loop-bound.
+# Their token buckets are the process-wide ones from get_buckets.
+_dispatchers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, AIDispatcher]]" = weakref.WeakKeyDictionary()
+
+
+def get_dispatcher(provider_name: str) -> AIDispatcher:
+    """Returns the dispatcher for `provider_name` on the running event loop."""
+    loop = asyncio.get_running_loop()
+    per_loop = _dispatchers.setdefault(loop, {})
+    dispatcher = per_loop.get(provider_name)
+    if dispatcher is None:
+        dispatcher = per_loop[provider_name] = AIDispatcher.from_config(provider_name)
+    return dispatcher
+
+
+async def shutdown_dispatchers() -> None:
+    """Stops the dispatchers of the running event loop (call before the loop ends)."""
+    per_loop = _dispatchers.pop(asyncio.get_running_loop(), {})
+    for dispatcher in per_loop.values():
+        await dispatcher.shutdown()
+
+
+async def dispatch(provider: BaseAIProvider, context: str, prompt: str,
+                   priority: int = PRIORITY_NORMAL, key: Optional[Hashable] = None,
+                   outputs: int = 1) -> Dict[str, Any]:
+    """
+    Runs `provider.analyze` through the provider's dispatcher (or directly when
+    AI_DISPATCH_ENABLED is off).
+    """
+    if not getattr(Config, "AI_DISPATCH_ENABLED", True):
+        return await provider.analyze(context, prompt)
+    return await get_dispatcher(provider.name).submit(provider, context, prompt, priority=priority, key=key, outputs=outputs)
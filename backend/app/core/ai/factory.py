@@ -1,6 +1,7 @@
 import os
 import logging
-from typing import Optional
+import threading
+from typing import Dict, Optional, Tuple
 from .base import BaseAIProvider
 from .deepseek import DeepSeekProvider
 from .gemini import GeminiProvider
@@ -8,16 +9,49 @@ from ...config import Config
 
 logger = logging.getLogger(__name__)
 
+# Long-lived provider instances keyed by the configuration they were built from; the
+# HTTP connection pool itself lives in `.http` (one session per event loop).
+_providers: Dict[Tuple, BaseAIProvider] = {}
+_providers_lock = threading.Lock()
+
+
+def _config_fingerprint(provider_name: str) -> Tuple:
+    return (
+        provider_name,
+        Config.DEEPSEEK_API_KEY,
+        Config.DEEPSEEK_API_URL,
+        Config.DEEPSEEK_MODEL,
+        getattr(Config, "GEMINI_API_KEY", None),
+        getattr(Config, "GEMINI_MODEL", None),
+    )
+
+
 class AIFactory:
     @staticmethod
     def get_ai_provider() -> BaseAIProvider:
         """
         Returns the configured AI Provider instance based on environment variables.
         Priority: AI_PROVIDER > AI_ANALYSIS_PROVIDER > Default (DeepSeek)
+
+        Instances are reused while the provider name, API keys and models stay the same
+        (e.g. the CLI can switch provider or key at runtime and gets a fresh instance).
         """
         # Read from Config first (which reads env), or direct env if not in Config yet
         provider_name = os.getenv("AI_PROVIDER", Config.AI_ANALYSIS_PROVIDER).lower()
+        key = _config_fingerprint(provider_name)
+
+        provider = _providers.get(key)
+        if provider is None:
+            with _providers_lock:
+                provider = _providers.get(key)
+                if provider is None:
+                    provider = AIFactory._build(provider_name)
+                    _providers.clear()
+                    _providers[key] = provider
+        return provider
 
+    @staticmethod
+    def _build(provider_name: str) -> BaseAIProvider:
         logger.info(f"Selecting AI Provider: {provider_name}")
 
         if provider_name == "gemini":
@@ -40,3 +74,8 @@ class AIFactory:
 
 def get_ai_provider() -> BaseAIProvider:
     return AIFactory.get_ai_provider()
+
+def reset_providers() -> None:
+    """Drops cached provider instances (tests / configuration reload)."""
+    with _providers_lock:
+        _providers.clear()
@@ -1,8 +1,8 @@
 import json
 import logging
-import aiohttp
 from typing import Dict, Any
-from .base import BaseAIProvider
+from .base import FALLBACK_KEY, AIRateLimited, BaseAIProvider, parse_retry_after
+from .http import get_session
 from ...config import Config
 
 logger = logging.getLogger(__name__)
@@ -11,6 +11,8 @@ class GeminiProvider(BaseAIProvider):
     """
     Concrete implementation of BaseAIProvider for Google Gemini.
     """
+    name = "gemini"
+
     def __init__(self):
         self.api_key = Config.GEMINI_API_KEY
         self.model = Config.GEMINI_MODEL
@@ -57,33 +59,39 @@ class GeminiProvider(BaseAIProvider):
 
         try:
             # Paso 4: Petición.
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=payload, headers=headers, timeout=30) as response:
-                    status_code = response.status
-                    raw_body = await response.text()
-
-                    logger.info(f"[Gemini] Status Code received: {status_code}")
-                    logger.info(f"[Gemini] Raw Response Body: {raw_body}")
-
-                    if status_code != 200:
-                         logger.error(f"[Gemini] Request failed with status {status_code}")
-                         return self._mock_response(error=f"HTTP {status_code}: {raw_body}")
-
-                    try:
-                        result = json.loads(raw_body)
-                        # Extract text from Gemini response structure
-                        # { "candidates": [ { "content": { "parts": [ { "text": "..." } ] } } ] }
-                        if 'candidates' in result and len(result['candidates']) > 0:
-                            content = result['candidates'][0]['content']['parts'][0]['text']
-                            return json.loads(content)
-                        else:
-                            logger.error("[Gemini] No candidates in response")
-                            return self._mock_response(error="No candidates returned")
-
-                    except (KeyError, json.JSONDecodeError) as e:
-                        logger.error(f"[Gemini] Failed to parse API response: {e}")
-                        return self._mock_response(error=f"Response parsing error: {str(e)}")
-
+            session = get_session()
+            async with session.post(url, json=payload, headers=headers, timeout=30) as response:
+                status_code = response.status
+                raw_body = await response.text()
+
+                logger.info(f"[Gemini] Status Code received: {status_code}")
+                logger.info(f"[Gemini] Raw Response Body: {raw_body}")
+
+                if status_code == 429:
+                    logger.warning("[Gemini] Rate limited (HTTP 429)")
+                    raise AIRateLimited(self.name, parse_retry_after(response.headers.get("Retry-After")))
+
+                if status_code != 200:
+                     logger.error(f"[Gemini] Request failed with status {status_code}")
+                     return self._mock_response(error=f"HTTP {status_code}: {raw_body}")
+
+                try:
+                    result = json.loads(raw_body)
+                    # Extract text from Gemini response structure
+                    # { "candidates": [ { "content": { "parts": [ { "text": "..." } ] } } ] }
+                    if 'candidates' in result and len(result['candidates']) > 0:
+                        content = result['candidates'][0]['content']['parts'][0]['text']
+                        return json.loads(content)
+                    else:
+                        logger.error("[Gemini] No candidates in response")
+                        return self._mock_response(error="No candidates returned")
+
+                except (KeyError, json.JSONDecodeError) as e:
+                    logger.error(f"[Gemini] Failed to parse API response: {e}")
+                    return self._mock_response(error=f"Response parsing error: {str(e)}")
+
+        except AIRateLimited:
+            raise
         except Exception as e:
             logger.error(f"[Gemini] API request failed: {e}")
             return self._mock_response(error=str(e))
@@ -95,5 +103,6 @@ class GeminiProvider(BaseAIProvider):
             "technical_analysis": f"Could not contact Gemini. Reason: {error}",
             "security_audit": "N/A",
             "recommendations": ["Check API Key", "Verify internet connection"],
-            "confidence_score": 0.0
+            "confidence_score": 0.0,
+            FALLBACK_KEY: True,
         }
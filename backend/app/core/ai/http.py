@@ -0,0 +1,57 @@
+import asyncio
+import logging
+import weakref
+from typing import Optional
+
+import aiohttp
+
+from ...config import Config
+
+logger = logging.getLogger(__name__)
+
+# One pooled ClientSession per event loop: a session (and its connector) is bound to the
+# loop it was created on, and the monitoring cycle / CLI may run several loops over time.
+_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = weakref.WeakKeyDictionary()
+
+
+def _new_session() -> aiohttp.ClientSession:
+    connector = aiohttp.TCPConnector(
+        limit=int(getattr(Config, "AI_HTTP_POOL_LIMIT", 100)),
+        limit_per_host=int(getattr(Config, "AI_HTTP_POOL_PER_HOST", 20)),
+        keepalive_timeout=float(getattr(Config, "AI_HTTP_KEEPALIVE_SEC", 30)),
+        ttl_dns_cache=300,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=float(getattr(Config, "AI_TIMEOUT_SEC", 20)) + 10),
+    )
+
+
+def get_session() -> aiohttp.ClientSession:
+    """
+    Returns the shared ClientSession for the running event loop, creating it on first use.
+
+    Connections to the AI provider are kept alive and reused across calls, so analyzing
+    hundreds of devices per cycle pays the TCP + TLS handshake once per pooled connection
+    instead of once per request. Must be called from within a coroutine.
+    """
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        session = _new_session()
+        _sessions[loop] = session
+        logger.debug("[AI] HTTP session created for loop %s", id(loop))
+    return session
+
+
+async def close_session(loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+    """
+    Closes the shared session of the given (or running) event loop.
+
+    Call it before the loop ends (e.g. at the end of `asyncio.run(...)`) so pooled
+    connections are released cleanly instead of raising "Unclosed client session".
+    """
+    loop = loop or asyncio.get_running_loop()
+    session = _sessions.pop(loop, None)
+    if session is not None and not session.closed:
+        await session.close()
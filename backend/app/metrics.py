@@ -17,6 +17,15 @@ from typing import Dict, Tuple
 # Estructuras en memoria (no persistentes)
 _ai_requests_total: Dict[Tuple[str, bool], int] = defaultdict(int)
 _ai_fallbacks_total: Dict[str, int] = defaultdict(int)
+_cache_lookups_total: Dict[Tuple[str, str, bool], int] = defaultdict(int)
+_jwt_cache_total: Dict[str, int] = defaultdict(int)
+_auth_sessions_total: Dict[str, int] = defaultdict(int)
+_ai_cache_total: Dict[str, int] = defaultdict(int)
+_ai_dispatch_total: Dict[Tuple[str, str], int] = defaultdict(int)
+_ai_batch_total: Dict[str, int] = defaultdict(int)
+_ai_context_tokens_total: Dict[str, int] = defaultdict(int)
+_password_hash_total: Dict[Tuple[str, str], int] = defaultdict(int)
+_password_hash_seconds: Dict[str, Dict[str, float]] = defaultdict(lambda: {"total_sum": 0.0, "run_sum": 0.0, "total_max": 0.0})
 
 # Mecanismo de bloqueo para concurrencia
 _lock = Lock()
@@ -50,6 +59,111 @@ def inc_ai_fallbacks(provider: str) -> None:
         _ai_fallbacks_total[k] += 1
 
 
+def inc_ai_dispatch(provider: str, event: str) -> None:
+    """
+    Incrementa el contador del despachador de IA.
+
+    Args:
+        provider (str): Identificador del proveedor (ej. "deepseek").
+        event (str): "queued", "coalesced", "completed", "rate_limited" o "expired".
+    """
+    with _lock:
+        _ai_dispatch_total[(provider.lower(), event)] += 1
+
+
+def inc_ai_batch(event: str, amount: int = 1) -> None:
+    """
+    Incrementa el contador de análisis por lotes.
+
+    Args:
+        event (str): "requests", "devices" (diagnósticos obtenidos en lote) u "omitted"
+            (dispositivos reenviados en llamadas individuales).
+        amount (int): Cantidad a sumar.
+    """
+    with _lock:
+        _ai_batch_total[event] += amount
+
+
+def observe_ai_context_tokens(before: int, after: int) -> None:
+    """
+    Acumula los tokens estimados del contexto antes y después de la compactación.
+
+    Args:
+        before (int): Tokens del contexto completo (JSON indentado).
+        after (int): Tokens del contexto compacto enviado al proveedor.
+    """
+    with _lock:
+        _ai_context_tokens_total["calls"] += 1
+        _ai_context_tokens_total["before"] += int(before)
+        _ai_context_tokens_total["after"] += int(after)
+
+
+def inc_ai_cache(result: str) -> None:
+    """
+    Incrementa el contador de la caché de diagnósticos de IA.
+
+    Args:
+        result (str): "hit", "miss" o "store".
+    """
+    with _lock:
+        _ai_cache_total[result] += 1
+
+
+def inc_cache_lookup(namespace: str, tier: str, hit: bool) -> None:
+    """
+    Incrementa el contador de consultas a la caché de respuestas.
+
+    Args:
+        namespace (str): Espacio de la caché (ej. "devices", "health").
+        tier (str): Nivel consultado ("local" o "redis").
+        hit (bool): True si la entrada estaba presente y vigente.
+    """
+    key = (namespace, tier, bool(hit))
+    with _lock:
+        _cache_lookups_total[key] += 1
+
+
+def inc_jwt_cache(result: str) -> None:
+    """
+    Incrementa el contador de la caché de JWT decodificados.
+
+    Args:
+        result (str): "hit", "miss", "negative_hit" o "eviction".
+    """
+    with _lock:
+        _jwt_cache_total[result] += 1
+
+
+def inc_auth_session(event: str) -> None:
+    """
+    Incrementa el contador de emisiones de sesión.
+
+    Args:
+        event (str): "login" (con bcrypt), "refresh", "refresh_rejected", "reuse_detected" o "logout".
+    """
+    with _lock:
+        _auth_sessions_total[event] += 1
+
+
+def observe_password_hash(op: str, outcome: str, total_seconds: float, run_seconds: float) -> None:
+    """
+    Registra una operación bcrypt del pool dedicado.
+
+    Args:
+        op (str): "hash" o "verify".
+        outcome (str): "ok", "rejected" (cola llena) o "timeout".
+        total_seconds (float): Latencia total (espera en cola + cómputo).
+        run_seconds (float): Tiempo de cómputo dentro del pool.
+    """
+    with _lock:
+        _password_hash_total[(op, outcome)] += 1
+        if outcome == "ok":
+            agg = _password_hash_seconds[op]
+            agg["total_sum"] += total_seconds
+            agg["run_sum"] += run_seconds
+            agg["total_max"] = max(agg["total_max"], total_seconds)
+
+
 def _snapshot() -> dict:
     """
     Genera una instantánea del estado actual de las métricas.
@@ -62,4 +176,25 @@ def _snapshot() -> dict:
         return {
             "ai_requests_total": {f"{p}:{'success' if s else 'error'}": c for (p, s), c in _ai_requests_total.items()},
             "ai_fallbacks_total": dict(_ai_fallbacks_total),
+            "ai_cache_total": dict(_ai_cache_total),
+            "ai_batch_total": dict(_ai_batch_total),
+            "ai_context_tokens_total": dict(_ai_context_tokens_total),
+            "ai_dispatch_total": {f"{p}:{e}": c for (p, e), c in _ai_dispatch_total.items()},
+            "cache_lookups_total": {
+                f"{ns}:{tier}:{'hit' if hit else 'miss'}": c for (ns, tier, hit), c in _cache_lookups_total.items()
+            },
+            "jwt_cache_total": dict(_jwt_cache_total),
+            "auth_sessions_total": dict(_auth_sessions_total),
+            "password_hash_total": {f"{op}:{outcome}": c for (op, outcome), c in _password_hash_total.items()},
+            "password_hash_seconds": {op: dict(v) for op, v in _password_hash_seconds.items()},
         }
+
+
+def snapshot() -> dict:
+    """
+    Instantánea pública de todas las métricas (expuesta en /api/health/metrics).
+
+    Returns:
+        dict: Contadores actuales.
+    """
+    return _snapshot()
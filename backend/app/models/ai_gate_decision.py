@@ -0,0 +1,33 @@
+"""
+Modelo de Decisiones de la Compuerta de IA.
+
+Registro de auditoría de cada evaluación de la compuerta de cambios: si se invocó o no
+el análisis de IA para un dispositivo y por qué.
+"""
+
+from ..db import db
+from sqlalchemy.sql import func
+
+class AIGateDecision(db.Model):
+    """
+    Decisión de la compuerta de cambios para un ciclo de monitoreo.
+
+    Attributes:
+        id (int): Identificador único.
+        tenant_id (int): Tenant propietario.
+        device_id (int): Dispositivo evaluado.
+        analyze (bool): True si se invocó el análisis de IA.
+        reasons (list): Motivos (ej. "reboot", "new_error_logs:2", "max_staleness").
+        decided_at (datetime): Fecha de la decisión.
+    """
+    __tablename__ = "ai_gate_decisions"
+    __table_args__ = (
+        db.Index("ix_ai_gate_decisions_device_time", "tenant_id", "device_id", "decided_at"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    tenant_id = db.Column(db.Integer, db.ForeignKey("tenants.id"), nullable=False)
+    device_id = db.Column(db.Integer, db.ForeignKey("devices.id"), nullable=False)
+    analyze = db.Column(db.Boolean, nullable=False)
+    reasons = db.Column(db.JSON, nullable=False, default=list)
+    decided_at = db.Column(db.DateTime(timezone=True), nullable=False, server_default=func.now())
@@ -6,6 +6,7 @@ por el sistema de análisis (IA o heurística).
 """
 
 from ..db import db
+from sqlalchemy import text
 from sqlalchemy.sql import func
 
 class Alert(db.Model):
@@ -22,10 +23,26 @@ class Alert(db.Model):
         accion_recomendada (str): Sugerencia de acción correctiva.
         status_operativo (str): Estado del ciclo de vida de la alerta ('Pendiente', 'En curso', 'Resuelta').
         comentario_ultimo (str): Último comentario agregado por un operador.
+        fingerprint (str): Huella de deduplicación (dispositivo, resumen normalizado, severidad).
+        occurrence_count (int): Veces que se detectó la misma incidencia mientras estaba abierta.
+        last_seen_at (datetime): Última detección de la incidencia.
         created_at (datetime): Fecha de creación de la alerta.
         updated_at (datetime): Fecha de última actualización.
     """
     __tablename__ = "alerts"
+    __table_args__ = (
+        # Soporta la paginación keyset (created_at, id) por tenant
+        db.Index("ix_alerts_tenant_created", "tenant_id", "created_at", "id"),
+        # Deduplicación: una sola alerta abierta por huella (ver alert_service.upsert_alert)
+        db.Index(
+            "uq_alerts_open_fingerprint",
+            "tenant_id",
+            "fingerprint",
+            unique=True,
+            postgresql_where=text("status_operativo <> 'Resuelta'"),
+            sqlite_where=text("status_operativo <> 'Resuelta'"),
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     tenant_id = db.Column(db.Integer, db.ForeignKey("tenants.id"), nullable=False)
@@ -39,6 +56,10 @@ class Alert(db.Model):
     status_operativo = db.Column(db.String(16), nullable=False, default="Pendiente")  # Pendiente | En curso | Resuelta
     comentario_ultimo = db.Column(db.String(255), nullable=True)
 
+    fingerprint = db.Column(db.String(64), nullable=True)  # sha256(device|resumen normalizado|severidad)
+    occurrence_count = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+    last_seen_at = db.Column(db.DateTime(timezone=True), nullable=True)
+
     created_at = db.Column(db.DateTime(timezone=True), nullable=False, server_default=func.now())
     updated_at = db.Column(db.DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
 
@@ -21,6 +21,10 @@ class AlertStatusHistory(db.Model):
         changed_at (datetime): Fecha y hora del cambio.
     """
     __tablename__ = "alert_status_history"
+    __table_args__ = (
+        # Búsqueda de la primera transición a un estado por alerta (SLA)
+        db.Index("ix_alert_history_alert_status_changed", "alert_id", "new_status_operativo", "changed_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     alert_id = db.Column(db.Integer, db.ForeignKey("alerts.id"), nullable=False)
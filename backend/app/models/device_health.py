@@ -0,0 +1,34 @@
+"""
+Modelo de Salud Materializada de Dispositivos.
+
+Mantiene precalculado el color de salud de cada dispositivo a partir de sus alertas
+activas, de modo que los listados de salud sean una lectura indexada trivial.
+"""
+
+from ..db import db
+from sqlalchemy.sql import func
+
+class DeviceHealth(db.Model):
+    """
+    Estado de salud precalculado de un dispositivo.
+
+    Se actualiza en la misma transacción que crea o cambia de estado una alerta
+    (ver `alert_service.refresh_device_health`) y se repara periódicamente con
+    `alert_service.reconcile_device_health`.
+
+    Attributes:
+        device_id (int): Dispositivo al que pertenece el estado (clave primaria).
+        tenant_id (int): Tenant propietario del dispositivo.
+        health_status (str): Color de salud ('verde', 'amarillo', 'rojo').
+        severe_open (int): Alertas Severas/Críticas no resueltas.
+        minor_open (int): Alertas Menores no resueltas.
+        updated_at (datetime): Fecha del último recálculo.
+    """
+    __tablename__ = "device_health"
+
+    device_id = db.Column(db.Integer, db.ForeignKey("devices.id"), primary_key=True)
+    tenant_id = db.Column(db.Integer, db.ForeignKey("tenants.id"), nullable=False, index=True)
+    health_status = db.Column(db.String(16), nullable=False, default="verde")  # verde | amarillo | rojo
+    severe_open = db.Column(db.Integer, nullable=False, default=0)
+    minor_open = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,32 @@
+"""
+Modelo de Instantánea Forense de Dispositivos.
+
+Guarda un resumen compacto del último ciclo de minería de cada dispositivo, usado por
+la compuerta de cambios (`change_detection`) para decidir si vale la pena invocar la IA.
+"""
+
+from ..db import db
+from sqlalchemy.sql import func
+
+class DeviceSnapshot(db.Model):
+    """
+    Resumen del último estado minado de un dispositivo.
+
+    Attributes:
+        device_id (int): Dispositivo (clave primaria).
+        tenant_id (int): Tenant propietario.
+        summary (dict): uptime_sec, error_logs, heuristics, counters, open_ports.
+        sampled_at (datetime): Momento de la minería resumida (base de las tasas).
+        last_analyzed_at (datetime): Último análisis de IA completado (None si nunca).
+        pending_analysis (bool): El último análisis solicitado falló; se reintenta.
+        updated_at (datetime): Fecha de la última actualización.
+    """
+    __tablename__ = "device_snapshots"
+
+    device_id = db.Column(db.Integer, db.ForeignKey("devices.id"), primary_key=True)
+    tenant_id = db.Column(db.Integer, db.ForeignKey("tenants.id"), nullable=False, index=True)
+    summary = db.Column(db.JSON, nullable=False, default=dict)
+    sampled_at = db.Column(db.DateTime(timezone=True), nullable=False)
+    last_analyzed_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    pending_analysis = db.Column(db.Boolean, nullable=False, default=False)
+    updated_at = db.Column(db.DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,43 @@
+"""
+Modelo de Refresh Tokens.
+
+Sesiones de larga duración para renovar el JWT de acceso sin volver a verificar la
+contraseña (bcrypt). Solo se persiste el digest SHA-256 del token, nunca el valor en claro.
+"""
+
+from ..db import db
+from sqlalchemy.sql import func
+
+class RefreshToken(db.Model):
+    """
+    Refresh token rotativo perteneciente a una familia (sesión de login).
+
+    Cada uso emite un token nuevo de la misma familia y marca el anterior como rotado.
+    Presentar un token ya rotado indica robo/reutilización: se revoca la familia completa.
+
+    Attributes:
+        id (int): Identificador único.
+        user_id (int): Usuario dueño de la sesión.
+        tenant_id (int): Tenant del usuario.
+        family_id (str): Identificador de la sesión (común a todas sus rotaciones).
+        token_hash (str): SHA-256 hex del token entregado al cliente.
+        expires_at (datetime): Vencimiento (UTC).
+        rotated_at (datetime): Momento en que se canjeó por uno nuevo (None si vigente).
+        revoked_at (datetime): Momento de revocación (logout o reutilización detectada).
+        created_at (datetime): Fecha y hora de emisión.
+    """
+    __tablename__ = "refresh_tokens"
+    __table_args__ = (
+        db.Index("ix_refresh_tokens_family", "family_id"),
+        db.Index("ix_refresh_tokens_user", "user_id"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    tenant_id = db.Column(db.Integer, db.ForeignKey("tenants.id"), nullable=False)
+    family_id = db.Column(db.String(32), nullable=False)
+    token_hash = db.Column(db.String(64), nullable=False, unique=True)
+    expires_at = db.Column(db.DateTime(timezone=True), nullable=False)
+    rotated_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    revoked_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    created_at = db.Column(db.DateTime(timezone=True), nullable=False, server_default=func.now())
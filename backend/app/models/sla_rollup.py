@@ -0,0 +1,48 @@
+"""
+Modelo de Agregados (Rollups) de SLA.
+
+Acumula de forma incremental los tiempos de resolución por tenant, dispositivo,
+mes y severidad, para que los reportes mensuales/trimestrales no tengan que
+recalcularse desde el histórico crudo de estados.
+"""
+
+from ..db import db
+from sqlalchemy.sql import func
+
+class SlaRollup(db.Model):
+    """
+    Agregado de tiempos de resolución de alertas.
+
+    Cada alerta contribuye una sola vez, en su primera transición a "Resuelta",
+    al período (mes de created_at) y severidad que le corresponden.
+
+    Attributes:
+        id (int): Identificador único.
+        tenant_id (int): Tenant propietario.
+        device_id (int): Dispositivo de las alertas.
+        period (date): Primer día del mes de creación de las alertas.
+        severity (str): Severidad ('Aviso', 'Alerta Menor', 'Alerta Severa', 'Alerta Crítica').
+        resolved_count (int): Alertas resueltas.
+        total_minutes (float): Suma de minutos hasta la primera resolución.
+        sum_sq_minutes (float): Suma de cuadrados (para varianza/desvío).
+        histogram (list): Conteos por bucket (ver sla_service.HISTOGRAM_BOUNDS_MIN).
+        updated_at (datetime): Última actualización.
+    """
+    __tablename__ = "sla_rollups"
+    __table_args__ = (
+        db.UniqueConstraint("tenant_id", "device_id", "period", "severity", name="uq_sla_rollups_key"),
+        db.Index("ix_sla_rollups_tenant_period", "tenant_id", "period"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    tenant_id = db.Column(db.Integer, db.ForeignKey("tenants.id"), nullable=False)
+    device_id = db.Column(db.Integer, db.ForeignKey("devices.id"), nullable=False)
+    period = db.Column(db.Date, nullable=False)
+    severity = db.Column(db.String(32), nullable=False)
+
+    resolved_count = db.Column(db.Integer, nullable=False, default=0)
+    total_minutes = db.Column(db.Float, nullable=False, default=0.0)
+    sum_sq_minutes = db.Column(db.Float, nullable=False, default=0.0)
+    histogram = db.Column(db.JSON, nullable=False, default=list)
+
+    updated_at = db.Column(db.DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
@@ -18,6 +18,7 @@ class Tenant(db.Model):
         plan (str): Plan de suscripción contratado (ej. 'BASICMAAT', 'PROMAAT').
         status_pago (str): Estado de la cuenta ('activo', 'suspendido').
         created_at (datetime): Fecha de registro en el sistema.
+        active_devices_count (int): Dispositivos activos (desnormalizado para límites del plan).
     """
     __tablename__ = "tenants"
 
@@ -27,6 +28,10 @@ class Tenant(db.Model):
     status_pago = db.Column(db.String(16), nullable=False, default="activo")  # activo | suspendido
     created_at = db.Column(db.DateTime(timezone=True), nullable=False, server_default=func.now())
 
+    # Contador de dispositivos activos: se mantiene con UPDATE condicional en alta/baja
+    # (ver subscription_service.reserve_device_slot) y se repara con `flask reconcile-device-counts`
+    active_devices_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
     # Relaciones
     users = db.relationship("User", backref="tenant", lazy=True)
     devices = db.relationship("Device", backref="tenant", lazy=True)
@@ -0,0 +1,24 @@
+"""
+Modelo de Versiones por Tenant.
+
+Un contador por (tenant, ámbito) para los GET condicionales y las claves de la caché de
+respuestas (ver services/tenant_versions.py). Vive fuera de `tenants` para que las
+escrituras de alertas no bloqueen la fila del tenant (límites de plan, suscripción).
+"""
+
+from ..db import db
+
+class TenantVersion(db.Model):
+    """
+    Contador de escrituras de un ámbito de un tenant.
+
+    Attributes:
+        tenant_id (int): Tenant propietario (parte de la clave primaria).
+        scope (str): Ámbito ('devices', 'alerts', 'subscription').
+        version (int): Número de escrituras confirmadas sobre el ámbito.
+    """
+    __tablename__ = "tenant_versions"
+
+    tenant_id = db.Column(db.Integer, db.ForeignKey("tenants.id"), primary_key=True)
+    scope = db.Column(db.String(32), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0, server_default="0")
@@ -3,34 +3,95 @@ Rutas para gestión de Alertas.
 
 Provee endpoints para listar y gestionar el ciclo de vida de las alertas operativas.
 """
+from datetime import datetime
 from flask import Blueprint, request, jsonify, g
 from ..auth.decorators import require_auth
-from ..services import alert_service
+from ..config import Config
+from ..services import alert_service, tenant_versions
+from ..utils.http_cache import conditional_etag
+from ..utils.json_response import json_response
 
 alert_bp = Blueprint("alerts", __name__)
 
+def _parse_iso(value):
+    """Parsea una fecha ISO 8601 (acepta sufijo Z). Retorna None si no se indicó.
+
+    Raises:
+        ValueError: Si la fecha es inválida.
+    """
+    if not value:
+        return None
+    return datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+
+def _serialize_alert(a, fields=None) -> dict:
+    """Serializa una alerta; si se indican `fields`, solo incluye esos campos (más id)."""
+    data = {}
+    for name in alert_service.ALERT_FIELDS:
+        if fields and name != "id" and name not in fields:
+            continue
+        # Los datetimes se serializan de forma nativa (ISO 8601) en json_response
+        data[name] = getattr(a, name)
+    return data
+
 @alert_bp.get("/alerts")
 @require_auth()
+@conditional_etag(tenant_versions.ALERTS)
 def list_alerts():
     """
-    Lista las alertas asociadas al tenant del usuario autenticado.
+    Lista las alertas asociadas al tenant del usuario autenticado (paginado por cursor).
 
-    Permite filtrar por parámetros recibidos en la query string (ej. estado, device_id).
+    Query Args:
+        estado, device_id, status_operativo: Filtros de negocio.
+        from (str): created_at >= fecha ISO 8601.
+        to (str): created_at <= fecha ISO 8601.
+        limit (int): Tamaño de página (default ALERTS_PAGE_SIZE, máximo ALERTS_PAGE_MAX).
+        cursor (str): Cursor de la página siguiente (header X-Next-Cursor de la respuesta previa).
+        fields (str): Campos a incluir separados por coma (ej. "estado,titulo"). `id` siempre se incluye.
+        include_total (bool): Si es "1"/"true", agrega el header X-Total-Count.
 
     Returns:
-        Response: Objeto JSON con la lista de alertas.
+        Response: Lista JSON de alertas. Headers X-Next-Cursor (si hay más páginas)
+                  y X-Total-Count (bajo demanda). 400 si los parámetros son inválidos.
+                  304 si If-None-Match coincide con el ETag vigente.
     """
-    alerts = alert_service.list_alerts(g.tenant_id, request.args)
-    result = [{
-        "id": a.id,
-        "device_id": a.device_id,
-        "estado": a.estado,
-        "titulo": a.titulo,
-        "descripcion": a.descripcion,
-        "accion_recomendada": a.accion_recomendada,
-        "status_operativo": a.status_operativo,
-        "comentario_ultimo": a.comentario_ultimo,
-        "created_at": a.created_at.isoformat() if a.created_at else None,
-        "updated_at": a.updated_at.isoformat() if a.updated_at else None,
-    } for a in alerts]
-    return jsonify(result), 200
+    page_max = int(getattr(Config, "ALERTS_PAGE_MAX", 500))
+    limit = request.args.get("limit", default=int(getattr(Config, "ALERTS_PAGE_SIZE", 50)), type=int)
+    if not limit or limit <= 0:
+        return jsonify({"error": "limit inválido"}), 400
+    limit = min(limit, page_max)
+
+    fields = None
+    raw_fields = (request.args.get("fields") or "").strip()
+    if raw_fields:
+        fields = {f.strip() for f in raw_fields.split(",") if f.strip()}
+        unknown = fields - set(alert_service.ALERT_FIELDS)
+        if unknown:
+            return jsonify({"error": "fields inválidos", "fields": sorted(unknown)}), 400
+
+    try:
+        created_from = _parse_iso(request.args.get("from"))
+        created_to = _parse_iso(request.args.get("to"))
+    except ValueError:
+        return jsonify({"error": "fecha inválida (from/to deben ser ISO 8601)"}), 400
+    include_total = (request.args.get("include_total") or "").lower() in ("1", "true", "yes")
+
+    try:
+        alerts, next_cursor, total = alert_service.paginate_alerts(
+            g.tenant_id,
+            request.args,
+            limit=limit,
+            cursor=request.args.get("cursor") or None,
+            created_from=created_from,
+            created_to=created_to,
+            fields=fields,
+            include_total=include_total,
+        )
+    except ValueError:
+        return jsonify({"error": "cursor inválido"}), 400
+
+    resp = json_response([_serialize_alert(a, fields) for a in alerts])
+    if next_cursor:
+        resp.headers["X-Next-Cursor"] = next_cursor
+    if total is not None:
+        resp.headers["X-Total-Count"] = str(total)
+    return resp, 200
@@ -1,12 +1,16 @@
 """
 Rutas de Autenticación.
 
-Provee endpoints para el inicio de sesión, registro de nuevos usuarios y
-verificación del estado de autenticación (sesión actual).
+Provee endpoints para el inicio de sesión, renovación de sesión (refresh tokens),
+cierre de sesión, registro de nuevos usuarios y verificación del estado de
+autenticación (sesión actual).
 """
 from flask import Blueprint, request, jsonify
-from ..auth.password import verify_password, hash_password
+from ..auth.password import PasswordHasherBusy, hash_password, needs_rehash, verify_password
 from ..auth.jwt_utils import create_jwt
+from ..auth import refresh_tokens, token_cache
+from ..auth.errors import RefreshTokenInvalid, RefreshTokenReused
+from .. import metrics
 from ..models.user import User
 from ..models.tenant import Tenant
 from ..config import Config
@@ -33,20 +37,39 @@ configure_security(
 auth_bp = Blueprint("auth", __name__)
 logger = logging.getLogger(__name__)
 
+def _busy_response():
+    """503 inmediato cuando el pool de bcrypt está saturado (el cliente reintenta)."""
+    resp = jsonify({"error": "busy", "message": "Servicio ocupado. Intente nuevamente en unos segundos."})
+    resp.headers["Retry-After"] = "1"
+    return resp, 503
+
+def _session_payload(user: User, refresh_token: str) -> dict:
+    """Cuerpo común de login/refresh: JWT de acceso + refresh token rotativo."""
+    tenant = db.session.get(Tenant, user.tenant_id)
+    return {
+        "token": create_jwt(user.id, user.tenant_id, user.role, Config.TOKEN_EXP_MINUTES),
+        "expires_in": int(Config.TOKEN_EXP_MINUTES) * 60,
+        "refresh_token": refresh_token,
+        "role": user.role,
+        "tenant_status": tenant.status_pago if tenant else "activo",
+    }
+
 @auth_bp.post("/auth/login")
 @limiter.limit("10/minute; 50/hour", override_defaults=False)
 def login():
     """
-    Inicia sesión de usuario y emite un token JWT.
+    Inicia sesión de usuario y emite un token JWT más un refresh token rotativo.
 
     Body:
         email (str): Correo electrónico del usuario.
         password (str): Contraseña del usuario.
 
     Returns:
-        Response: Objeto JSON con el token JWT y detalles del usuario si las credenciales son válidas.
+        Response: Objeto JSON con el token JWT, el refresh token y detalles del usuario si
+                  las credenciales son válidas.
                   Error 429 si se exceden los intentos permitidos.
                   Error 401 si las credenciales son inválidas.
+                  Error 503 si el pool de bcrypt está saturado (header Retry-After).
     """
     data = request.get_json(silent=True) or {}
     email = data.get("email", "").strip().lower()
@@ -66,21 +89,82 @@ def login():
         logger.warning("[AUTH] login failed (user not found) ip=%s email=%s count=%s", ip, email, count)
         return jsonify({"error": "Credenciales inválidas"}), status
 
-    if not verify_password(password, user.password_hash):
+    try:
+        password_ok = verify_password(password, user.password_hash)
+    except PasswordHasherBusy:
+        logger.warning("[AUTH] login rejected (bcrypt busy) ip=%s", ip)
+        return _busy_response()
+    if not password_ok:
         count = register_login_failure(lock_key)
         status = 429 if count >= int(getattr(Config, "MAX_FAILED_ATTEMPTS", 5)) else 401
         logger.warning("[AUTH] login failed (bad password) ip=%s email=%s count=%s", ip, email, count)
         return jsonify({"error": "Credenciales inválidas"}), status
 
     reset_login_lock(lock_key)
-    tenant = Tenant.query.get(user.tenant_id)
-    token = create_jwt(user.id, user.tenant_id, user.role, Config.TOKEN_EXP_MINUTES)
+    if needs_rehash(user.password_hash):
+        # Cambio de BCRYPT_ROUNDS: re-hash transparente con la contraseña ya verificada
+        try:
+            user.password_hash = hash_password(password)
+            logger.info("[AUTH] password rehashed sub=%s", user.id)
+        except PasswordHasherBusy:
+            logger.info("[AUTH] password rehash postergado (bcrypt busy) sub=%s", user.id)
+    refresh_token = refresh_tokens.issue(user)
+    db.session.commit()
+    metrics.inc_auth_session("login")
     logger.info("[AUTH] login ok sub=%s tenant_id=%s role=%s", user.id, user.tenant_id, user.role)
-    return jsonify({
-        "token": token,
-        "role": user.role,
-        "tenant_status": tenant.status_pago if tenant else "activo"
-    }), 200
+    return jsonify(_session_payload(user, refresh_token)), 200
+
+@auth_bp.post("/auth/refresh")
+@limiter.limit("30/minute", override_defaults=False)
+def refresh():
+    """
+    Emite un nuevo JWT de acceso canjeando un refresh token (sin verificar contraseña).
+
+    El refresh token se rota en cada uso: el cliente debe guardar el nuevo y descartar
+    el anterior. Reutilizar un token ya canjeado revoca la sesión completa.
+
+    Body:
+        refresh_token (str): Token recibido en el login o en el refresh anterior.
+
+    Returns:
+        Response: Mismo cuerpo que /auth/login.
+                  Error 401 si el token es inválido, expirado, revocado o reutilizado.
+    """
+    data = request.get_json(silent=True) or {}
+    raw = (data.get("refresh_token") or "").strip()
+    if not raw:
+        return jsonify({"error": "refresh_token_required"}), 400
+    try:
+        user, new_raw = refresh_tokens.rotate(raw)
+    except RefreshTokenReused:
+        return jsonify({"error": "session_revoked", "message": "Sesión revocada. Inicie sesión nuevamente."}), 401
+    except RefreshTokenInvalid:
+        return jsonify({"error": "invalid_refresh_token", "message": "Sesión expirada. Inicie sesión nuevamente."}), 401
+    logger.debug("[AUTH] refresh ok sub=%s tenant_id=%s", user.id, user.tenant_id)
+    return jsonify(_session_payload(user, new_raw)), 200
+
+@auth_bp.post("/auth/logout")
+def logout():
+    """
+    Cierra la sesión: revoca la familia del refresh token y descarta el JWT de la caché local.
+
+    El JWT de acceso sigue siendo válido hasta su `exp` en otros workers (vida corta,
+    TOKEN_EXP_MINUTES); el refresh token deja de funcionar de inmediato.
+
+    Body:
+        refresh_token (str): Token de la sesión a cerrar.
+
+    Returns:
+        Response: 200 siempre (idempotente).
+    """
+    data = request.get_json(silent=True) or {}
+    raw = (data.get("refresh_token") or "").strip()
+    if raw:
+        refresh_tokens.revoke(raw)
+    auth_header = request.headers.get("Authorization", "")
+    if auth_header.startswith("Bearer "):
+        token_cache.invalidate(auth_header.split(" ", 1)[1].strip())
+    return jsonify({"ok": True}), 200
 
 @auth_bp.post("/auth/register")
 @limiter.limit("5/minute; 30/hour", override_defaults=False)
@@ -99,6 +183,7 @@ def register():
                   400 Bad Request si los datos son inválidos.
                   409 Conflict si el email ya existe.
                   429 Too Many Requests si hay exceso de intentos.
+                  503 Service Unavailable si el pool de bcrypt está saturado.
     """
     data = request.get_json(silent=True) or {}
     email = (data.get("email") or "").strip().lower()
@@ -126,6 +211,12 @@ def register():
     if User.query.filter_by(email=email).first():
         return jsonify({"error": "email_taken"}), 409
 
+    try:
+        password_hash = hash_password(password)
+    except PasswordHasherBusy:
+        logger.warning("[AUTH] register rejected (bcrypt busy) ip=%s", ip)
+        return _busy_response()
+
     tenant_name = email.split("@")[0] or "tenant"
     try:
         tenant = Tenant(name=tenant_name, plan="BASICMAAT", status_pago="activo")
@@ -135,7 +226,7 @@ def register():
         user = User(
             tenant_id=tenant.id,
             email=email,
-            password_hash=hash_password(password),
+            password_hash=password_hash,
             role="admin",
             full_name=full_name or None,
         )
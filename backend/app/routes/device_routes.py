@@ -7,41 +7,33 @@ asegurando el cumplimiento de límites según el plan contratado.
 from flask import Blueprint, request, jsonify, g
 from ..auth.decorators import require_auth
 from ..models.device import Device
-from ..db import db
 from ..services import alert_service, device_service
+from ..services import tenant_versions
 from ..services.device_service import DeviceLimitReached
+from ..utils.http_cache import conditional_etag
 from ..__init__ import limiter
 
 device_bp = Blueprint("devices", __name__)
 
 @device_bp.get("/devices")
 @require_auth()
+@conditional_etag(tenant_versions.DEVICES, tenant_versions.ALERTS)
 def list_devices():
     """
     Lista los dispositivos pertenecientes al tenant actual.
 
     Incluye el estado de salud calculado en base a alertas activas.
+    Soporta GET condicional (ETag/If-None-Match → 304).
     Nota: Las credenciales sensibles se excluyen de la respuesta.
 
     Returns:
         Response: Lista de objetos JSON representando los dispositivos.
     """
-    devices = device_service.list_devices_for_tenant(g.tenant_id)
+    devices = device_service.list_device_summaries(g.tenant_id)
+    health_map = {h["device_id"]: h["health_status"] for h in alert_service.get_devices_health(g.tenant_id)}
     result = []
     for d in devices:
-        health = alert_service.compute_device_health(g.tenant_id, d.id)
-        result.append({
-            "id": d.id,
-            "name": d.name,
-            "ip_address": d.ip_address,
-            "port": d.port,
-            "firmware_version": d.firmware_version,
-            "location": d.location,
-            "wan_type": d.wan_type,
-            "created_at": d.created_at.isoformat() if d.created_at else None,
-            "health_status": health,
-            "is_active": getattr(d, 'is_active', True)
-        })
+        result.append({**d, "health_status": health_map.get(d["id"], "verde")})
     return jsonify(result), 200
 
 @device_bp.post("/devices")
@@ -84,20 +76,8 @@ def delete_device(device_id):
 
     Requiere rol 'admin' y que el dispositivo pertenezca al tenant.
     """
-    device = Device.query.filter_by(id=device_id, tenant_id=g.tenant_id).first()
-    if not device:
+    if not device_service.delete_device(g.tenant_id, device_id):
         return jsonify({"message": "Dispositivo no encontrado"}), 404
-
-    # Soft delete if column exists, otherwise hard delete or fallback
-    if hasattr(device, 'is_active'):
-        device.is_active = False
-    else:
-        # If schema isn't updated, we can't really soft delete easily without adding column.
-        # But for this task, we assume the model is updated.
-        device.is_active = False
-
-    db.session.commit()
-
     return jsonify({"message": "Dispositivo eliminado correctamente"}), 200
 
 @device_bp.get("/devices/<int:device_id>")
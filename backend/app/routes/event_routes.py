@@ -0,0 +1,74 @@
+"""
+Rutas de eventos en tiempo real:
+
+- GET /events/stream: Server-Sent Events por tenant (alert-created,
+  alert-status-changed, device-health-changed).
+- POST /events/ticket: ticket de vida corta (EVENTS_TICKET_TTL_SEC) para abrir el stream
+  desde EventSource, que no permite headers. Solo sirve para /events/stream: el JWT de
+  sesión no viaja en la URL ni queda en logs de acceso.
+- Reanudación con Last-Event-ID (header o ?last_event_id=) sin refetch completo;
+  si el buffer ya descartó eventos, se emite `resync` y el cliente debe recargar.
+"""
+import time
+from flask import Blueprint, Response, jsonify, request, g, stream_with_context
+from ..auth.decorators import require_auth
+from ..auth.jwt_utils import create_jwt
+from ..config import Config
+from ..db import db
+from ..services import event_bus
+
+events_bp = Blueprint("events", __name__)
+
+STREAM_TICKET_PURPOSE = "events-stream"
+
+@events_bp.post("/events/ticket")
+@require_auth()
+def stream_ticket():
+    """
+    Emite un ticket para conectar EventSource: `/events/stream?ticket=<ticket>`.
+    - Se valida solo al conectar; al reconectar (fin del stream, caída) el cliente pide
+      un ticket nuevo y reanuda con ?last_event_id=.
+    """
+    ttl = max(int(Config.EVENTS_TICKET_TTL_SEC), 1)
+    ticket = create_jwt(g.user_id, g.tenant_id, g.role, purpose=STREAM_TICKET_PURPOSE, expires_seconds=ttl)
+    return jsonify({"ticket": ticket, "expires_in": ttl})
+
+@events_bp.get("/events/stream")
+@require_auth(ticket_purpose=STREAM_TICKET_PURPOSE)
+def stream_events():
+    """
+    Stream SSE del tenant autenticado (Authorization Bearer o ?ticket=).
+    - La conexión se cierra tras EVENTS_MAX_STREAM_SEC; el navegador reconecta solo
+      enviando Last-Event-ID.
+    - Heartbeat (comentario SSE) cada EVENTS_HEARTBEAT_SEC para atravesar proxies.
+    """
+    tenant_id = int(g.tenant_id)
+    # Clientes nuevos reciben solo eventos posteriores a la conexión
+    last_id = (request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+               or event_bus.current_id(tenant_id))
+    heartbeat = max(int(Config.EVENTS_HEARTBEAT_SEC), 1)
+    max_seconds = max(int(Config.EVENTS_MAX_STREAM_SEC), 1)
+    # No retener una conexión de la DB durante toda la vida del stream
+    db.session.remove()
+
+    def generate():
+        cursor = last_id
+        deadline = time.monotonic() + max_seconds
+        yield "retry: 3000\n\n"
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            events, gap, cursor = event_bus.read(tenant_id, cursor, min(heartbeat, remaining))
+            if gap:
+                yield event_bus.format_sse(cursor, event_bus.RESYNC_EVENT, {})
+            if not events:
+                yield ": keepalive\n\n"
+                continue
+            for event_id, event_type, data in events:
+                yield event_bus.format_sse(event_id, event_type, data)
+
+    return Response(stream_with_context(generate()), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",  # Nginx: no bufferizar la respuesta
+    })
@@ -8,7 +8,10 @@ from flask import Blueprint, jsonify, g
 from ..auth.decorators import require_auth
 from ..models.device import Device
 from ..models.alert import Alert
-from ..services import alert_service  # añadido
+from .. import metrics
+from ..auth import token_cache
+from ..services import alert_service, tenant_versions
+from ..utils.http_cache import conditional_etag
 
 health_bp = Blueprint("health", __name__)
 
@@ -26,6 +29,7 @@ def health_check():
 
 @health_bp.get("/health/devices")
 @require_auth()
+@conditional_etag(tenant_versions.DEVICES, tenant_versions.ALERTS)
 def health_devices():
     """
     Devuelve lista de { device_id, name, health_status } para todos los equipos del tenant.
@@ -36,16 +40,18 @@ def health_devices():
     Seguridad: No exponer campos internos ni credenciales.
     """
     try:
-        devices = Device.query.filter_by(tenant_id=g.tenant_id).all()
-        result = []
-        for d in devices:
-            health = alert_service.compute_device_health(g.tenant_id, d.id)
-            result.append({
-                "device_id": d.id,
-                "name": d.name,
-                "health_status": health
-            })
+        # Lectura de la salud materializada (mantenida en cada escritura de alertas)
+        result = alert_service.get_devices_health(g.tenant_id)
         return jsonify(result), 200
     except Exception:
         # Manejo de errores consistente sin exponer detalles internos
         return jsonify({"error": "Error al obtener estado de salud"}), 500
+
+@health_bp.get("/health/metrics")
+@require_auth(role="admin")
+def health_metrics():
+    """
+    Contadores operativos en memoria del worker que atiende la petición
+    (solicitudes IA, fallbacks, cachés de respuestas y de JWT).
+    """
+    return jsonify({**metrics.snapshot(), "jwt_cache": token_cache.stats()}), 200
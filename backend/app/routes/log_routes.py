@@ -10,6 +10,8 @@ from ..models.log_entry import LogEntry
 from ..models.device import Device
 from ..models.tenant import Tenant
 from ..utils.export_pdf import generate_logs_pdf
+from ..utils import export_cache
+from ..utils.json_response import json_response
 from io import BytesIO
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import A4
@@ -42,14 +44,10 @@ def device_logs(device_id: int):
     Returns:
         Response:
             - JSON con lista de logs (default).
-            - Archivo binario (PDF/CSV) si se solicita.
+            - Archivo binario (PDF/CSV) si se solicita (servido desde caché en disco si
+              ya fue generado y no llegaron logs nuevos dentro del rango).
             - 404 si el dispositivo no existe o no pertenece al tenant.
     """
-    # Validar propiedad del dispositivo
-    owner = Device.query.filter_by(id=device_id, tenant_id=g.tenant_id).first()
-    if not owner:
-        return jsonify({"error": "Dispositivo no encontrado"}), 404
-
     # Helper para parseo de fechas
     def _parse_iso(s: str):
         if not s:
@@ -86,6 +84,29 @@ def device_logs(device_id: int):
     # Soporte legacy para formato
     fmt = (request.args.get("format") or request.args.get("export") or "").lower().strip()
 
+    # Validar propiedad del dispositivo antes de cualquier respuesta, incluidas las
+    # exportaciones servidas desde caché
+    owner = Device.query.filter_by(id=device_id, tenant_id=g.tenant_id).first()
+    if not owner:
+        return jsonify({"error": "Dispositivo no encontrado"}), 404
+    # Leída antes de consultar logs: si el poller invalida durante la consulta, no se cachea
+    wants_export = formato == "pdf" or fmt in ("pdf", "csv")
+    generation = export_cache.generation(g.tenant_id, device_id) if wants_export else None
+
+    # Exportaciones ya generadas se sirven desde caché sin consultar los logs
+    cache_key = None
+    if formato == "pdf":
+        cache_key = export_cache.build_key(g.tenant_id, device_id, rango_inicio, rango_fin, search, "pdf", "formato")
+        cached = export_cache.get(cache_key)
+        if cached is not None:
+            logger.info("[INFO] export_pdf form=formato cache=hit tenant_id=%s device_id=%s", g.tenant_id, device_id)
+            filename = f"device_{device_id}_logs_{datetime.utcnow().strftime('%Y%m%d')}.pdf"
+            return Response(
+                cached,
+                mimetype="application/pdf",
+                headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+            )
+
     # --- Exportación PDF ---
     if formato == "pdf":
         q_new = LogEntry.query.filter_by(tenant_id=g.tenant_id, device_id=device_id)
@@ -99,6 +120,7 @@ def device_logs(device_id: int):
         logs_new = q_new.all()
 
         pdf_bytes = _build_logs_pdf(logs_new, device_id)
+        export_cache.put(cache_key, pdf_bytes, rango_inicio, rango_fin, g.tenant_id, device_id, generation)
 
         logger.info(
             "[INFO] export_pdf form=formato tenant_id=%s device_id=%s count=%s", g.tenant_id, device_id, len(logs_new)
@@ -117,6 +139,19 @@ def device_logs(device_id: int):
         if not isinstance(pdf_limit, int) or pdf_limit <= 0:
             pdf_limit = max_rows
         pdf_limit = min(pdf_limit, max_rows)
+        filename = f"logs_{datetime.utcnow().date().isoformat()}_device_{device_id}.pdf"
+
+        legacy_key = export_cache.build_key(
+            g.tenant_id, device_id, fecha_inicio, fecha_fin, "", "pdf", f"legacy:{pdf_limit}"
+        )
+        cached = export_cache.get(legacy_key)
+        if cached is not None:
+            logger.info("[INFO] export_pdf form=legacy cache=hit tenant_id=%s device_id=%s", g.tenant_id, device_id)
+            return Response(
+                cached,
+                mimetype="application/pdf",
+                headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+            )
 
         q_pdf = LogEntry.query.filter_by(tenant_id=g.tenant_id, device_id=device_id)
         if fecha_inicio:
@@ -136,11 +171,11 @@ def device_logs(device_id: int):
             fecha_inicio=fecha_inicio.isoformat() if fecha_inicio else None,
             fecha_fin=fecha_fin.isoformat() if fecha_fin else None,
         )
+        export_cache.put(legacy_key, pdf_bytes, fecha_inicio, fecha_fin, g.tenant_id, device_id, generation)
         logger.info(
             "[INFO] export_pdf form=legacy tenant_id=%s device_id=%s count=%s", g.tenant_id, device_id, len(logs_pdf)
         )
 
-        filename = f"logs_{datetime.utcnow().date().isoformat()}_device_{device_id}.pdf"
         return Response(
             pdf_bytes,
             mimetype="application/pdf",
@@ -153,6 +188,23 @@ def device_logs(device_id: int):
     if limit not in allowed_limits:
         limit = 10
 
+    export = request.args.get("export", "").lower().strip()
+    if fmt == "csv":
+        export = "csv"
+
+    csv_key = None
+    if export == "csv":
+        csv_key = export_cache.build_key(g.tenant_id, device_id, fecha_inicio, fecha_fin, "", "csv", f"limit:{limit}")
+        cached = export_cache.get(csv_key)
+        if cached is not None:
+            return Response(
+                cached,
+                mimetype="text/csv; charset=utf-8",
+                headers={
+                    "Content-Disposition": f'attachment; filename="logs_device_{device_id}.csv"'
+                },
+            )
+
     q = LogEntry.query.filter_by(tenant_id=g.tenant_id, device_id=device_id)
     if fecha_inicio:
         q = q.filter(LogEntry.timestamp_equipo >= fecha_inicio)
@@ -162,10 +214,6 @@ def device_logs(device_id: int):
     q = q.order_by(LogEntry.timestamp_equipo.desc())
     logs = q.limit(limit).all()
 
-    export = request.args.get("export", "").lower().strip()
-    if fmt == "csv":
-        export = "csv"
-
     if export == "csv":
         # Mitigación de inyección CSV
         def _csv_safe(s: str) -> str:
@@ -187,6 +235,7 @@ def device_logs(device_id: int):
             )
         csv_data = buf.getvalue()
         buf.close()
+        export_cache.put(csv_key, csv_data.encode("utf-8"), fecha_inicio, fecha_fin, g.tenant_id, device_id, generation)
         filename = f"logs_device_{device_id}.csv"
         return Response(
             csv_data,
@@ -202,12 +251,12 @@ def device_logs(device_id: int):
             "id": l.id,
             "raw_log": l.raw_log,
             "log_level": l.log_level,
-            "timestamp_equipo": l.timestamp_equipo.isoformat() if l.timestamp_equipo else None,
-            "created_at": l.created_at.isoformat() if l.created_at else None,
+            "timestamp_equipo": l.timestamp_equipo,
+            "created_at": l.created_at,
         }
         for l in logs
     ]
-    return jsonify(result), 200
+    return json_response(result)
 
 
 def _build_logs_pdf(logs, device_id: int) -> bytes:
@@ -2,13 +2,18 @@
 Rutas NOC:
 
 - Acciones del operador (marcar En curso/Resuelta, comentar).
+- Acciones masivas sobre alertas (por IDs o por filtro).
 """
+from datetime import datetime
 from flask import Blueprint, request, jsonify, g
 from ..auth.decorators import require_auth
+from ..config import Config
 from ..services import alert_service
 
 noc_bp = Blueprint("noc", __name__)
 
+VALID_STATUSES = {"Pendiente", "En curso", "Resuelta"}
+
 @noc_bp.patch("/alerts/<int:alert_id>/status")
 @require_auth()  # Operadores NOC o Admin
 def update_alert_status(alert_id: int):
@@ -16,11 +21,12 @@ def update_alert_status(alert_id: int):
     Body: { status_operativo, comentario }
     - Solo usuarios del mismo tenant (enforced en service).
     - Registra histórico para SLA.
+    - 409 si reabrir una alerta resuelta duplicaría otra alerta abierta (misma huella).
     """
     data = request.get_json(silent=True) or {}
     new_status = data.get("status_operativo")
     comentario = data.get("comentario")
-    if new_status not in {"Pendiente", "En curso", "Resuelta"}:
+    if new_status not in VALID_STATUSES:
         return jsonify({"error": "status_operativo inválido"}), 400
 
     try:
@@ -31,7 +37,81 @@ def update_alert_status(alert_id: int):
             nuevo_status=new_status,
             comentario=comentario
         )
+    except alert_service.AlertReopenConflict as e:
+        return jsonify({
+            "error": "Ya existe una alerta abierta con la misma huella",
+            "open_alert_id": e.open_alert_id,
+        }), 409
     except ValueError:
         return jsonify({"error": "Alerta no encontrada"}), 404
 
     return jsonify({"id": alert.id, "status_operativo": alert.status_operativo}), 200
+
+
+@noc_bp.patch("/alerts/status")
+@require_auth()  # Operadores NOC o Admin
+def bulk_update_alert_status():
+    """
+    Body: { status_operativo, comentario, ids: [int] } o
+          { status_operativo, comentario, filter: { device_id, estado, older_than (ISO8601) } }
+    - Una sola transacción: UPDATE único + histórico insertado en lote.
+    - Respuesta: { updated: n, ids: [...], conflicts: [{ id, open_alert_id }] }.
+      `conflicts` lista las alertas resueltas que no se reabrieron porque su huella ya
+      tiene otra alerta abierta.
+    """
+    data = request.get_json(silent=True) or {}
+    new_status = data.get("status_operativo")
+    comentario = data.get("comentario")
+    if new_status not in VALID_STATUSES:
+        return jsonify({"error": "status_operativo inválido"}), 400
+
+    ids = data.get("ids")
+    raw_filter = data.get("filter")
+    if (ids is None) == (raw_filter is None):
+        return jsonify({"error": "Debe indicar 'ids' o 'filter' (solo uno)"}), 400
+
+    filtros = None
+    if ids is not None:
+        if not isinstance(ids, list) or not ids:
+            return jsonify({"error": "ids debe ser una lista no vacía"}), 400
+        try:
+            ids = [int(i) for i in ids]
+        except (TypeError, ValueError):
+            return jsonify({"error": "ids debe contener enteros"}), 400
+    else:
+        if not isinstance(raw_filter, dict):
+            return jsonify({"error": "filter inválido"}), 400
+        filtros = {}
+        try:
+            if raw_filter.get("device_id") is not None:
+                filtros["device_id"] = int(raw_filter["device_id"])
+            if raw_filter.get("estado"):
+                filtros["estado"] = str(raw_filter["estado"])
+            if raw_filter.get("older_than"):
+                filtros["older_than"] = datetime.fromisoformat(
+                    str(raw_filter["older_than"]).replace("Z", "+00:00")
+                )
+        except (TypeError, ValueError):
+            return jsonify({"error": "filter inválido"}), 400
+        if not filtros:
+            # Evita actualizar todas las alertas del tenant por accidente
+            return jsonify({"error": "filter requiere al menos un criterio"}), 400
+
+    try:
+        updated, conflicts = alert_service.bulk_update_alert_status(
+            tenant_id=g.tenant_id,
+            user_id=g.user_id,
+            nuevo_status=new_status,
+            comentario=comentario,
+            alert_ids=ids,
+            filtros=filtros,
+            max_alerts=Config.ALERTS_BULK_MAX,
+        )
+    except alert_service.BulkUpdateTooLarge as e:
+        return jsonify({"error": "Demasiadas alertas en una sola operación", "matched": e.matched, "max": e.limit}), 400
+
+    return jsonify({
+        "updated": len(updated),
+        "ids": updated,
+        "conflicts": [{"id": i, "open_alert_id": o} for i, o in sorted(conflicts.items())],
+    }), 200
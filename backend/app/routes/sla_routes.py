@@ -1,9 +1,20 @@
-from flask import Blueprint, jsonify, g
+from datetime import date, datetime, timedelta
+from flask import Blueprint, jsonify, g, request
 from ..auth.decorators import require_auth
-from ..services.sla_service import get_sla_metrics
+from ..services.sla_service import get_sla_metrics, summarize_rollups
+from ..services.sla_analytics_service import compute_mtta_mttr
+from .alert_routes import _parse_iso
 
 sla_bp = Blueprint("sla", __name__)
 
+def _parse_month(value: str):
+    """Parsea 'YYYY-MM' al primer día del mes. Retorna None si es inválido."""
+    try:
+        parsed = datetime.strptime((value or "").strip(), "%Y-%m")
+        return date(parsed.year, parsed.month, 1)
+    except ValueError:
+        return None
+
 @sla_bp.get("/sla/metrics")
 @require_auth()
 def sla_metrics():
@@ -14,4 +25,66 @@ def sla_metrics():
     }
     """
     metrics = get_sla_metrics(g.tenant_id)
-    return jsonify(metrics), 200
\ No newline at end of file
+    return jsonify(metrics), 200
+
+@sla_bp.get("/sla/rollups")
+@require_auth()
+def sla_rollups():
+    """
+    Resumen de tiempos de resolución para un rango de meses (reportes mensuales/trimestrales).
+    Query: desde=YYYY-MM, hasta=YYYY-MM (default: mes actual), device_id, severidad.
+    {
+      "desde": "2024-01", "hasta": "2024-03", "resueltas": 12, "promedio_min": 42.5,
+      "desvio_min": 10.1, "p50_min_estimado": 60.0, "p90_min_estimado": 120.0
+    }
+    """
+    today = datetime.utcnow().date()
+    current = date(today.year, today.month, 1)
+    desde = _parse_month(request.args.get("desde")) if request.args.get("desde") else current
+    hasta = _parse_month(request.args.get("hasta")) if request.args.get("hasta") else current
+    if not desde or not hasta or desde > hasta:
+        return jsonify({"error": "Rango inválido (usar YYYY-MM)"}), 400
+
+    severidad = request.args.get("severidad")
+    summary = summarize_rollups(
+        g.tenant_id,
+        desde,
+        hasta,
+        severities=[severidad] if severidad else None,
+        device_id=request.args.get("device_id", type=int),
+    )
+    summary.update({"desde": desde.strftime("%Y-%m"), "hasta": hasta.strftime("%Y-%m")})
+    return jsonify(summary), 200
+
+@sla_bp.get("/sla/analytics")
+@require_auth()
+def sla_analytics():
+    """
+    Distribuciones de MTTA (primer "En curso") y MTTR (primer "Resuelta") en minutos.
+    Query: from/to ISO 8601 (default: últimos 30 días), group_by=severity|device, device_id.
+    {
+      "group_by": "severity",
+      "overall": {"alerts": 10, "mtta_min": {"n": 8, "mean": .., "p50": .., "p90": .., "p99": ..}, "mttr_min": {...}},
+      "groups": [{"key": "Alerta Severa", "alerts": 4, "mtta_min": {...}, "mttr_min": {...}}]
+    }
+    """
+    try:
+        end = _parse_iso(request.args.get("to"))
+        start = _parse_iso(request.args.get("from"))
+    except ValueError:
+        return jsonify({"error": "Fecha inválida (usar ISO 8601)"}), 400
+    end = end or datetime.utcnow()
+    start = start or (end - timedelta(days=30))
+
+    try:
+        result = compute_mtta_mttr(
+            g.tenant_id,
+            start,
+            end,
+            group_by=(request.args.get("group_by") or "severity").lower(),
+            device_id=request.args.get("device_id", type=int),
+        )
+    except ValueError:
+        return jsonify({"error": "group_by inválido (severity|device)"}), 400
+    result.update({"from": start.isoformat(), "to": end.isoformat()})
+    return jsonify(result), 200
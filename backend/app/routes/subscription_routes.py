@@ -16,6 +16,9 @@ def subscription_status():
     """
     Obtiene el estado de la suscripción del Tenant actual.
 
+    Sin ETag: la respuesta depende del tiempo (vencimiento de la suscripción) y del
+    plan/estado de pago del tenant, que se escriben fuera de la capa de servicios.
+
     Returns:
         Response: Objeto JSON con detalles del plan, límites y uso actual.
                   Indica si la cuenta está suspendida.
@@ -3,33 +3,31 @@ Servicio de Análisis de IA Interno.
 
 Actúa como una fachada (Facade) para la estrategia del Proveedor de IA.
 Delega el análisis forense al proveedor activo configurado (ej. DeepSeek, Gemini).
+`analyze_device_contexts` agrupa varios dispositivos en una sola solicitud (modo lote);
+`analyze_device_context` lo usa automáticamente para las llamadas concurrentes del ciclo
+de monitoreo (ventana AI_BATCH_WINDOW_MS).
 """
 import logging
 import json
 import asyncio
-from typing import Dict, Any, List, Optional
-from backend.app.core.ai.factory import get_ai_provider
+import weakref
+from typing import Dict, Any, List, Optional, Tuple
+from ..core.ai.factory import get_ai_provider
+from ..core.ai.http import close_session
+from ..core.ai.base import FALLBACK_KEY, is_fallback
+from ..core.ai.dispatcher import (
+    PRIORITY_CRITICAL, PRIORITY_HIGH, PRIORITY_NORMAL, dispatch, estimate_tokens, shutdown_dispatchers,
+)
+from ..config import Config
+from ..utils import ai_cache, context_compaction
+from .. import metrics
 
 logger = logging.getLogger(__name__)
 
-async def analyze_device_context(context: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Analiza el contexto forense completo utilizando el Proveedor de IA configurado.
-
-    Args:
-        context (Dict[str, Any]): Datos estructurados del dispositivo (salud, logs, interfaces, etc.).
-
-    Returns:
-        Dict[str, Any]: Resultado del análisis, incluyendo diagnóstico y recomendaciones.
-    """
-    provider = get_ai_provider()
-    logger.info(f"[INFO] Iniciando análisis forense con proveedor: {provider.__class__.__name__}")
+# Versión del prompt forense: incrementarla al modificar FORENSIC_PROMPT invalida la caché
+PROMPT_VERSION = "forensic-v2"
 
-    # Prepare context string and prompt template
-    context_str = json.dumps(context, indent=2)
-
-    # We could move this prompt to a constant or configuration
-    prompt_template = """
+FORENSIC_PROMPT = """
 You are a MTCINE (MikroTik Certified Inter-networking Engineer) and a Lead Network Security Architect.
 Your goal is to analyze deep forensic data from a MikroTik router and provide a structured diagnosis.
 
@@ -57,24 +55,336 @@ Rules:
 4. If CPU is high, check for loops or heavy firewall rules.
 5. If voltage is low (<10V for 12V systems), flag as power issue.
 6. Ignore minor log noise. Focus on warnings, errors, and critical state changes.
+7. The input is compacted: empty fields are removed, only the interfaces with the most errors are
+   listed, "repeat" counts identical log lines and "omitted" counts items left out.
 """
 
+DIAGNOSIS_STATUSES = frozenset({"CRITICAL", "WARNING", "HEALTHY"})
+
+# Mismas reglas y esquema por dispositivo que FORENSIC_PROMPT (comparten PROMPT_VERSION y caché)
+BATCH_FORENSIC_PROMPT = FORENSIC_PROMPT + """
+BATCH MODE:
+Input is a JSON object {"devices": {"<device_id>": <forensic data>, ...}} with several routers.
+Analyze each router independently; never mix findings between devices.
+Output: Strict JSON {"results": {"<device_id>": <diagnosis object with the keys above>, ...}}
+with exactly one entry per input device_id, using the same device_id strings as keys.
+"""
+
+def critical_heuristics(context: Dict[str, Any]) -> List[str]:
+    """Hallazgos heurísticos locales marcados como críticos (ej. "Uso de CPU crítico")."""
+    return [
+        str(h) for h in context.get("heuristics") or []
+        if "critical" in str(h).lower() or "crític" in str(h).lower()
+    ]
+
+def analysis_priority(context: Dict[str, Any]) -> int:
+    """
+    Prioridad en la cola del despachador de IA (menor = antes).
+
+    Los dispositivos con hallazgos críticos se analizan primero cuando el presupuesto
+    del proveedor (RPM/TPM) es escaso.
+    """
+    if critical_heuristics(context):
+        return PRIORITY_CRITICAL
+    if context.get("heuristics"):
+        return PRIORITY_HIGH
+    return PRIORITY_NORMAL
+
+def serialize_context(context: Dict[str, Any]) -> str:
+    """
+    Contexto forense como JSON compacto para el prompt.
+
+    Con AI_CONTEXT_COMPACTION_ENABLED aplica `context_compaction` (campos vacíos fuera,
+    top-K interfaces, logs deduplicados/truncados, presupuesto AI_CONTEXT_TOKEN_BUDGET)
+    y registra los tokens estimados antes/después de cada llamada.
+
+    Raises:
+        ContextOverBudget: Si el contexto no entra en el presupuesto ni recortado.
+    """
+    if not getattr(Config, "AI_CONTEXT_COMPACTION_ENABLED", True):
+        return json.dumps(context, separators=(",", ":"), default=str)
+    compacted = context_compaction.compact_to_budget(context)
+    metrics.observe_ai_context_tokens(compacted.tokens_before, compacted.tokens_after)
+    logger.info(
+        f"[INFO] Contexto IA compactado device_id={context.get('device_id')} "
+        f"tokens {compacted.tokens_before} -> {compacted.tokens_after}"
+    )
+    return compacted.text
+
+def _cache_key(provider: Any, context: Dict[str, Any]) -> str:
+    return ai_cache.build_key(context, PROMPT_VERSION, provider.__class__.__name__, getattr(provider, "model", "") or "")
+
+def _failure_result(error: Exception) -> Dict[str, Any]:
+    """Respuesta de respaldo segura (marcada como fallback: no se cachea ni genera alerta IA)."""
+    return {
+        "status": "WARNING",
+        "summary": "AI Analysis Failed",
+        "technical_analysis": f"Internal error during AI analysis: {str(error)}",
+        "security_audit": "N/A",
+        "recommendations": ["Check backend logs"],
+        "confidence_score": 0.0,
+        FALLBACK_KEY: True,
+    }
+
+async def _analyze_single(provider: Any, context: Dict[str, Any], cache_key: Optional[str],
+                          text: Optional[str] = None) -> Dict[str, Any]:
+    """Una solicitud por dispositivo; `text` reutiliza el contexto ya serializado (modo lote)."""
+    logger.info(f"[INFO] Iniciando análisis forense con proveedor: {provider.__class__.__name__}")
     try:
-        # Note: analyze is now async
-        result = await provider.analyze(context_str, prompt_template)
+        result = await dispatch(
+            provider, text or serialize_context(context), FORENSIC_PROMPT,
+            priority=analysis_priority(context), key=context.get("device_id"),
+        )
         logger.info("[INFO] Análisis de IA completado exitosamente.")
-        return result
     except Exception as e:
         logger.error(f"[ERROR] Falló el análisis de IA: {e}")
-        # Fallback to a safe response structure
-        return {
-            "status": "WARNING",
-            "summary": "AI Analysis Failed",
-            "technical_analysis": f"Internal error during AI analysis: {str(e)}",
-            "security_audit": "N/A",
-            "recommendations": ["Check backend logs"],
-            "confidence_score": 0.0
-        }
+        return _failure_result(e)
+
+    if cache_key is not None:
+        await asyncio.to_thread(ai_cache.put, cache_key, result)
+    return result
+
+async def analyze_device_context(context: Dict[str, Any], use_cache: bool = True) -> Dict[str, Any]:
+    """
+    Analiza el contexto forense completo utilizando el Proveedor de IA configurado.
+
+    Si el estado del dispositivo no cambió de forma significativa (misma clave de
+    `ai_cache` para el prompt, proveedor y modelo vigentes) se reutiliza el diagnóstico
+    anterior sin invocar al proveedor. Las llamadas pasan por el despachador de IA
+    (límites RPM/TPM, concurrencia, prioridad y coalescencia por dispositivo).
+
+    Con AI_BATCH_ENABLED, las llamadas concurrentes del mismo event loop (el ciclo de
+    monitoreo analiza sus dispositivos en paralelo) se reúnen durante AI_BATCH_WINDOW_MS
+    y se resuelven con `analyze_device_contexts` (solicitudes en lote).
+
+    Args:
+        context (Dict[str, Any]): Datos estructurados del dispositivo (salud, logs, interfaces, etc.).
+        use_cache (bool): Consultar/poblar la caché de diagnósticos.
+
+    Returns:
+        Dict[str, Any]: Resultado del análisis, incluyendo diagnóstico y recomendaciones.
+    """
+    if _batch_window() > 0 and context.get("device_id") is not None:
+        return await _collector(use_cache).submit(context)
+    return await _analyze_now(context, use_cache)
+
+async def _analyze_now(context: Dict[str, Any], use_cache: bool) -> Dict[str, Any]:
+    provider = get_ai_provider()
+
+    cache_key = None
+    if use_cache and ai_cache.is_enabled():
+        cache_key = _cache_key(provider, context)
+        cached = await asyncio.to_thread(ai_cache.get, cache_key)
+        if cached is not None:
+            logger.info(f"[INFO] Diagnóstico reutilizado de caché device_id={context.get('device_id')}")
+            return cached
+
+    return await _analyze_single(provider, context, cache_key)
+
+def valid_diagnosis(item: Any) -> bool:
+    """Valida un diagnóstico por dispositivo de la respuesta en lote (claves y tipos mínimos)."""
+    if not isinstance(item, dict):
+        return False
+    summary = item.get("summary")
+    return (
+        str(item.get("status") or "").upper() in DIAGNOSIS_STATUSES
+        and isinstance(summary, str) and bool(summary.strip())
+        and ai_cache.is_cacheable(item)
+    )
+
+def pack_batches(items: List[Tuple[Any, str]], token_budget: int, max_devices: int) -> List[List[Tuple[Any, str]]]:
+    """
+    Agrupa contextos serializados en lotes sin superar el presupuesto de tokens estimado.
+
+    Args:
+        items (List[Tuple[Any, str]]): Pares (device_id, contexto serializado), en orden de prioridad.
+        token_budget (int): Tokens de entrada máximos por lote.
+        max_devices (int): Dispositivos máximos por lote.
+
+    Returns:
+        List[List[Tuple[Any, str]]]: Lotes; un contexto que excede el presupuesto va solo.
+    """
+    batches: List[List[Tuple[Any, str]]] = []
+    current: List[Tuple[Any, str]] = []
+    used = 0
+    for device_id, text in items:
+        cost = estimate_tokens(text)
+        if current and (used + cost > token_budget or len(current) >= max_devices):
+            batches.append(current)
+            current, used = [], 0
+        current.append((device_id, text))
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+def _batch_payload(batch: List[Tuple[Any, str]]) -> str:
+    # Los contextos ya están serializados: se ensamblan sin volver a codificarlos
+    entries = ",".join(f"{json.dumps(str(device_id))}:{text}" for device_id, text in batch)
+    return '{"devices":{' + entries + "}}"
+
+async def _analyze_batch(provider: Any, batch: List[Tuple[Any, str]], contexts: Dict[Any, Dict[str, Any]],
+                         cache_keys: Dict[Any, Optional[str]]) -> Dict[Any, Dict[str, Any]]:
+    """Un lote en una sola solicitud; los dispositivos omitidos o inválidos se analizan por separado."""
+    texts = dict(batch)
+    if len(batch) == 1:
+        device_id = batch[0][0]
+        return {device_id: await _analyze_single(provider, contexts[device_id], cache_keys.get(device_id), texts[device_id])}
+
+    results: Dict[Any, Dict[str, Any]] = {}
+    try:
+        response = await dispatch(
+            provider, _batch_payload(batch), BATCH_FORENSIC_PROMPT,
+            priority=min(analysis_priority(contexts[d]) for d, _ in batch), outputs=len(batch),
+        )
+        metrics.inc_ai_batch("requests")
+        per_device = response.get("results") if isinstance(response, dict) else None
+        if not isinstance(per_device, dict):
+            per_device = {}
+        for device_id, _text in batch:
+            item = per_device.get(str(device_id))
+            if valid_diagnosis(item):
+                results[device_id] = item
+                if cache_keys.get(device_id) is not None:
+                    await asyncio.to_thread(ai_cache.put, cache_keys[device_id], item)
+    except Exception as e:
+        logger.error(f"[ERROR] Falló el análisis de IA en lote ({len(batch)} dispositivos): {e}")
+
+    missing = [device_id for device_id, _ in batch if device_id not in results]
+    metrics.inc_ai_batch("devices", len(results))
+    if missing:
+        metrics.inc_ai_batch("omitted", len(missing))
+        logger.warning(f"[WARNING] Lote IA sin diagnóstico válido para device_ids={missing}; reintento individual")
+        # Se reenvía el texto ya compactado: sin segunda compactación ni doble conteo de tokens
+        singles = await asyncio.gather(*(
+            _analyze_single(provider, contexts[device_id], cache_keys.get(device_id), texts[device_id])
+            for device_id in missing
+        ))
+        results.update(zip(missing, singles))
+    return results
+
+async def analyze_device_contexts(contexts: List[Dict[str, Any]], use_cache: bool = True) -> Dict[Any, Dict[str, Any]]:
+    """
+    Analiza varios dispositivos agrupando sus contextos en solicitudes por lotes.
+
+    Los routers pequeños generan contextos diminutos donde domina el costo fijo de cada
+    solicitud; aquí se empaquetan hasta AI_BATCH_TOKEN_BUDGET tokens estimados (y
+    AI_BATCH_MAX_DEVICES dispositivos) por solicitud, con una respuesta indexada por
+    device_id. Cada diagnóstico del lote se valida; los dispositivos omitidos o con
+    respuesta inválida se reenvían en llamadas individuales. La caché se aplica por
+    dispositivo, igual que en `analyze_device_context`.
+
+    Args:
+        contexts (List[Dict[str, Any]]): Salidas de DeviceMiner.mine() (con device_id).
+        use_cache (bool): Consultar/poblar la caché de diagnósticos.
+
+    Returns:
+        Dict[Any, Dict[str, Any]]: Diagnóstico por device_id.
+
+    Raises:
+        ValueError: Si algún contexto no tiene device_id o está repetido.
+    """
+    by_id: Dict[Any, Dict[str, Any]] = {}
+    for context in contexts:
+        device_id = context.get("device_id")
+        if device_id is None or device_id in by_id:
+            raise ValueError(f"Contexto sin device_id o duplicado: {device_id!r}")
+        by_id[device_id] = context
+
+    provider = get_ai_provider()
+    results: Dict[Any, Dict[str, Any]] = {}
+    cache_keys: Dict[Any, Optional[str]] = {}
+    if use_cache and ai_cache.is_enabled():
+        for device_id, context in by_id.items():
+            cache_keys[device_id] = _cache_key(provider, context)
+            cached = await asyncio.to_thread(ai_cache.get, cache_keys[device_id])
+            if cached is not None:
+                results[device_id] = cached
+
+    pending = sorted((d for d in by_id if d not in results), key=lambda d: analysis_priority(by_id[d]))
+    if not getattr(Config, "AI_BATCH_ENABLED", True):
+        batches = [[(device_id, "")] for device_id in pending]
+    else:
+        serialized: List[Tuple[Any, str]] = []
+        for device_id in pending:
+            try:
+                serialized.append((device_id, serialize_context(by_id[device_id])))
+            except context_compaction.ContextOverBudget as e:
+                # No se envía un contexto fuera de presupuesto: respaldo para ese dispositivo
+                logger.error(f"[ERROR] Falló el análisis de IA: {e}")
+                results[device_id] = _failure_result(e)
+        batches = pack_batches(
+            serialized,
+            int(getattr(Config, "AI_BATCH_TOKEN_BUDGET", 6000)),
+            max(int(getattr(Config, "AI_BATCH_MAX_DEVICES", 8)), 1),
+        )
+    for partial in await asyncio.gather(*(_analyze_batch(provider, b, by_id, cache_keys) for b in batches)):
+        results.update(partial)
+    return results
+
+def _batch_window() -> float:
+    if not getattr(Config, "AI_BATCH_ENABLED", True):
+        return 0.0
+    return max(float(getattr(Config, "AI_BATCH_WINDOW_MS", 50)), 0.0) / 1000.0
+
+class _BatchCollector:
+    """Reúne los análisis individuales de un event loop y los resuelve en lote."""
+
+    def __init__(self, use_cache: bool):
+        self.use_cache = use_cache
+        self.pending: Dict[Any, Tuple[Dict[str, Any], "asyncio.Future"]] = {}
+        self.flush_task: Optional["asyncio.Task"] = None
+
+    async def submit(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        device_id = context["device_id"]
+        if device_id in self.pending:
+            # El mismo dispositivo ya espera en esta ventana: comparte su resultado
+            return await asyncio.shield(self.pending[device_id][1])
+        future = asyncio.get_running_loop().create_future()
+        self.pending[device_id] = (context, future)
+        if self.flush_task is None:
+            self.flush_task = asyncio.ensure_future(self._flush_later())
+        return await asyncio.shield(future)
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(_batch_window())
+        pending, self.pending, self.flush_task = self.pending, {}, None
+        contexts = [context for context, _future in pending.values()]
+        try:
+            if len(contexts) == 1:
+                results = {contexts[0]["device_id"]: await _analyze_now(contexts[0], self.use_cache)}
+            else:
+                results = await analyze_device_contexts(contexts, use_cache=self.use_cache)
+        except Exception as e:
+            for _context, future in pending.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for device_id, (_context, future) in pending.items():
+            if not future.done():
+                future.set_result(results.get(device_id) or _failure_result(RuntimeError("sin diagnóstico en lote")))
+
+# Un colector por (event loop, use_cache): las ventanas y futures pertenecen a su loop
+_collectors: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[bool, _BatchCollector]]" = weakref.WeakKeyDictionary()
+
+def _collector(use_cache: bool) -> _BatchCollector:
+    per_loop = _collectors.setdefault(asyncio.get_running_loop(), {})
+    collector = per_loop.get(use_cache)
+    if collector is None:
+        collector = per_loop[use_cache] = _BatchCollector(use_cache)
+    return collector
+
+async def close_ai_session() -> None:
+    """
+    Cierra la sesión HTTP compartida con el proveedor de IA del event loop actual.
+
+    Los proveedores son de larga vida y reutilizan conexiones keep-alive; el runner del
+    ciclo de monitoreo debe invocarla antes de que termine su event loop. También detiene
+    los workers del despachador de IA de ese loop.
+    """
+    _collectors.pop(asyncio.get_running_loop(), None)
+    await shutdown_dispatchers()
+    await close_session()
 
 # Deprecated / Wrapper Legacy para retrocompatibilidad
 async def analyze_logs(log_list: List[Any], device_context: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
@@ -7,23 +7,35 @@ Este servicio encapsula la lógica de negocio relacionada con las alertas:
 - Cálculo de indicadores de salud de dispositivos basados en alertas activas.
 - Registro histórico para cumplimiento de SLA.
 """
+from base64 import urlsafe_b64decode, urlsafe_b64encode
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from hashlib import sha256
+import re
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+import logging
+from sqlalchemy import and_, case, func, insert, or_, text, update
+from sqlalchemy.orm import load_only
+from sqlalchemy.exc import IntegrityError
 from ..models.alert import Alert
 from ..models.alert_status_history import AlertStatusHistory
+from ..models.device import Device
+from ..models.device_health import DeviceHealth
 from ..db import db
+from . import event_bus, sla_service, tenant_versions
+from ..utils import ai_cache, response_cache
 
-def list_alerts(tenant_id: int, filtros: Dict[str, Any]) -> List[Alert]:
-    """
-    Lista alertas aplicando filtros de negocio.
+# Severidades que marcan un dispositivo en rojo
+SEVERE_STATES = ("Alerta Severa", "Alerta Crítica")
 
-    Args:
-        tenant_id (int): ID del tenant.
-        filtros (Dict[str, Any]): Diccionario de filtros (estado, device_id, status_operativo).
+# Campos serializables de una alerta (sparse fieldsets vía ?fields=)
+ALERT_FIELDS = (
+    "id", "device_id", "estado", "titulo", "descripcion", "accion_recomendada",
+    "status_operativo", "comentario_ultimo", "occurrence_count", "last_seen_at",
+    "created_at", "updated_at",
+)
 
-    Returns:
-        List[Alert]: Lista de objetos Alert que coinciden con los criterios.
-    """
+def _filtered_alerts_query(tenant_id: int, filtros: Dict[str, Any]):
+    """Construye la consulta base de alertas del tenant con los filtros de negocio."""
     q = Alert.query.filter_by(tenant_id=tenant_id)
 
     estado = filtros.get("estado")
@@ -41,8 +53,246 @@ def list_alerts(tenant_id: int, filtros: Dict[str, Any]) -> List[Alert]:
     if status_operativo:
         q = q.filter(Alert.status_operativo == status_operativo)
 
+    return q
+
+def list_alerts(tenant_id: int, filtros: Dict[str, Any]) -> List[Alert]:
+    """
+    Lista alertas aplicando filtros de negocio.
+
+    Args:
+        tenant_id (int): ID del tenant.
+        filtros (Dict[str, Any]): Diccionario de filtros (estado, device_id, status_operativo).
+
+    Returns:
+        List[Alert]: Lista de objetos Alert que coinciden con los criterios.
+    """
+    q = _filtered_alerts_query(tenant_id, filtros)
     return q.order_by(Alert.created_at.desc()).all()
 
+def encode_alert_cursor(alert: Alert) -> str:
+    """Genera un cursor opaco (created_at, id) para paginación keyset."""
+    raw = f"{alert.created_at.isoformat()}|{alert.id}"
+    return urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_alert_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decodifica un cursor generado por `encode_alert_cursor`.
+
+    Raises:
+        ValueError: Si el cursor está mal formado.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        ts, alert_id = urlsafe_b64decode(padded.encode("ascii")).decode("utf-8").rsplit("|", 1)
+        return datetime.fromisoformat(ts), int(alert_id)
+    except Exception as e:
+        raise ValueError("[ERROR] Cursor inválido") from e
+
+def paginate_alerts(
+    tenant_id: int,
+    filtros: Dict[str, Any],
+    limit: int,
+    cursor: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    fields: Optional[Iterable[str]] = None,
+    include_total: bool = False,
+) -> Tuple[List[Alert], Optional[str], Optional[int]]:
+    """
+    Lista una página de alertas ordenadas por (created_at, id) descendente.
+
+    Usa paginación por cursor (keyset), por lo que el coste no crece con la profundidad
+    de la página. Si se indican `fields`, solo se cargan esas columnas.
+
+    Args:
+        tenant_id (int): ID del tenant.
+        filtros (Dict[str, Any]): Filtros de negocio (estado, device_id, status_operativo).
+        limit (int): Tamaño de página.
+        cursor (Optional[str]): Cursor devuelto por la página anterior.
+        created_from (Optional[datetime]): Filtro created_at >= fecha.
+        created_to (Optional[datetime]): Filtro created_at <= fecha.
+        fields (Optional[Iterable[str]]): Subconjunto de ALERT_FIELDS a cargar.
+        include_total (bool): Si True, calcula el total de alertas que cumplen los filtros.
+
+    Returns:
+        Tuple[List[Alert], Optional[str], Optional[int]]: (alertas, cursor siguiente, total).
+
+    Raises:
+        ValueError: Si el cursor es inválido.
+    """
+    q = _filtered_alerts_query(tenant_id, filtros)
+    if created_from:
+        q = q.filter(Alert.created_at >= created_from)
+    if created_to:
+        q = q.filter(Alert.created_at <= created_to)
+
+    total = q.order_by(None).count() if include_total else None
+
+    if cursor:
+        c_ts, c_id = decode_alert_cursor(cursor)
+        q = q.filter(or_(Alert.created_at < c_ts, and_(Alert.created_at == c_ts, Alert.id < c_id)))
+
+    if fields:
+        cols = {"id", "created_at"} | set(fields)
+        q = q.options(load_only(*[getattr(Alert, c) for c in ALERT_FIELDS if c in cols]))
+
+    rows = q.order_by(Alert.created_at.desc(), Alert.id.desc()).limit(limit + 1).all()
+    next_cursor = encode_alert_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor, total
+
+def _normalize_summary(text: Optional[str]) -> str:
+    """
+    Normaliza el resumen para la huella: minúsculas, sin cifras sueltas ni espacios extra.
+
+    Los números que forman parte de un nombre ("ether2", "sfp1") se conservan, igual que
+    en la clave de la caché de IA: la misma incidencia en otra interfaz es otra alerta.
+    """
+    norm = ai_cache.normalize_heuristic((text or "").lower())
+    return re.sub(r"\s+", " ", norm).strip()
+
+def alert_fingerprint(device_id: int, summary: Optional[str], severity: str) -> str:
+    """
+    Calcula la huella de deduplicación de una alerta.
+
+    Args:
+        device_id (int): ID del dispositivo.
+        summary (Optional[str]): Resumen/título de la incidencia.
+        severity (str): Severidad ('Aviso', 'Alerta Menor', ...).
+
+    Returns:
+        str: Digest sha256 hexadecimal.
+    """
+    raw = f"{device_id}|{_normalize_summary(summary)}|{severity}"
+    return sha256(raw.encode("utf-8")).hexdigest()
+
+def upsert_alert(
+    tenant_id: int,
+    device_id: int,
+    estado: str,
+    titulo: str,
+    descripcion: str,
+    accion_recomendada: str,
+    comentario: Optional[str] = None,
+) -> Tuple[int, bool]:
+    """
+    Crea una alerta o, si ya existe una abierta con la misma huella, incrementa su
+    contador de ocurrencias y `last_seen_at` (sin insertar duplicados).
+
+    Se apoya en el índice único parcial `uq_alerts_open_fingerprint` con
+    INSERT ... ON CONFLICT DO UPDATE, por lo que es atómico frente a pollers concurrentes.
+    No hace commit.
+
+    Args:
+        tenant_id (int): ID del tenant.
+        device_id (int): ID del dispositivo.
+        estado (str): Severidad.
+        titulo (str): Título (resumen de la IA).
+        descripcion (str): Descripción (se trunca a 512).
+        accion_recomendada (str): Acción sugerida (se trunca a 255).
+        comentario (Optional[str]): Comentario inicial.
+
+    Returns:
+        Tuple[int, bool]: (ID de la alerta, True si se creó una alerta nueva).
+    """
+    now = datetime.utcnow()
+    values = {
+        "tenant_id": tenant_id,
+        "device_id": device_id,
+        "estado": estado,
+        "titulo": (titulo or "Reporte Forense IA")[:120],
+        "descripcion": (descripcion or "")[:512],
+        "accion_recomendada": (accion_recomendada or "")[:255],
+        "status_operativo": "Pendiente",
+        "comentario_ultimo": comentario,
+        "fingerprint": alert_fingerprint(device_id, titulo, estado),
+        "occurrence_count": 1,
+        "last_seen_at": now,
+    }
+
+    # Tanto la creación como la deduplicación (occurrence_count) cambian /alerts
+    tenant_versions.bump(tenant_id, tenant_versions.ALERTS)
+
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        insert = None
+
+    if insert is None:
+        # Fallback genérico (sin ON CONFLICT): buscar abierta y actualizar
+        existing = (Alert.query
+                    .filter_by(tenant_id=tenant_id, fingerprint=values["fingerprint"])
+                    .filter(Alert.status_operativo != "Resuelta")
+                    .with_for_update()
+                    .first())
+        if existing:
+            existing.occurrence_count = (existing.occurrence_count or 1) + 1
+            existing.last_seen_at = now
+            db.session.flush()
+            return existing.id, False
+        alert = Alert(**values)
+        db.session.add(alert)
+        db.session.flush()
+        _queue_alert_created(alert.id, values)
+        return alert.id, True
+
+    stmt = insert(Alert).values(**values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Alert.tenant_id, Alert.fingerprint],
+        # Predicado literal idéntico al del índice parcial para que la inferencia funcione
+        index_where=text("status_operativo <> 'Resuelta'"),
+        set_={
+            "occurrence_count": Alert.occurrence_count + 1,
+            "last_seen_at": now,
+            "updated_at": now,
+        },
+    ).returning(Alert.id, Alert.occurrence_count)
+    alert_id, occurrences = db.session.execute(stmt).one()
+    created = occurrences == 1
+    if created:
+        _queue_alert_created(alert_id, values)
+    return alert_id, created
+
+def _queue_alert_created(alert_id: int, values: Dict[str, Any]) -> None:
+    event_bus.publish_after_commit(values["tenant_id"], "alert-created", {
+        "id": alert_id,
+        "device_id": values["device_id"],
+        "estado": values["estado"],
+        "titulo": values["titulo"],
+        "status_operativo": values["status_operativo"],
+        "created_at": values["last_seen_at"].isoformat(),
+    })
+
+def _queue_status_changed(tenant_id: int, alerts: List[Dict[str, Any]], nuevo_status: str, changed_at: datetime) -> None:
+    event_bus.publish_after_commit(tenant_id, "alert-status-changed", {
+        "alerts": alerts,
+        "status_operativo": nuevo_status,
+        "changed_at": changed_at.isoformat(),
+    })
+
+class AlertReopenConflict(Exception):
+    """
+    Excepción lanzada al reabrir una alerta resuelta cuya huella ya tiene otra alerta abierta.
+    """
+    def __init__(self, alert_id: int, open_alert_id: Optional[int]):
+        super().__init__(f"[ERROR] La alerta {alert_id} duplica la alerta abierta {open_alert_id}")
+        self.alert_id = alert_id
+        self.open_alert_id = open_alert_id
+
+def _open_twin_ids(tenant_id: int, fingerprints: Iterable[str]) -> Dict[str, int]:
+    """Alerta abierta (no resuelta) por huella del tenant."""
+    fingerprints = [f for f in set(fingerprints) if f]
+    if not fingerprints:
+        return {}
+    rows = (db.session.query(Alert.fingerprint, Alert.id)
+            .filter(Alert.tenant_id == tenant_id)
+            .filter(Alert.fingerprint.in_(fingerprints))
+            .filter(Alert.status_operativo != "Resuelta")
+            .all())
+    return {fingerprint: alert_id for fingerprint, alert_id in rows}
+
 def update_alert_status(alert_id: int, user_id: int, tenant_id: int, nuevo_status: str, comentario: Optional[str]) -> Alert:
     """
     Actualiza el estado operativo de una alerta y registra el cambio en el histórico.
@@ -59,15 +309,26 @@ def update_alert_status(alert_id: int, user_id: int, tenant_id: int, nuevo_statu
 
     Raises:
         ValueError: Si la alerta no existe o no pertenece al tenant.
+        AlertReopenConflict: Si reabrirla duplicaría otra alerta abierta con la misma huella.
     """
-    alert = Alert.query.filter_by(id=alert_id, tenant_id=tenant_id).first()
+    alert = Alert.query.filter_by(id=alert_id, tenant_id=tenant_id).with_for_update().first()
     if not alert:
         raise ValueError("[ERROR] Alerta no encontrada")
 
     prev = alert.status_operativo
+    if prev == "Resuelta" and nuevo_status != "Resuelta" and alert.fingerprint:
+        # Solo puede haber una alerta abierta por huella (uq_alerts_open_fingerprint)
+        twin_id = _open_twin_ids(tenant_id, [alert.fingerprint]).get(alert.fingerprint)
+        if twin_id is not None:
+            db.session.rollback()
+            raise AlertReopenConflict(alert.id, twin_id)
+    now = datetime.utcnow()
+    # La primera resolución de la alerta alimenta los rollups de SLA
+    first_resolution = nuevo_status == "Resuelta" and sla_service.is_first_resolution(alert.id)
+
     alert.status_operativo = nuevo_status
     alert.comentario_ultimo = comentario
-    alert.updated_at = datetime.utcnow()
+    alert.updated_at = now
 
     # Registro de auditoría
     hist = AlertStatusHistory(
@@ -75,12 +336,199 @@ def update_alert_status(alert_id: int, user_id: int, tenant_id: int, nuevo_statu
         previous_status_operativo=prev,
         new_status_operativo=nuevo_status,
         changed_by_user_id=user_id,
-        changed_at=datetime.utcnow()
+        changed_at=now
     )
     db.session.add(hist)
+    try:
+        db.session.flush()
+    except IntegrityError:
+        # Otra transacción reabrió o creó una alerta con la misma huella en paralelo
+        db.session.rollback()
+        raise AlertReopenConflict(alert_id, _open_twin_ids(tenant_id, [alert.fingerprint]).get(alert.fingerprint))
+    if first_resolution:
+        sla_service.record_resolution(alert, now)
+    _queue_status_changed(tenant_id, [{
+        "id": alert.id, "device_id": alert.device_id, "previous_status_operativo": prev,
+    }], nuevo_status, now)
+    refresh_device_health(tenant_id, alert.device_id)
+    tenant_versions.bump(tenant_id, tenant_versions.ALERTS)
     db.session.commit()
     return alert
 
+class BulkUpdateTooLarge(Exception):
+    """
+    Excepción lanzada cuando una actualización masiva supera el máximo permitido.
+    """
+    def __init__(self, matched: int, limit: int):
+        super().__init__(f"[ERROR] {matched} alertas coinciden; máximo {limit}")
+        self.matched = matched
+        self.limit = limit
+
+def bulk_update_alert_status(
+    tenant_id: int,
+    user_id: int,
+    nuevo_status: str,
+    comentario: Optional[str],
+    alert_ids: Optional[Iterable[int]] = None,
+    filtros: Optional[Dict[str, Any]] = None,
+    max_alerts: int = 1000,
+) -> Tuple[List[int], Dict[int, int]]:
+    """
+    Cambia el estado operativo de muchas alertas en una sola transacción.
+
+    Selecciona las alertas por lista de IDs o por filtro (device_id, estado, older_than),
+    las actualiza con un único UPDATE e inserta todo el histórico con un único INSERT
+    masivo. Mantiene rollups de SLA y salud materializada igual que `update_alert_status`.
+    Las alertas que ya están en `nuevo_status` se omiten.
+
+    Al reabrir alertas resueltas solo puede quedar una abierta por huella: las que
+    chocarían con otra alerta abierta (o con otra reabierta más nueva del mismo lote) no
+    se modifican y se informan como conflictos.
+
+    Args:
+        tenant_id (int): ID del tenant.
+        user_id (int): ID del usuario que realiza el cambio.
+        nuevo_status (str): Nuevo estado ('Pendiente', 'En curso', 'Resuelta').
+        comentario (Optional[str]): Comentario aplicado a todas las alertas.
+        alert_ids (Optional[Iterable[int]]): IDs explícitos.
+        filtros (Optional[Dict[str, Any]]): device_id (int), estado (str), older_than (datetime).
+        max_alerts (int): Máximo de alertas por operación.
+
+    Returns:
+        Tuple[List[int], Dict[int, int]]: IDs actualizados y conflictos
+        {id omitido: id de la alerta abierta con la misma huella}.
+
+    Raises:
+        BulkUpdateTooLarge: Si la selección supera `max_alerts`.
+    """
+    if alert_ids is not None:
+        alert_ids = list(alert_ids)
+    args = (tenant_id, user_id, nuevo_status, comentario, alert_ids, filtros, max_alerts)
+    try:
+        return _apply_bulk_status(*args)
+    except IntegrityError:
+        # Una reapertura o alerta nueva concurrente ocupó la huella: reintentar una vez,
+        # ahora la selección la verá y la reportará como conflicto
+        db.session.rollback()
+        return _apply_bulk_status(*args)
+
+def _apply_bulk_status(
+    tenant_id: int,
+    user_id: int,
+    nuevo_status: str,
+    comentario: Optional[str],
+    alert_ids: Optional[Iterable[int]],
+    filtros: Optional[Dict[str, Any]],
+    max_alerts: int,
+) -> Tuple[List[int], Dict[int, int]]:
+    q = (db.session.query(Alert.id, Alert.tenant_id, Alert.device_id, Alert.estado,
+                          Alert.status_operativo, Alert.fingerprint, Alert.created_at)
+         .filter(Alert.tenant_id == tenant_id)
+         .filter(Alert.status_operativo != nuevo_status))
+    if alert_ids is not None:
+        q = q.filter(Alert.id.in_(alert_ids))
+    filtros = filtros or {}
+    if filtros.get("device_id") is not None:
+        q = q.filter(Alert.device_id == int(filtros["device_id"]))
+    if filtros.get("estado"):
+        q = q.filter(Alert.estado == filtros["estado"])
+    if filtros.get("older_than") is not None:
+        q = q.filter(Alert.created_at < filtros["older_than"])
+
+    # Bloquea las filas seleccionadas hasta el commit (no-op en SQLite)
+    rows = q.order_by(Alert.id).limit(max_alerts + 1).with_for_update().all()
+    if len(rows) > max_alerts:
+        raise BulkUpdateTooLarge(len(rows), max_alerts)
+
+    conflicts: Dict[int, int] = {}
+    reopening = [r for r in rows if r.status_operativo == "Resuelta" and r.fingerprint]
+    if nuevo_status != "Resuelta" and reopening:
+        taken = _open_twin_ids(tenant_id, [r.fingerprint for r in reopening])
+        # Dentro del lote se reabre la alerta más nueva de cada huella
+        for r in sorted(reopening, key=lambda r: r.id, reverse=True):
+            if r.fingerprint in taken:
+                conflicts[r.id] = taken[r.fingerprint]
+            else:
+                taken[r.fingerprint] = r.id
+        rows = [r for r in rows if r.id not in conflicts]
+    if not rows:
+        return [], conflicts
+
+    ids = [r.id for r in rows]
+    now = datetime.utcnow()
+    first_resolutions = []
+    if nuevo_status == "Resuelta":
+        already = sla_service.resolved_alert_ids(ids)
+        first_resolutions = [r for r in rows if r.id not in already]
+
+    db.session.execute(
+        update(Alert)
+        .where(Alert.id.in_(ids))
+        .values(status_operativo=nuevo_status, comentario_ultimo=comentario, updated_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.execute(insert(AlertStatusHistory), [{
+        "alert_id": r.id,
+        "previous_status_operativo": r.status_operativo,
+        "new_status_operativo": nuevo_status,
+        "changed_by_user_id": user_id,
+        "changed_at": now,
+    } for r in rows])
+
+    if first_resolutions:
+        sla_service.record_resolutions(first_resolutions, now)
+    _queue_status_changed(tenant_id, [{
+        "id": r.id, "device_id": r.device_id, "previous_status_operativo": r.status_operativo,
+    } for r in rows], nuevo_status, now)
+    for device_id in sorted({r.device_id for r in rows}):
+        refresh_device_health(tenant_id, device_id)
+    tenant_versions.bump(tenant_id, tenant_versions.ALERTS)
+
+    db.session.commit()
+    logging.info(
+        f"[INFO] alert_service: bulk status={nuevo_status} alerts={len(ids)} conflicts={len(conflicts)} "
+        f"tenant_id={tenant_id} user_id={user_id}"
+    )
+    return ids, conflicts
+
+def _health_from_counts(severas: int, menores: int) -> str:
+    """Traduce conteos de alertas activas al color de salud del dispositivo."""
+    if severas:
+        return "rojo"
+    if menores:
+        return "amarillo"
+    return "verde"
+
+def _open_alert_counts(tenant_id: int, device_ids: Optional[Iterable[int]] = None) -> Dict[int, tuple]:
+    """Conteos (severas, menores) de alertas no resueltas agrupados por dispositivo."""
+    severas = func.sum(case((Alert.estado.in_(SEVERE_STATES), 1), else_=0))
+    menores = func.sum(case((Alert.estado == "Alerta Menor", 1), else_=0))
+    q = (db.session.query(Alert.device_id, severas, menores)
+         .filter(Alert.tenant_id == tenant_id)
+         .filter(Alert.status_operativo != "Resuelta"))
+    if device_ids is not None:
+        q = q.filter(Alert.device_id.in_(list(device_ids)))
+    rows = q.group_by(Alert.device_id).all()
+    return {device_id: (int(sev or 0), int(men or 0)) for device_id, sev, men in rows}
+
+def compute_devices_health(tenant_id: int, device_ids: Optional[Iterable[int]] = None) -> Dict[int, str]:
+    """
+    Calcula el estado de salud de todos los dispositivos de un tenant en una sola consulta.
+
+    Agrupa las alertas no resueltas por device_id con conteos condicionales por severidad,
+    evitando una consulta por dispositivo en los listados.
+
+    Args:
+        tenant_id (int): ID del tenant.
+        device_ids (Optional[Iterable[int]]): Restringe el cálculo a estos dispositivos.
+
+    Returns:
+        Dict[int, str]: Mapa device_id -> estado de salud. Los dispositivos sin alertas
+        activas no aparecen en el mapa (equivalen a 'verde').
+    """
+    counts = _open_alert_counts(tenant_id, device_ids)
+    return {device_id: _health_from_counts(sev, men) for device_id, (sev, men) in counts.items()}
+
 def compute_device_health(tenant_id: int, device_id: int) -> str:
     """
     Calcula el estado de salud de un dispositivo basado en sus alertas activas.
@@ -97,13 +545,129 @@ def compute_device_health(tenant_id: int, device_id: int) -> str:
     Returns:
         str: Estado de salud ('rojo', 'amarillo', 'verde').
     """
-    activos = (Alert.query
-               .filter_by(tenant_id=tenant_id, device_id=device_id)
-               .filter(Alert.status_operativo != "Resuelta")
-               .all())
+    return compute_devices_health(tenant_id, [device_id]).get(device_id, "verde")
 
-    if any(a.estado in ("Alerta Severa", "Alerta Crítica") for a in activos):
-        return "rojo"
-    if any(a.estado == "Alerta Menor" for a in activos):
-        return "amarillo"
-    return "verde"
+def refresh_device_health(tenant_id: int, device_id: int) -> str:
+    """
+    Recalcula y persiste la salud materializada de un dispositivo.
+
+    Debe invocarse dentro de la transacción que creó o modificó alertas del dispositivo
+    (no hace commit). La fila de `device_health` se bloquea (SELECT ... FOR UPDATE) antes
+    de recalcular desde las alertas, de modo que actualizaciones concurrentes del NOC se
+    serializan y la última en confirmar siempre refleja el estado real.
+
+    Args:
+        tenant_id (int): ID del tenant.
+        device_id (int): ID del dispositivo.
+
+    Returns:
+        str: Nuevo estado de salud ('rojo', 'amarillo', 'verde').
+    """
+    row = (DeviceHealth.query
+           .filter_by(device_id=device_id)
+           .with_for_update()
+           .first())
+    if row is None:
+        try:
+            with db.session.begin_nested():
+                row = DeviceHealth(device_id=device_id, tenant_id=tenant_id)
+                db.session.add(row)
+        except IntegrityError:
+            # Otra transacción creó la fila en paralelo: bloquearla y continuar
+            row = (DeviceHealth.query
+                   .filter_by(device_id=device_id)
+                   .with_for_update()
+                   .first())
+
+    previous = row.health_status or "verde"
+    sev, men = _open_alert_counts(tenant_id, [device_id]).get(device_id, (0, 0))
+    row.severe_open = sev
+    row.minor_open = men
+    row.health_status = _health_from_counts(sev, men)
+    row.updated_at = datetime.utcnow()
+    db.session.flush()
+    if row.health_status != previous:
+        event_bus.publish_after_commit(tenant_id, "device-health-changed", {
+            "device_id": device_id,
+            "health_status": row.health_status,
+            "previous_health_status": previous,
+        })
+    return row.health_status
+
+def get_devices_health(tenant_id: int) -> List[Dict[str, Any]]:
+    """
+    Lee la salud materializada de todos los dispositivos del tenant (una consulta indexada).
+
+    Los dispositivos sin fila materializada (ej. recién creados) se reportan en 'verde'.
+    El resultado se cachea por tenant (se invalida con escrituras de alertas y dispositivos).
+
+    Args:
+        tenant_id (int): ID del tenant.
+
+    Returns:
+        List[Dict[str, Any]]: Lista de { device_id, name, health_status }.
+    """
+    return tenant_versions.cached(response_cache.HEALTH, tenant_id, lambda: _load_devices_health(tenant_id))
+
+def _load_devices_health(tenant_id: int) -> List[Dict[str, Any]]:
+    rows = (db.session.query(Device.id, Device.name, DeviceHealth.health_status)
+            .outerjoin(DeviceHealth, DeviceHealth.device_id == Device.id)
+            .filter(Device.tenant_id == tenant_id)
+            .order_by(Device.id)
+            .all())
+    return [{
+        "device_id": device_id,
+        "name": name,
+        "health_status": health or "verde",
+    } for device_id, name, health in rows]
+
+def reconcile_device_health(tenant_id: Optional[int] = None) -> int:
+    """
+    Repara desvíos entre la salud materializada y las alertas reales.
+
+    Recalcula en bloque (una consulta agregada por tenant) y corrige solo las filas que
+    difieren. Pensado para ejecución periódica (`flask reconcile-health`).
+
+    Args:
+        tenant_id (Optional[int]): Restringe la reconciliación a un tenant.
+
+    Returns:
+        int: Número de dispositivos corregidos.
+    """
+    q = db.session.query(Device.id, Device.tenant_id)
+    if tenant_id is not None:
+        q = q.filter(Device.tenant_id == tenant_id)
+    devices_by_tenant: Dict[int, List[int]] = {}
+    for dev_id, t_id in q.all():
+        devices_by_tenant.setdefault(t_id, []).append(dev_id)
+
+    repaired = 0
+    for t_id, device_ids in devices_by_tenant.items():
+        repaired_before = repaired
+        counts = _open_alert_counts(t_id)
+        current = {
+            r.device_id: r
+            for r in DeviceHealth.query.filter(DeviceHealth.tenant_id == t_id).all()
+        }
+        for dev_id in device_ids:
+            sev, men = counts.get(dev_id, (0, 0))
+            expected = _health_from_counts(sev, men)
+            row = current.get(dev_id)
+            if row is None:
+                db.session.add(DeviceHealth(
+                    device_id=dev_id, tenant_id=t_id, health_status=expected,
+                    severe_open=sev, minor_open=men,
+                ))
+                repaired += 1
+            elif (row.health_status, row.severe_open, row.minor_open) != (expected, sev, men):
+                row.health_status = expected
+                row.severe_open = sev
+                row.minor_open = men
+                row.updated_at = datetime.utcnow()
+                repaired += 1
+        if repaired != repaired_before:
+            tenant_versions.bump(t_id, tenant_versions.ALERTS)
+    db.session.commit()
+    if repaired:
+        logging.info(f"[INFO] alert_service: salud reconciliada en {repaired} dispositivos")
+    return repaired
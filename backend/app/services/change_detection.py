@@ -0,0 +1,262 @@
+"""
+Compuerta de Cambios para el Análisis de IA.
+
+En lugar de invocar la IA en cada ciclo, compara el resultado de la minería con la
+instantánea anterior del dispositivo y solo pide análisis ante un cambio material:
+
+- Reinicio (uptime menor que el anterior).
+- Logs nuevos de nivel error/critical.
+- Hallazgos heurísticos nuevos (ignorando las cifras que contienen).
+- Tasas anómalas de contadores de error/descarte por interfaz (AI_GATE_ERROR_RATE_PER_MIN).
+- Puertos/servicios abiertos nuevos.
+- Antigüedad máxima sin análisis (AI_GATE_MAX_STALENESS_SEC) o reintento pendiente.
+
+Así el costo y la latencia de IA escalan con los incidentes y no con el tamaño de la
+flota. Cada decisión y sus motivos se registran en `ai_gate_decisions` para auditoría.
+"""
+import logging
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from hashlib import sha256
+from typing import Any, Dict, List, Optional
+
+from ..config import Config
+from ..db import db
+from ..models.ai_gate_decision import AIGateDecision
+from ..models.device import Device
+from ..models.device_snapshot import DeviceSnapshot
+from ..utils import ai_cache
+
+ERROR_TOPICS = frozenset({"error", "critical"})
+RATE_COUNTERS = ("rx_fcs_error", "rx_error", "tx_error", "rx_drop", "tx_drop")
+MAX_LOG_FINGERPRINTS = 200
+# Motivos que no dependen de señales que la clave de la caché de IA descarta (uptime,
+# magnitud de contadores): solo con ellos se puede reutilizar un diagnóstico cacheado
+CACHEABLE_REASONS = frozenset({"max_staleness", "gate_disabled"})
+
+_UPTIME_PART = re.compile(r"(\d+)([wdhms])")
+_UPTIME_UNITS = {"w": 604800, "d": 86400, "h": 3600, "m": 60, "s": 1}
+
+
+@dataclass
+class GateDecision:
+    """Resultado de la compuerta para un ciclo."""
+    analyze: bool
+    reasons: List[str] = field(default_factory=list)
+
+    @property
+    def use_cache(self) -> bool:
+        """
+        Indica si el análisis puede responderse desde la caché de IA.
+
+        Un reinicio o una ráfaga de errores no cambian la clave de la caché (el uptime es
+        volátil y los contadores se reducen a su orden de magnitud): el diagnóstico
+        cacheado sería el de antes del evento que disparó el análisis.
+        """
+        return all(r.split(":", 1)[0] in CACHEABLE_REASONS for r in self.reasons)
+
+
+def _utc_naive(value: datetime) -> datetime:
+    """Normaliza a UTC sin tzinfo (SQLite devuelve naive, PostgreSQL aware)."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def parse_uptime(value: Any) -> Optional[int]:
+    """
+    Convierte el uptime de RouterOS a segundos ("1w2d03:04:05", "3h4m5s").
+
+    Returns:
+        Optional[int]: Segundos, o None si no se puede interpretar.
+    """
+    if not value:
+        return None
+    text = str(value).strip()
+    total = 0
+    clock = re.search(r"(\d+):(\d{2}):(\d{2})$", text)
+    if clock:
+        h, m, s = (int(x) for x in clock.groups())
+        total += h * 3600 + m * 60 + s
+        text = text[:clock.start()]
+    parts = _UPTIME_PART.findall(text)
+    if not parts and not clock:
+        return None
+    return total + sum(int(n) * _UPTIME_UNITS[u] for n, u in parts)
+
+
+def _to_int(value: Any) -> int:
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _log_fingerprint(log: Dict[str, Any]) -> str:
+    raw = f"{log.get('topics') or ''}|{log.get('message') or ''}"
+    return sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def summarize(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Resumen compacto y comparable de la salida de DeviceMiner.mine().
+
+    Args:
+        data (Dict[str, Any]): Contexto forense minado.
+
+    Returns:
+        Dict[str, Any]: uptime_sec, error_logs, heuristics, counters y open_ports.
+    """
+    error_logs = []
+    for log in data.get("logs") or []:
+        topics = {t.strip() for t in str(log.get("topics") or "").split(",")}
+        if topics & ERROR_TOPICS:
+            error_logs.append(_log_fingerprint(log))
+    counters = {}
+    for iface in data.get("interfaces") or []:
+        name = iface.get("name")
+        if name:
+            counters[name] = {c: _to_int(iface.get(c)) for c in RATE_COUNTERS}
+    ports = [f"{p.get('name')}:{p.get('port')}" for p in (data.get("security") or {}).get("open_ports", [])]
+    return {
+        "uptime_sec": parse_uptime((data.get("context") or {}).get("uptime")),
+        "error_logs": sorted(set(error_logs))[-MAX_LOG_FINGERPRINTS:],
+        # Las cifras (conteos, voltajes) cambian en cada ciclo; el hallazgo es el mismo.
+        # Misma normalización que la clave de la caché de IA (conserva "ether2")
+        "heuristics": sorted({ai_cache.normalize_heuristic(h) for h in data.get("heuristics") or []}),
+        "counters": counters,
+        "open_ports": sorted(set(ports)),
+    }
+
+
+def diff(prev: Dict[str, Any], curr: Dict[str, Any], elapsed_sec: float) -> List[str]:
+    """
+    Motivos materiales de cambio entre dos resúmenes.
+
+    Args:
+        prev (Dict[str, Any]): Resumen anterior.
+        curr (Dict[str, Any]): Resumen actual.
+        elapsed_sec (float): Segundos entre ambas muestras (para tasas).
+
+    Returns:
+        List[str]: Motivos; vacío si no hay cambios materiales.
+    """
+    reasons: List[str] = []
+    prev_up, curr_up = prev.get("uptime_sec"), curr.get("uptime_sec")
+    rebooted = prev_up is not None and curr_up is not None and curr_up < prev_up
+    if rebooted:
+        reasons.append("reboot")
+
+    new_logs = set(curr.get("error_logs", [])) - set(prev.get("error_logs", []))
+    if new_logs:
+        reasons.append(f"new_error_logs:{len(new_logs)}")
+
+    new_findings = sorted(set(curr.get("heuristics", [])) - set(prev.get("heuristics", [])))
+    if new_findings:
+        reasons.append(f"new_heuristics:{len(new_findings)}")
+
+    new_ports = sorted(set(curr.get("open_ports", [])) - set(prev.get("open_ports", [])))
+    if new_ports:
+        reasons.append("new_open_ports:" + ",".join(new_ports))
+
+    # Tras un reinicio los contadores vuelven a cero: no hay tasa comparable
+    if not rebooted and elapsed_sec > 0:
+        threshold = float(getattr(Config, "AI_GATE_ERROR_RATE_PER_MIN", 5))
+        prev_counters = prev.get("counters", {})
+        for iface, values in curr.get("counters", {}).items():
+            before = prev_counters.get(iface)
+            if not before:
+                continue
+            for counter, value in values.items():
+                delta = value - _to_int(before.get(counter))
+                rate = delta * 60.0 / elapsed_sec
+                if delta > 0 and rate >= threshold:
+                    reasons.append(f"counter_rate:{iface}.{counter}={rate:.1f}/min")
+    return reasons
+
+
+def evaluate(device: Device, data: Dict[str, Any], now: Optional[datetime] = None) -> GateDecision:
+    """
+    Decide si el ciclo actual requiere análisis de IA y actualiza la instantánea.
+
+    Registra la decisión en `ai_gate_decisions` (no hace commit).
+
+    Args:
+        device (Device): Dispositivo minado.
+        data (Dict[str, Any]): Contexto forense del ciclo.
+        now (Optional[datetime]): Momento de la muestra (UTC naive; default utcnow).
+
+    Returns:
+        GateDecision: analyze y motivos.
+    """
+    now = now or datetime.utcnow()
+    curr = summarize(data)
+    snapshot = db.session.get(DeviceSnapshot, device.id)
+
+    if not getattr(Config, "AI_GATE_ENABLED", True):
+        reasons = ["gate_disabled"]
+    elif snapshot is None:
+        reasons = ["first_snapshot"]
+    else:
+        elapsed = (now - _utc_naive(snapshot.sampled_at)).total_seconds()
+        reasons = diff(snapshot.summary or {}, curr, elapsed)
+        if snapshot.pending_analysis:
+            reasons.append("retry_pending")
+        staleness = timedelta(seconds=int(getattr(Config, "AI_GATE_MAX_STALENESS_SEC", 21600)))
+        if not reasons and (snapshot.last_analyzed_at is None or now - _utc_naive(snapshot.last_analyzed_at) >= staleness):
+            reasons.append("max_staleness")
+
+    decision = GateDecision(analyze=bool(reasons), reasons=reasons or ["no_material_change"])
+
+    if snapshot is None:
+        snapshot = DeviceSnapshot(device_id=device.id, tenant_id=device.tenant_id)
+        db.session.add(snapshot)
+    snapshot.summary = curr
+    snapshot.sampled_at = now
+    db.session.add(AIGateDecision(
+        tenant_id=device.tenant_id,
+        device_id=device.id,
+        analyze=decision.analyze,
+        reasons=decision.reasons,
+        decided_at=now,
+    ))
+    logging.debug(f"[DEBUG] change_detection: device_id={device.id} analyze={decision.analyze} reasons={decision.reasons}")
+    return decision
+
+
+def record_analysis(device_id: int, succeeded: bool, now: Optional[datetime] = None) -> None:
+    """
+    Registra el resultado del análisis solicitado por la compuerta (no hace commit).
+
+    Si falló (respuesta de respaldo), el siguiente ciclo lo reintenta aunque no haya
+    cambios nuevos: los motivos de este ciclo ya quedaron absorbidos en la instantánea.
+
+    Args:
+        device_id (int): Dispositivo analizado.
+        succeeded (bool): True si la IA entregó un diagnóstico real.
+        now (Optional[datetime]): Momento del análisis (UTC naive; default utcnow).
+    """
+    snapshot = db.session.get(DeviceSnapshot, device_id)
+    if snapshot is None:
+        return
+    snapshot.pending_analysis = not succeeded
+    if succeeded:
+        snapshot.last_analyzed_at = now or datetime.utcnow()
+
+
+def purge_decisions(days: Optional[int] = None) -> int:
+    """
+    Elimina decisiones de auditoría más antiguas que la retención (hace commit).
+
+    Args:
+        days (Optional[int]): Días a conservar (default AI_GATE_DECISION_RETENTION_DAYS).
+
+    Returns:
+        int: Filas eliminadas.
+    """
+    keep = int(days if days is not None else getattr(Config, "AI_GATE_DECISION_RETENTION_DAYS", 30))
+    cutoff = datetime.utcnow() - timedelta(days=keep)
+    deleted = AIGateDecision.query.filter(AIGateDecision.decided_at < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+    return int(deleted or 0)
@@ -19,7 +19,7 @@ except ImportError:
     ROUTEROS_AVAILABLE = False
 
 from ..models.device import Device
-from .device_service import decrypt_secret
+from .device_service import get_device_credentials
 from ..config import Config
 
 logger = logging.getLogger(__name__)
@@ -54,8 +54,7 @@ class DeviceMiner:
             raise RuntimeError("[ERROR] La librería routeros_api no está instalada.")
 
         try:
-            username = decrypt_secret(self.device.username_encrypted)
-            password = decrypt_secret(self.device.password_encrypted)
+            username, password = get_device_credentials(self.device)
         except Exception as e:
             raise ValueError(f"[ERROR] Fallo en descifrado de credenciales: {e}")
 
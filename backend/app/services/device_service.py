@@ -4,17 +4,23 @@ Servicio de Gestión de Dispositivos.
 Provee funcionalidades para:
 - Crear y listar dispositivos por tenant.
 - Validar restricciones del plan comercial (límites de dispositivos).
-- Cifrar y descifrar credenciales de acceso (routers) utilizando criptografía simétrica (Fernet).
+- Cifrar y descifrar credenciales de acceso (routers) utilizando criptografía simétrica
+  (Fernet/MultiFernet para rotación de claves), con caché acotada de credenciales descifradas.
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from base64 import urlsafe_b64encode
+from collections import OrderedDict
 from hashlib import sha256
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
 import logging
+import threading
+import time
 from ..models.device import Device
 from ..db import db
 from ..config import Config, is_dev, validate_encryption_key
-from .subscription_service import can_add_device
+from . import tenant_versions
+from ..utils import response_cache
+from .subscription_service import release_device_slot, reserve_device_slot
 
 class DeviceLimitReached(Exception):
     """
@@ -26,9 +32,30 @@ class DeviceLimitReached(Exception):
         self.required_plan_hint = required_plan_hint
         self.upsell = True
 
-def _get_fernet() -> Optional[Fernet]:
+_cipher_lock = threading.Lock()
+# (huella de configuración, cifrador): se reconstruye solo si cambian las claves o el entorno
+_cipher: Optional[Tuple[tuple, Optional[MultiFernet]]] = None
+
+def _build_fernet(key: str) -> Fernet:
+    """Construye un Fernet para una clave; en dev deriva la clave si no es válida."""
+    if validate_encryption_key(key):
+        try:
+            return Fernet(key.encode("utf-8"))
+        except Exception:
+            pass
+    if is_dev():
+        logging.warning("[WARNING] ENCRYPTION_KEY no es una clave Fernet válida; derivando clave (DEV) con SHA-256")
+        derived = urlsafe_b64encode(sha256(key.encode("utf-8")).digest())
+        return Fernet(derived)
+    raise RuntimeError("[ERROR] ENCRYPTION_KEY inválida; debe ser Fernet base64 urlsafe de 32 bytes en producción")
+
+def _get_fernet() -> Optional[MultiFernet]:
     """
-    Obtiene una instancia de Fernet utilizando la clave de configuración ENCRYPTION_KEY.
+    Obtiene el cifrador de credenciales (cacheado a nivel de proceso).
+
+    Usa ENCRYPTION_KEY como clave primaria (cifra) y ENCRYPTION_KEYS_OLD como claves
+    previas que solo descifran (MultiFernet): rotar la clave no rompe las credenciales
+    existentes ni enfría la caché de credenciales descifradas.
 
     Comportamiento:
     - Producción: Requiere una clave Fernet válida (base64 urlsafe 32 bytes). Lanza error si falla.
@@ -36,31 +63,31 @@ def _get_fernet() -> Optional[Fernet]:
       emitiendo advertencias.
 
     Returns:
-        Optional[Fernet]: Instancia de cifrador, o None en modo desarrollo sin clave.
+        Optional[MultiFernet]: Instancia de cifrador, o None en modo desarrollo sin clave.
     """
+    global _cipher
     key = getattr(Config, "ENCRYPTION_KEY", None)
+    old_keys = tuple(k.strip() for k in (getattr(Config, "ENCRYPTION_KEYS_OLD", "") or "").split(",") if k.strip())
+    fingerprint = (key, old_keys, is_dev())
 
-    # Caso: Clave ausente
-    if not key:
-        if is_dev():
-            logging.warning("[WARNING] ENCRYPTION_KEY ausente en dev; usando passthrough (NO cifrado). Configura ENCRYPTION_KEY en infra/.env para probar cifrado.")
-            return None
-        raise RuntimeError("[ERROR] ENCRYPTION_KEY requerida en producción")
-
-    # Caso: Clave válida (Fernet base64 urlsafe 32 bytes)
-    if validate_encryption_key(key):
-        try:
-            return Fernet(key.encode("utf-8"))
-        except Exception:
-            pass
+    cached = _cipher
+    if cached is not None and cached[0] == fingerprint:
+        return cached[1]
 
-    # Caso: Clave no válida (Fallback Dev)
-    if is_dev():
-        logging.warning("[WARNING] ENCRYPTION_KEY no es una clave Fernet válida; derivando clave (DEV) con SHA-256")
-        derived = urlsafe_b64encode(sha256(key.encode("utf-8")).digest())
-        return Fernet(derived)
+    with _cipher_lock:
+        if _cipher is not None and _cipher[0] == fingerprint:
+            return _cipher[1]
 
-    raise RuntimeError("[ERROR] ENCRYPTION_KEY inválida; debe ser Fernet base64 urlsafe de 32 bytes en producción")
+        # Caso: Clave ausente
+        if not key:
+            if not is_dev():
+                raise RuntimeError("[ERROR] ENCRYPTION_KEY requerida en producción")
+            logging.warning("[WARNING] ENCRYPTION_KEY ausente en dev; usando passthrough (NO cifrado). Configura ENCRYPTION_KEY en infra/.env para probar cifrado.")
+            cipher = None
+        else:
+            cipher = MultiFernet([_build_fernet(k) for k in (key, *old_keys)])
+        _cipher = (fingerprint, cipher)
+        return cipher
 
 def encrypt_secret(plaintext: str) -> str:
     """
@@ -98,12 +125,129 @@ def decrypt_secret(ciphertext: str) -> str:
         return ciphertext
     return f.decrypt(ciphertext.encode("utf-8")).decode("utf-8")
 
+# --- Caché de credenciales descifradas (poller) ---
+# device_id -> (expira_en_monotonic, digest de los textos cifrados, (usuario, contraseña)).
+# Solo en memoria del proceso: las credenciales en claro nunca salen a Redis ni a disco.
+_cred_lock = threading.Lock()
+_credentials: "OrderedDict[int, Tuple[float, str, Tuple[Optional[str], Optional[str]]]]" = OrderedDict()
+
+def _ciphertext_digest(username_enc: Optional[str], password_enc: Optional[str]) -> str:
+    return sha256(f"{username_enc or ''}\0{password_enc or ''}".encode("utf-8")).hexdigest()
+
+def get_device_credentials(device: Device) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Devuelve (usuario, contraseña) descifrados, cacheados con TTL corto.
+
+    La entrada se valida contra un digest de los textos cifrados: si las credenciales
+    del dispositivo cambian, la entrada previa se descarta aunque no haya vencido.
+
+    Args:
+        device (Device): Dispositivo con credenciales cifradas.
+
+    Returns:
+        Tuple[Optional[str], Optional[str]]: Usuario y contraseña en claro.
+    """
+    digest = _ciphertext_digest(device.username_encrypted, device.password_encrypted)
+    now = time.monotonic()
+    with _cred_lock:
+        item = _credentials.get(device.id)
+        if item is not None and item[0] > now and item[1] == digest:
+            _credentials.move_to_end(device.id)
+            return item[2]
+
+    creds = (decrypt_secret(device.username_encrypted), decrypt_secret(device.password_encrypted))
+    ttl = float(getattr(Config, "CREDENTIAL_CACHE_TTL_SEC", 300))
+    if ttl > 0 and device.id is not None:
+        max_entries = int(getattr(Config, "CREDENTIAL_CACHE_MAX_ENTRIES", 1024))
+        with _cred_lock:
+            _credentials[device.id] = (now + ttl, digest, creds)
+            _credentials.move_to_end(device.id)
+            while len(_credentials) > max_entries:
+                _credentials.popitem(last=False)
+    return creds
+
+def invalidate_device_credentials(device_id: Optional[int] = None) -> None:
+    """Descarta las credenciales cacheadas de un dispositivo (o todas si device_id es None)."""
+    with _cred_lock:
+        if device_id is None:
+            _credentials.clear()
+        else:
+            _credentials.pop(device_id, None)
+
+def rotate_device_credentials(batch_size: int = 500) -> Tuple[int, List[int]]:
+    """
+    Re-cifra las credenciales de todos los dispositivos con la clave primaria actual.
+
+    Tras completar la rotación (sin fallos) se puede retirar la clave anterior de
+    ENCRYPTION_KEYS_OLD. Cada lote se confirma por separado: un dispositivo que no se puede
+    descifrar (clave desconocida, credenciales nulas) se registra y se omite en lugar de
+    abortar la rotación con lotes previos ya confirmados.
+
+    Args:
+        batch_size (int): Dispositivos por commit.
+
+    Returns:
+        Tuple[int, List[int]]: (dispositivos re-cifrados, IDs que fallaron).
+    """
+    f = _get_fernet()
+    if not f:
+        return 0, []
+    rotated = 0
+    failed: List[int] = []
+    last_id = 0
+    while True:
+        devices = (Device.query.filter(Device.id > last_id)
+                   .order_by(Device.id).limit(batch_size).all())
+        if not devices:
+            break
+        for d in devices:
+            try:
+                username_enc = f.rotate(d.username_encrypted.encode("utf-8")).decode("utf-8")
+                password_enc = f.rotate(d.password_encrypted.encode("utf-8")).decode("utf-8")
+            except (InvalidToken, AttributeError) as e:
+                logging.error(f"[ERROR] device_service: no se pudo re-cifrar device_id={d.id}: {e.__class__.__name__}")
+                failed.append(d.id)
+                continue
+            d.username_encrypted = username_enc
+            d.password_encrypted = password_enc
+            rotated += 1
+        db.session.commit()
+        last_id = devices[-1].id
+    logging.info(f"[INFO] device_service: credenciales re-cifradas en {rotated} dispositivos, fallidos={len(failed)}")
+    return rotated, failed
+
 def list_devices_for_tenant(tenant_id: int) -> List[Device]:
     """
     Lista todos los dispositivos activos asociados a un tenant.
     """
     return Device.query.filter_by(tenant_id=tenant_id, is_active=True).all()
 
+def list_device_summaries(tenant_id: int) -> List[Dict[str, Any]]:
+    """
+    Lista los dispositivos activos del tenant como diccionarios públicos (cacheado).
+
+    A diferencia de `list_devices_for_tenant`, no devuelve instancias ORM (no se pueden
+    compartir entre sesiones) ni credenciales cifradas.
+
+    Returns:
+        List[Dict[str, Any]]: id, name, ip_address, port, firmware_version, location,
+        wan_type, created_at (ISO 8601) e is_active.
+    """
+    def _load() -> List[Dict[str, Any]]:
+        return [{
+            "id": d.id,
+            "name": d.name,
+            "ip_address": d.ip_address,
+            "port": d.port,
+            "firmware_version": d.firmware_version,
+            "location": d.location,
+            "wan_type": d.wan_type,
+            "created_at": d.created_at.isoformat() if d.created_at else None,
+            "is_active": getattr(d, "is_active", True),
+        } for d in list_devices_for_tenant(tenant_id)]
+
+    return tenant_versions.cached(response_cache.DEVICES, tenant_id, _load)
+
 def create_device(tenant_id: int, payload: Dict[str, Any]) -> Device:
     """
     Registra un nuevo dispositivo para un tenant.
@@ -120,8 +264,10 @@ def create_device(tenant_id: int, payload: Dict[str, Any]) -> Device:
     Raises:
         DeviceLimitReached: Si el tenant ha alcanzado su límite de dispositivos.
     """
-    can_add, reason = can_add_device(tenant_id)
-    if not can_add:
+    # Reserva atómica del cupo (UPDATE condicional sobre el contador del tenant)
+    reserved, reason = reserve_device_slot(tenant_id)
+    if not reserved:
+        db.session.rollback()
         raise DeviceLimitReached(
             message=reason.get("message", "Límite de dispositivos alcanzado."),
             required_plan_hint=reason.get("required_plan_hint")
@@ -149,5 +295,28 @@ def create_device(tenant_id: int, payload: Dict[str, Any]) -> Device:
         is_active=True # Explicit default
     )
     db.session.add(device)
+    tenant_versions.bump(tenant_id, tenant_versions.DEVICES)
     db.session.commit()
     return device
+
+def delete_device(tenant_id: int, device_id: int) -> bool:
+    """
+    Da de baja (soft delete) un dispositivo del tenant.
+
+    Args:
+        tenant_id (int): ID del tenant.
+        device_id (int): ID del dispositivo.
+
+    Returns:
+        bool: True si se desactivó, False si no existe o no pertenece al tenant.
+    """
+    device = Device.query.filter_by(id=device_id, tenant_id=tenant_id).with_for_update().first()
+    if not device:
+        return False
+    if device.is_active:
+        device.is_active = False
+        release_device_slot(tenant_id)
+    tenant_versions.bump(tenant_id, tenant_versions.DEVICES)
+    db.session.commit()
+    invalidate_device_credentials(device_id)
+    return True
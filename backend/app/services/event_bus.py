@@ -0,0 +1,257 @@
+"""
+Bus de eventos por tenant (alimenta el stream SSE /api/events/stream).
+
+Tipos de evento:
+- alert-created: nueva alerta abierta (no se emite para ocurrencias deduplicadas).
+- alert-status-changed: cambio de estado operativo (individual o masivo).
+- device-health-changed: cambio del semáforo materializado de un dispositivo.
+
+Backends:
+- Redis Streams (un stream por tenant, recortado a EVENTS_STREAM_MAXLEN): fan-out entre
+  workers/hosts y reanudación exacta por Last-Event-ID.
+- Memoria (ring buffer por tenant): fallback de desarrollo/tests; solo alcanza a los
+  clientes conectados al mismo proceso.
+
+Los eventos se encolan en la sesión con `publish_after_commit` y se emiten únicamente
+cuando la transacción confirma (un rollback los descarta).
+"""
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+
+from ..config import Config
+from ..db import db
+
+logger = logging.getLogger(__name__)
+
+EVENT_TYPES = ("alert-created", "alert-status-changed", "device-health-changed")
+
+# Evento sintético: el cliente pidió reanudar desde un ID que ya salió del buffer
+RESYNC_EVENT = "resync"
+
+_PENDING_KEY = "pending_events"
+
+# (event_id, tipo, payload)
+Event = Tuple[str, str, Dict[str, Any]]
+
+
+class MemoryEventBackend:
+    """
+    Ring buffer por tenant con espera bloqueante (un solo proceso).
+
+    Cada tenant tiene su propia secuencia de IDs (1, 2, 3...), sin huecos por eventos de
+    otros tenants: un ID faltante al reanudar significa que el buffer lo descartó.
+    """
+
+    def __init__(self, maxlen: int):
+        self._maxlen = maxlen
+        self._seqs: Dict[int, int] = {}
+        self._buffers: Dict[int, deque] = {}
+        self._cond = threading.Condition()
+
+    def publish(self, tenant_id: int, event_type: str, data: Dict[str, Any]) -> str:
+        tenant_id = int(tenant_id)
+        with self._cond:
+            seq = self._seqs[tenant_id] = self._seqs.get(tenant_id, 0) + 1
+            buf = self._buffers.setdefault(tenant_id, deque(maxlen=self._maxlen))
+            buf.append((seq, event_type, data))
+            self._cond.notify_all()
+            return str(seq)
+
+    def last_id(self, tenant_id: int) -> str:
+        with self._cond:
+            buf = self._buffers.get(int(tenant_id))
+            return str(buf[-1][0]) if buf else "0"
+
+    def read(self, tenant_id: int, last_id: str, timeout: float) -> Tuple[List[Event], bool]:
+        try:
+            after = int(last_id)
+        except (TypeError, ValueError):
+            after = 0
+        with self._cond:
+            deadline_left = timeout
+            while True:
+                buf = self._buffers.get(int(tenant_id)) or ()
+                # Hueco: el evento siguiente al solicitado ya fue descartado del buffer
+                gap = bool(buf) and after > 0 and buf[0][0] > after + 1
+                events = [(str(seq), et, data) for seq, et, data in buf if seq > after]
+                if events or deadline_left <= 0:
+                    return events, gap
+                self._cond.wait(deadline_left)
+                deadline_left = 0
+
+
+class RedisEventBackend:
+    """Un Redis Stream por tenant; el ID de evento es el ID del stream."""
+
+    def __init__(self, client, maxlen: int):
+        self._r = client
+        self._maxlen = maxlen
+
+    @staticmethod
+    def _key(tenant_id: int) -> str:
+        return f"mkmonitor:events:t{int(tenant_id)}"
+
+    def publish(self, tenant_id: int, event_type: str, data: Dict[str, Any]) -> str:
+        event_id = self._r.xadd(
+            self._key(tenant_id),
+            {"type": event_type, "data": json.dumps(data, default=str)},
+            maxlen=self._maxlen,
+            approximate=True,
+        )
+        return event_id.decode() if isinstance(event_id, bytes) else str(event_id)
+
+    def last_id(self, tenant_id: int) -> str:
+        entries = self._r.xrevrange(self._key(tenant_id), count=1)
+        if not entries:
+            return "0-0"
+        eid = entries[0][0]
+        return eid.decode() if isinstance(eid, bytes) else str(eid)
+
+    def read(self, tenant_id: int, last_id: str, timeout: float) -> Tuple[List[Event], bool]:
+        key = self._key(tenant_id)
+        gap = False
+        if last_id and last_id != "0-0":
+            first = self._r.xrange(key, count=1)
+            if first:
+                first_id = first[0][0].decode() if isinstance(first[0][0], bytes) else str(first[0][0])
+                gap = _stream_id_tuple(first_id) > _stream_id_tuple(last_id)
+        resp = self._r.xread({key: last_id or "0-0"}, block=max(int(timeout * 1000), 1), count=500)
+        events: List[Event] = []
+        for _stream, entries in resp or []:
+            for eid, fields in entries:
+                eid = eid.decode() if isinstance(eid, bytes) else str(eid)
+                fields = {
+                    (k.decode() if isinstance(k, bytes) else k): (v.decode() if isinstance(v, bytes) else v)
+                    for k, v in fields.items()
+                }
+                try:
+                    data = json.loads(fields.get("data") or "{}")
+                except ValueError:
+                    data = {}
+                events.append((eid, fields.get("type", ""), data))
+        return events, gap
+
+
+def _stream_id_tuple(value: str) -> Tuple[int, int]:
+    try:
+        ms, _, seq = str(value).partition("-")
+        return int(ms), int(seq or 0)
+    except ValueError:
+        return 0, 0
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """Devuelve (creándolo si hace falta) el backend configurado por EVENTS_BACKEND."""
+    global _backend
+    if _backend is not None:
+        return _backend
+    with _backend_lock:
+        if _backend is not None:
+            return _backend
+        maxlen = int(getattr(Config, "EVENTS_STREAM_MAXLEN", 1000))
+        mode = (getattr(Config, "EVENTS_BACKEND", "auto") or "auto").lower()
+        url = (getattr(Config, "REDIS_URL", "") or "").strip()
+        if mode in ("auto", "redis") and url.startswith(("redis://", "rediss://", "unix://")):
+            try:
+                import redis  # type: ignore
+
+                client = redis.Redis.from_url(url, socket_timeout=None)
+                client.ping()
+                _backend = RedisEventBackend(client, maxlen)
+                logger.info("[INFO] event_bus: usando Redis Streams (%s)", url.split("@")[-1])
+                return _backend
+            except Exception as e:
+                if mode == "redis":
+                    raise
+                logger.warning("[WARNING] event_bus: Redis no disponible (%s); usando memoria", e)
+        _backend = MemoryEventBackend(maxlen)
+        logger.warning("[WARNING] event_bus: backend en memoria (sin fan-out entre workers)")
+        return _backend
+
+
+def reset_backend() -> None:
+    """Descarta el backend actual (uso en pruebas o tras cambiar configuración)."""
+    global _backend
+    with _backend_lock:
+        _backend = None
+
+
+def publish(tenant_id: int, event_type: str, data: Dict[str, Any]) -> Optional[str]:
+    """
+    Emite un evento inmediatamente (usar solo fuera de una transacción).
+
+    Returns:
+        Optional[str]: ID del evento, o None si la publicación falló.
+    """
+    try:
+        return get_backend().publish(tenant_id, event_type, data)
+    except Exception as e:
+        # Un fallo del bus nunca debe romper la operación de negocio
+        logger.warning("[WARNING] event_bus: publish fallido type=%s tenant_id=%s: %s", event_type, tenant_id, e)
+        return None
+
+
+def publish_after_commit(tenant_id: int, event_type: str, data: Dict[str, Any]) -> None:
+    """
+    Encola un evento en la sesión actual; se emite al confirmar la transacción.
+
+    Args:
+        tenant_id (int): Tenant destinatario.
+        event_type (str): Uno de EVENT_TYPES.
+        data (Dict[str, Any]): Payload serializable a JSON.
+    """
+    db.session.info.setdefault(_PENDING_KEY, []).append((tenant_id, event_type, data))
+
+
+@event.listens_for(db.session, "after_commit")
+def _flush_pending(session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    for tenant_id, event_type, data in pending or ():
+        publish(tenant_id, event_type, data)
+
+
+@event.listens_for(db.session, "after_soft_rollback")
+def _drop_pending(session, previous_transaction) -> None:
+    if previous_transaction.parent is None:
+        session.info.pop(_PENDING_KEY, None)
+
+
+def current_id(tenant_id: int) -> str:
+    """ID del último evento del tenant (punto de partida para clientes nuevos)."""
+    return get_backend().last_id(tenant_id)
+
+
+def read(tenant_id: int, last_id: Optional[str], timeout: float) -> Tuple[List[Event], bool, str]:
+    """
+    Espera eventos del tenant posteriores a `last_id`.
+
+    Args:
+        tenant_id (int): Tenant.
+        last_id (Optional[str]): Último ID recibido por el cliente (None = solo eventos nuevos).
+        timeout (float): Segundos máximos de espera.
+
+    Returns:
+        Tuple[List[Event], bool, str]: (eventos, hubo hueco en el buffer, cursor para la próxima lectura).
+    """
+    backend = get_backend()
+    cursor = last_id or backend.last_id(tenant_id)
+    events, gap = backend.read(tenant_id, cursor, timeout)
+    if events:
+        cursor = events[-1][0]
+    return events, gap, cursor
+
+
+def format_sse(event_id: str, event_type: str, data: Dict[str, Any]) -> str:
+    """Serializa un evento en formato text/event-stream."""
+    return f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
@@ -4,12 +4,13 @@ Servicio de Monitoreo Forense.
 Este servicio orquesta el ciclo completo de inteligencia de amenazas:
 1. Conecta con routers Mikrotik para extraer datos forenses profundos (Device Mining).
 2. Normaliza y persiste los logs en la base de datos.
-3. Invoca el análisis de Inteligencia Artificial (DeepSeek) sobre el contexto extraído.
-4. Genera alertas operativas ("Reportes Forenses") basadas en los hallazgos.
+3. Evalúa la compuerta de cambios (change_detection) frente a la instantánea anterior.
+4. Si hay un cambio material, invoca el análisis de Inteligencia Artificial (DeepSeek).
+5. Genera alertas operativas ("Reportes Forenses") basadas en los hallazgos.
 
 Maneja la deduplicación de logs y alertas para evitar ruido.
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Optional
 from datetime import datetime, timedelta
 import logging
 import os
@@ -21,7 +22,11 @@ from ..models.log_entry import LogEntry
 from ..models.alert import Alert
 from ..db import db
 from ..config import Config
-from .ai_analysis_service import analyze_device_context
+from .. import metrics
+from ..utils import export_cache
+from . import change_detection
+from .ai_analysis_service import analyze_device_context, close_ai_session, critical_heuristics, is_fallback
+from .alert_service import refresh_device_health, upsert_alert
 from .device_mining import DeviceMiner
 
 def _safe_decode(value: Any) -> Any:
@@ -125,6 +130,21 @@ def _safe_parse_iso_datetime(value: Optional[str]) -> Optional[datetime]:
                 continue
     return None
 
+def _invalidate_exports(device: Device, entries: List[LogEntry]) -> None:
+    """Invalida exportaciones cacheadas cuyo rango cubre los logs recién persistidos."""
+    if entries:
+        ts_values = [export_cache.normalize_dt(e.timestamp_equipo) for e in entries]
+        export_cache.invalidate_range(device.tenant_id, device.id, min(ts_values), max(ts_values))
+
+def _local_heuristics_report(critical: List[str]) -> Dict[str, Any]:
+    """Reporte mínimo a partir de hallazgos críticos locales cuando la IA no respondió."""
+    return {
+        "status": "CRITICAL",
+        "summary": f"Hallazgo crítico local: {critical[0]}",
+        "technical_analysis": "; ".join(critical) + " (diagnóstico IA pendiente)",
+        "recommendations": ["Revisar el equipo; el análisis IA se reintentará en el próximo ciclo"],
+    }
+
 async def analyze_and_generate_alerts(device: Device) -> None:
     """
     Ejecuta el pipeline completo de monitoreo Forense para un dispositivo.
@@ -132,8 +152,13 @@ async def analyze_and_generate_alerts(device: Device) -> None:
     Fases:
     1) Minería de Datos (DeviceMiner): Extracción profunda de estado y logs.
     2) Persistencia: Almacenamiento de nuevos logs con deduplicación.
-    3) Análisis IA: Procesamiento del contexto extraído mediante DeepSeek.
-    4) Generación de Alertas: Creación de incidentes operativos basados en hallazgos.
+    3) Compuerta de cambios: sin cambio material (ni antigüedad máxima) no se invoca la IA.
+    4) Análisis IA: Procesamiento del contexto extraído mediante DeepSeek.
+    5) Generación de Alertas: Creación de incidentes operativos basados en hallazgos.
+
+    La sesión HTTP y el despachador de IA quedan ligados al event loop: quien invoque
+    esta función directamente debe llamar a `close_ai_session` antes de que el loop
+    termine (o usar `run_monitoring_cycle`, que lo hace).
 
     Args:
         device (Device): Dispositivo objetivo.
@@ -199,16 +224,40 @@ async def analyze_and_generate_alerts(device: Device) -> None:
             db.session.flush()
             logging.info(f"[INFO] monitoring: persistidos {len(entries)} logs device_id={device.id}")
         
-        # Paso 3: Análisis IA
-        # Await the async analysis
-        analysis_result = await analyze_device_context(data)
+        # Paso 3: Compuerta de cambios (decisión auditada en ai_gate_decisions)
+        decision = change_detection.evaluate(device, data)
+        if not decision.analyze:
+            db.session.commit()
+            _invalidate_exports(device, entries)
+            logging.debug(f"[DEBUG] monitoring: análisis IA omitido device_id={device.id} reasons={decision.reasons}")
+            return
+
+        # Paso 4: Análisis IA
+        # Await the async analysis (sin caché si el motivo es un evento que la clave no refleja)
+        analysis_result = await analyze_device_context(data, use_cache=decision.use_cache)
+        ai_available = not is_fallback(analysis_result)
+        change_detection.record_analysis(device.id, succeeded=ai_available)
+        critical = critical_heuristics(data)
+        if not ai_available:
+            # Respaldo (429 agotado, cola expirada, error del proveedor): no es un diagnóstico
+            # del equipo; se reintenta en el próximo ciclo en lugar de abrir una alerta
+            # "IA no disponible". Un hallazgo crítico local sí genera alerta igualmente.
+            metrics.inc_ai_fallbacks(Config.AI_PROVIDER)
+            logging.warning(f"[WARNING] monitoring: IA no disponible device_id={device.id}: {analysis_result.get('technical_analysis')}")
+            if not critical:
+                db.session.commit()
+                _invalidate_exports(device, entries)
+                return
+            analysis_result = _local_heuristics_report(critical)
         
-        # Paso 4: Crear Alerta (Reporte)
+        # Paso 5: Crear Alerta (Reporte)
         analysis_text = analysis_result.get("technical_analysis") or analysis_result.get("summary")
         recommendations = analysis_result.get("recommendations", [])
         
         if not analysis_text:
             logging.info("[INFO] monitoring: IA no retornó análisis.")
+            db.session.commit()
+            _invalidate_exports(device, entries)
             return
 
         # Determinación de severidad
@@ -228,42 +277,59 @@ async def analyze_and_generate_alerts(device: Device) -> None:
                 severity = "Alerta Menor"
         
         # Override por heurística local
-        heuristics = data.get("heuristics", [])
-        if any("critical" in h.lower() for h in heuristics):
+        if critical:
             severity = "Alerta Crítica"
 
         rec_text = "; ".join(recommendations)
         
-        # Evitar spam de alertas idénticas (Ventana de 1 hora)
-        window_start = now - timedelta(hours=1)
-        exists = (Alert.query
-                 .filter_by(tenant_id=device.tenant_id, device_id=device.id)
-                 .filter(Alert.titulo == "Reporte Forense IA")
-                 .filter(Alert.created_at >= window_start)
-                 .first())
-
-        if exists:
-             logging.debug(f"[DEBUG] monitoring: Reporte reciente existe, saltando alerta device_id={device.id}")
+        # Deduplicación por huella: si ya existe una alerta abierta equivalente
+        # solo se incrementan occurrence_count/last_seen_at.
+        alert_id, created = upsert_alert(
+            tenant_id=device.tenant_id,
+            device_id=device.id,
+            estado=severity,
+            titulo=analysis_result.get("summary", "Reporte Forense IA"),
+            descripcion=analysis_text,
+            accion_recomendada=rec_text or "Ver detalles en dashboard",
+            comentario=(
+                f"Generado automáticamente por {Config.AI_PROVIDER.capitalize()}" if ai_available
+                else "Generado por heurística local (IA no disponible)"
+            ),
+        )
+        if created:
+            refresh_device_health(device.tenant_id, device.id)
+            logging.info(f"[INFO] monitoring: Alerta Forense creada device_id={device.id} alert_id={alert_id}")
         else:
-            alert = Alert(
-                tenant_id=device.tenant_id,
-                device_id=device.id,
-                estado=severity,
-                titulo=analysis_result.get("summary", "Reporte Forense IA"),
-                descripcion=analysis_text[:512],
-                accion_recomendada=rec_text[:255] or "Ver detalles en dashboard",
-                status_operativo="Pendiente",
-                comentario_ultimo=f"Generado automáticamente por {Config.AI_PROVIDER.capitalize()}"
-            )
-            db.session.add(alert)
-            logging.info(f"[INFO] monitoring: Alerta Forense creada device_id={device.id}")
+            logging.debug(f"[DEBUG] monitoring: Alerta abierta existente actualizada device_id={device.id} alert_id={alert_id}")
 
         db.session.commit()
+        _invalidate_exports(device, entries)
         
     except Exception as ex:
         logging.error(f"[ERROR] monitoring: error general device_id={device.id}: {ex}")
         db.session.rollback()
 
+async def run_monitoring_cycle(devices: Iterable[Device]) -> None:
+    """
+    Ejecuta un ciclo de monitoreo sobre `devices` y libera los recursos de IA del loop.
+
+    Punto de entrada de los runners (`flask monitor`, cron, sidecar): al terminar cierra
+    la sesión HTTP y detiene los workers del despachador de IA del event loop actual
+    (`close_ai_session`). Los presupuestos RPM/TPM del proveedor son del proceso y se
+    conservan entre ciclos.
+
+    Los dispositivos se procesan en secuencia: todos comparten la sesión de base de datos
+    y cada uno hace commit (o rollback) de su propio trabajo.
+
+    Args:
+        devices (Iterable[Device]): Dispositivos a monitorear.
+    """
+    try:
+        for device in devices:
+            await analyze_and_generate_alerts(device)
+    finally:
+        await close_ai_session()
+
 # Helper legado (mantener compatibilidad)
 def get_router_logs(device: Device, since_ts: Optional[datetime] = None) -> List[Dict[str, Any]]:
     """
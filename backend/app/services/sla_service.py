@@ -3,43 +3,279 @@ Servicio de SLA:
 
 - Calcula métricas de tiempo en cada estado (Pendiente/En curso/Resuelta).
 - Genera reportes de cumplimiento por tenant/dispositivo.
+- Mantiene agregados incrementales (SlaRollup) por tenant, dispositivo, mes y severidad,
+  actualizados en la misma transacción que el cambio de estado de la alerta.
 """
-from datetime import datetime, timedelta
-from statistics import mean
-from typing import Dict, List, Optional
+from bisect import bisect_left
+from datetime import date, datetime, timezone
+from math import sqrt
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import logging
+from sqlalchemy import and_, func
+from sqlalchemy.exc import IntegrityError
+from ..db import db
 from ..models.alert import Alert
 from ..models.alert_status_history import AlertStatusHistory
+from ..models.sla_rollup import SlaRollup
+from . import tenant_versions
+from ..utils import response_cache
 
-def get_sla_metrics(tenant_id: int) -> Dict[str, float]:
+SEVERE_STATES = ("Alerta Severa", "Alerta Crítica")
+
+# Límites superiores (minutos) de los buckets del histograma de resolución.
+# El último bucket (implícito) acumula todo lo que supera el último límite.
+HISTOGRAM_BOUNDS_MIN = (1, 2, 5, 10, 15, 30, 60, 120, 240, 480, 1440, 2880, 10080)
+
+def _to_naive_utc(value: datetime) -> datetime:
+    """Normaliza un datetime a UTC sin tzinfo (la DB puede devolver fechas con o sin zona)."""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def _minutes_between(start: datetime, end: datetime) -> float:
+    return (_to_naive_utc(end) - _to_naive_utc(start)).total_seconds() / 60.0
+
+def _period_of(created_at: datetime) -> date:
+    """Período del rollup: primer día del mes de creación de la alerta."""
+    ts = _to_naive_utc(created_at)
+    return date(ts.year, ts.month, 1)
+
+def _bucket_index(minutes: float) -> int:
+    return bisect_left(HISTOGRAM_BOUNDS_MIN, minutes)
+
+def _empty_histogram() -> List[int]:
+    return [0] * (len(HISTOGRAM_BOUNDS_MIN) + 1)
+
+def _histogram_percentile(histogram: List[int], q: float) -> Optional[float]:
     """
-    Calcula métricas del mes actual.
-    - tiempo_promedio_resolucion_severa_min: promedio (en minutos) desde created_at
-      hasta el primer cambio a "Resuelta" para alertas Severas/Críticas.
-    Nota: No manejamos zona horaria explícita (se asume UTC en DB). Ajustar si es necesario.
+    Estima un percentil (0-1) a partir del histograma, devolviendo el límite superior
+    del bucket que lo contiene (estimación conservadora). Si cae en el bucket abierto
+    final, devuelve el último límite (cota inferior: "más de N minutos"), nunca infinito,
+    que no es serializable a JSON.
     """
-    now = datetime.utcnow()
-    month_start = datetime(now.year, now.month, 1)
+    total = sum(histogram)
+    if not total:
+        return None
+    target = q * total
+    acc = 0
+    for idx, count in enumerate(histogram):
+        acc += count
+        if acc >= target:
+            return float(HISTOGRAM_BOUNDS_MIN[min(idx, len(HISTOGRAM_BOUNDS_MIN) - 1)])
+    return float(HISTOGRAM_BOUNDS_MIN[-1])
 
-    # Alertas objetivo
-    alerts = (Alert.query
-              .filter_by(tenant_id=tenant_id)
-              .filter(Alert.created_at >= month_start)
-              .filter(Alert.estado.in_(("Alerta Severa", "Alerta Crítica")))
-              .all())
+def _first_resolution_rows(tenant_id: Optional[int] = None, since: Optional[datetime] = None,
+                           severities: Optional[Iterable[str]] = None):
+    """
+    Una fila por alerta resuelta: (tenant_id, device_id, estado, created_at, primera resolución).
+    Una sola consulta con MIN(changed_at) agrupado por alerta.
+    """
+    q = (db.session.query(
+            Alert.tenant_id, Alert.device_id, Alert.estado, Alert.created_at,
+            func.min(AlertStatusHistory.changed_at))
+         .join(AlertStatusHistory, and_(
+             AlertStatusHistory.alert_id == Alert.id,
+             AlertStatusHistory.new_status_operativo == "Resuelta",
+         )))
+    if tenant_id is not None:
+        q = q.filter(Alert.tenant_id == tenant_id)
+    if since is not None:
+        q = q.filter(Alert.created_at >= since)
+    if severities is not None:
+        q = q.filter(Alert.estado.in_(tuple(severities)))
+    return q.group_by(Alert.id, Alert.tenant_id, Alert.device_id, Alert.estado, Alert.created_at).all()
 
-    duraciones: List[float] = []
+def _lock_rollup(tenant_id: int, device_id: int, period: date, severity: str) -> SlaRollup:
+    """Obtiene (o crea) la fila de rollup bloqueándola para actualización."""
+    key = dict(tenant_id=tenant_id, device_id=device_id, period=period, severity=severity)
+    row = SlaRollup.query.filter_by(**key).with_for_update().first()
+    if row is None:
+        try:
+            with db.session.begin_nested():
+                row = SlaRollup(resolved_count=0, total_minutes=0.0, sum_sq_minutes=0.0,
+                                histogram=_empty_histogram(), **key)
+                db.session.add(row)
+        except IntegrityError:
+            # Creada en paralelo por otra transacción
+            row = SlaRollup.query.filter_by(**key).with_for_update().first()
+    return row
+
+def _accumulate(tenant_id: int, device_id: int, period: date, severity: str, minutes_list: List[float]) -> None:
+    """Suma un lote de tiempos de resolución a una fila de rollup (bloqueada)."""
+    row = _lock_rollup(tenant_id, device_id, period, severity)
+    histogram = list(row.histogram or _empty_histogram())
+    for minutes in minutes_list:
+        histogram[_bucket_index(minutes)] += 1
+    row.resolved_count = (row.resolved_count or 0) + len(minutes_list)
+    row.total_minutes = (row.total_minutes or 0.0) + sum(minutes_list)
+    row.sum_sq_minutes = (row.sum_sq_minutes or 0.0) + sum(m * m for m in minutes_list)
+    row.histogram = histogram  # reasignación para que SQLAlchemy detecte el cambio del JSON
+
+def record_resolution(alert: Alert, resolved_at: datetime) -> None:
+    """
+    Acumula la primera resolución de una alerta en su rollup (no hace commit).
+
+    Debe llamarse en la misma transacción que registra la transición a "Resuelta",
+    solo cuando es la primera resolución de la alerta (ver `is_first_resolution`).
+
+    Args:
+        alert (Alert): Alerta resuelta.
+        resolved_at (datetime): Momento de la transición.
+    """
+    record_resolutions([alert], resolved_at)
+
+def record_resolutions(alerts: Iterable[Any], resolved_at: datetime) -> None:
+    """
+    Versión por lotes de `record_resolution`: agrupa por clave de rollup para
+    bloquear y actualizar cada fila una sola vez (no hace commit).
+
+    Args:
+        alerts (Iterable[Any]): Alertas (u objetos con tenant_id, device_id, estado, created_at).
+        resolved_at (datetime): Momento de la transición.
+    """
+    grouped: Dict[Tuple[int, int, date, str], List[float]] = {}
     for a in alerts:
-        # Buscar primer cambio a Resuelta
-        hist = (AlertStatusHistory.query
-                .filter_by(alert_id=a.id)
+        key = (a.tenant_id, a.device_id, _period_of(a.created_at), a.estado)
+        grouped.setdefault(key, []).append(max(_minutes_between(a.created_at, resolved_at), 0.0))
+    # Orden determinista de bloqueo para evitar deadlocks entre lotes concurrentes
+    for key in sorted(grouped):
+        _accumulate(*key, grouped[key])
+    db.session.flush()
+
+def resolved_alert_ids(alert_ids: Iterable[int]) -> set:
+    """
+    IDs (de entre los dados) que ya tienen alguna transición a "Resuelta".
+    El llamador debe tener bloqueadas las filas de esas alertas (ver `is_first_resolution`).
+    """
+    ids = list(alert_ids)
+    if not ids:
+        return set()
+    rows = (db.session.query(AlertStatusHistory.alert_id)
+            .filter(AlertStatusHistory.alert_id.in_(ids))
+            .filter(AlertStatusHistory.new_status_operativo == "Resuelta")
+            .distinct()
+            .all())
+    return {r[0] for r in rows}
+
+def is_first_resolution(alert_id: int) -> bool:
+    """
+    Indica si la alerta aún no tiene ninguna transición a "Resuelta" registrada.
+
+    Bloquea la fila de la alerta (SELECT ... FOR UPDATE) hasta el commit: dos resoluciones
+    concurrentes se serializan y solo la primera ve la alerta sin resolver, de modo que
+    el rollup no cuenta dos veces la misma alerta.
+    """
+    db.session.query(Alert.id).filter(Alert.id == alert_id).with_for_update().first()
+    return not (db.session.query(AlertStatusHistory.id)
+                .filter(AlertStatusHistory.alert_id == alert_id)
                 .filter(AlertStatusHistory.new_status_operativo == "Resuelta")
-                .order_by(AlertStatusHistory.changed_at.asc())
                 .first())
-        if hist:
-            delta = hist.changed_at - a.created_at
-            duraciones.append(delta.total_seconds() / 60.0)
 
-    promedio = mean(duraciones) if duraciones else 0.0
+def rebuild_sla_rollups(tenant_id: Optional[int] = None) -> int:
+    """
+    Reconstruye los rollups desde el histórico crudo (reparación / carga inicial).
+
+    La carga inicial es un paso obligatorio del despliegue que crea `sla_rollups`
+    (`flask rebuild-sla-rollups`, ver MIGRATIONS.md): las lecturas nunca la disparan.
+
+    Args:
+        tenant_id (Optional[int]): Restringe la reconstrucción a un tenant.
+
+    Returns:
+        int: Número de filas de rollup generadas.
+    """
+    acc: Dict[Tuple[int, int, date, str], Dict[str, Any]] = {}
+    for t_id, device_id, estado, created_at, resolved_at in _first_resolution_rows(tenant_id):
+        if not (created_at and resolved_at):
+            continue
+        minutes = max(_minutes_between(created_at, resolved_at), 0.0)
+        key = (t_id, device_id, _period_of(created_at), estado)
+        entry = acc.setdefault(key, {"count": 0, "total": 0.0, "sq": 0.0, "hist": _empty_histogram()})
+        entry["count"] += 1
+        entry["total"] += minutes
+        entry["sq"] += minutes * minutes
+        entry["hist"][_bucket_index(minutes)] += 1
+
+    q = SlaRollup.query
+    if tenant_id is not None:
+        q = q.filter(SlaRollup.tenant_id == tenant_id)
+    q.delete(synchronize_session=False)
+
+    db.session.add_all([
+        SlaRollup(tenant_id=t_id, device_id=device_id, period=period, severity=severity,
+                  resolved_count=e["count"], total_minutes=e["total"], sum_sq_minutes=e["sq"],
+                  histogram=e["hist"])
+        for (t_id, device_id, period, severity), e in acc.items()
+    ])
+    affected = {key[0] for key in acc} | ({tenant_id} if tenant_id is not None else set())
+    for t_id in affected:
+        response_cache.invalidate_after_commit(t_id, [response_cache.SLA])
+    db.session.commit()
+    logging.info(f"[INFO] sla_service: rollups reconstruidos filas={len(acc)} tenant_id={tenant_id}")
+    return len(acc)
+
+def summarize_rollups(tenant_id: int, period_from: date, period_to: date,
+                      severities: Optional[Iterable[str]] = None,
+                      device_id: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Combina los rollups de un rango de meses (inclusive) en un resumen estadístico.
+
+    Args:
+        tenant_id (int): ID del tenant.
+        period_from (date): Primer mes (día 1).
+        period_to (date): Último mes (día 1).
+        severities (Optional[Iterable[str]]): Filtra severidades.
+        device_id (Optional[int]): Filtra un dispositivo.
+
+    Returns:
+        Dict[str, Any]: resueltas, promedio, desvío y percentiles estimados (minutos).
+    """
+    q = (SlaRollup.query
+         .filter(SlaRollup.tenant_id == tenant_id)
+         .filter(SlaRollup.period >= period_from)
+         .filter(SlaRollup.period <= period_to))
+    if severities is not None:
+        q = q.filter(SlaRollup.severity.in_(tuple(severities)))
+    if device_id is not None:
+        q = q.filter(SlaRollup.device_id == device_id)
+
+    count, total, sq = 0, 0.0, 0.0
+    histogram = _empty_histogram()
+    for row in q.all():
+        count += row.resolved_count or 0
+        total += row.total_minutes or 0.0
+        sq += row.sum_sq_minutes or 0.0
+        for idx, c in enumerate(row.histogram or []):
+            histogram[idx] += c
+
+    mean_min = total / count if count else 0.0
+    variance = max(sq / count - mean_min * mean_min, 0.0) if count else 0.0
     return {
-        "tiempo_promedio_resolucion_severa_min": promedio
+        "resueltas": count,
+        "promedio_min": mean_min,
+        "desvio_min": sqrt(variance),
+        "p50_min_estimado": _histogram_percentile(histogram, 0.5),
+        "p90_min_estimado": _histogram_percentile(histogram, 0.9),
     }
+
+def get_sla_metrics(tenant_id: int) -> Dict[str, float]:
+    """
+    Calcula métricas del mes actual.
+    - tiempo_promedio_resolucion_severa_min: promedio (en minutos) desde created_at
+      hasta el primer cambio a "Resuelta" para alertas Severas/Críticas.
+    Nota: No manejamos zona horaria explícita (se asume UTC en DB). Ajustar si es necesario.
+
+    Se responde desde los rollups del mes (tiempo constante respecto del volumen de
+    alertas). Ver `rebuild_sla_rollups` para regenerarlos desde el histórico.
+    El resultado se cachea por tenant y mes (se invalida con cada escritura de alertas).
+    """
+    now = datetime.utcnow()
+    month_start = date(now.year, now.month, 1)
+
+    def _load() -> Dict[str, float]:
+        summary = summarize_rollups(tenant_id, month_start, month_start, severities=SEVERE_STATES)
+        return {
+            "tiempo_promedio_resolucion_severa_min": summary["promedio_min"]
+        }
+
+    return tenant_versions.cached(response_cache.SLA, tenant_id, _load, key=month_start.isoformat())
@@ -11,8 +11,12 @@ from datetime import datetime, timedelta
 from ..models.subscription import Subscription
 from ..models.device import Device
 from ..models.tenant import Tenant
-from sqlalchemy import func
+from sqlalchemy import func, update
+import logging
+from ..config import Config
 from ..db import db
+from . import tenant_versions
+from ..utils import response_cache
 
 # Límites de dispositivos por Plan
 PLAN_LIMITS: dict[str, Optional[int]] = {
@@ -25,24 +29,16 @@ def _resolve_current_plan(tenant: Tenant) -> str:
     """Resuelve el nombre del plan activo para un tenant."""
     return (tenant.plan or "BASICMAAT").upper()
 
-def get_current_subscription(tenant_id: int) -> Dict[str, Any]:
+def _resolve_plan(tenant_id: int) -> Optional[Dict[str, Any]]:
     """
-    Obtiene el estado actual de la suscripción del tenant.
-
-    Args:
-        tenant_id (int): ID del tenant.
+    Resuelve plan, límite y estado de pago del tenant desde la DB.
 
     Returns:
-        Dict[str, Any]: Información consolidada del plan, límites, uso y estado de pago.
+        Optional[Dict[str, Any]]: plan_name, max_devices, status_pago; None si el tenant no existe.
     """
     tenant = Tenant.query.filter_by(id=tenant_id).first()
     if not tenant:
-        return {
-            "plan_name": "BASICMAAT",
-            "max_devices": PLAN_LIMITS["BASICMAAT"],
-            "status_pago": "suspendido",
-            "devices_registrados": 0,
-        }
+        return None
 
     # Buscar suscripción activa (la más reciente que no haya expirado o sea indefinida)
     _now = datetime.utcnow()
@@ -52,7 +48,7 @@ def get_current_subscription(tenant_id: int) -> Dict[str, Any]:
            .order_by(Subscription.activo_hasta.desc().nullslast())
            .first())
 
-    plan_name = _resolve_current_plan(tenant if tenant else None)
+    plan_name = _resolve_current_plan(tenant)
 
     # Determinar max_devices: Priorizar suscripción explícita, sino fallback al default del plan
     # Nota: En DB, 0 puede usarse para representar ilimitado si el campo es integer no nulo,
@@ -62,31 +58,55 @@ def get_current_subscription(tenant_id: int) -> Dict[str, Any]:
     else:
          max_devices = PLAN_LIMITS.get(plan_name, 5)
 
-    used = Device.query.filter_by(tenant_id=tenant_id).count()
     return {
         "plan_name": plan_name,
         "max_devices": max_devices,
         "status_pago": tenant.status_pago or "activo",
-        "devices_registrados": used,
     }
 
-def can_add_device(tenant_id: int) -> Tuple[bool, Optional[Dict[str, Any]]]:
+def get_plan(tenant_id: int) -> Optional[Dict[str, Any]]:
     """
-    Valida si un tenant tiene capacidad para agregar un nuevo dispositivo.
+    Plan resuelto del tenant, cacheado con TTL corto (PLAN_CACHE_TTL_SEC).
+
+    El plan cambia muy rara vez; se invalida además con cada escritura de suscripción.
+    """
+    return tenant_versions.cached(
+        response_cache.PLAN, tenant_id, lambda: _resolve_plan(tenant_id),
+        ttl=int(getattr(Config, "PLAN_CACHE_TTL_SEC", 30)),
+    )
+
+def _active_devices(tenant_id: int) -> int:
+    """Contador desnormalizado de dispositivos activos (búsqueda por PK)."""
+    value = db.session.execute(
+        db.select(Tenant.active_devices_count).where(Tenant.id == tenant_id)
+    ).scalar()
+    return int(value or 0)
+
+def get_current_subscription(tenant_id: int) -> Dict[str, Any]:
+    """
+    Obtiene el estado actual de la suscripción del tenant.
 
     Args:
         tenant_id (int): ID del tenant.
 
     Returns:
-        Tuple[bool, Optional[Dict[str, Any]]]:
-            - bool: True si puede agregar, False si no.
-            - dict: Información para upsell si la validación falla (mensaje y sugerencia).
+        Dict[str, Any]: Información consolidada del plan, límites, uso y estado de pago.
     """
-    info = get_current_subscription(tenant_id)
+    plan = get_plan(tenant_id)
+    if not plan:
+        return {
+            "plan_name": "BASICMAAT",
+            "max_devices": PLAN_LIMITS["BASICMAAT"],
+            "status_pago": "suspendido",
+            "devices_registrados": 0,
+        }
+    return {**plan, "devices_registrados": _active_devices(tenant_id)}
 
+def _limit_reason(info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Motivo de rechazo (para upsell) si el tenant no puede sumar dispositivos; None si puede."""
     # Validación de estado de cuenta
     if info["status_pago"] == "suspendido":
-        return False, {
+        return {
             "upsell": True,
             "message": "Tu suscripción está suspendida. Reactiva tu plan para poder agregar dispositivos.",
             "required_plan_hint": "Ponte al día con el pago para reactivar."
@@ -96,31 +116,123 @@ def can_add_device(tenant_id: int) -> Tuple[bool, Optional[Dict[str, Any]]]:
     used = info["devices_registrados"]
 
     if max_devices is None:
-        return True, None  # Plan Ilimitado
+        return None  # Plan Ilimitado
 
     if used >= max_devices:
         plan = info["plan_name"]
         # Lógica de Upsell
         if plan == "BASICMAAT":
-            return False, {
+            return {
                 "upsell": True,
                 "message": "Has alcanzado el límite de 5 dispositivos de BASICMAAT.",
                 "required_plan_hint": "Actualiza a INTERMAAT (hasta 15 dispositivos)."
             }
         elif plan == "INTERMAAT":
-            return False, {
+            return {
                 "upsell": True,
                 "message": "Has alcanzado el límite de 15 dispositivos de INTERMAAT.",
                 "required_plan_hint": "Actualiza a PROMAAT (dispositivos ilimitados)."
             }
         else:
-            return False, {
+            return {
                 "upsell": True,
                 "message": "Límite de dispositivos alcanzado.",
                 "required_plan_hint": "Contacta soporte para ampliar tu plan."
             }
 
-    return True, None
+    return None
+
+def can_add_device(tenant_id: int) -> Tuple[bool, Optional[Dict[str, Any]]]:
+    """
+    Valida si un tenant tiene capacidad para agregar un nuevo dispositivo.
+
+    Solo informativo: la creación usa `reserve_device_slot`, que valida y reserva
+    atómicamente.
+
+    Args:
+        tenant_id (int): ID del tenant.
+
+    Returns:
+        Tuple[bool, Optional[Dict[str, Any]]]:
+            - bool: True si puede agregar, False si no.
+            - dict: Información para upsell si la validación falla (mensaje y sugerencia).
+    """
+    reason = _limit_reason(get_current_subscription(tenant_id))
+    return reason is None, reason
+
+def reserve_device_slot(tenant_id: int) -> Tuple[bool, Optional[Dict[str, Any]]]:
+    """
+    Reserva un cupo de dispositivo activo con un UPDATE condicional (no hace commit).
+
+    `UPDATE tenants SET active_devices_count = active_devices_count + 1
+     WHERE id = :t AND active_devices_count < :max`
+    toma el lock de la fila del tenant: dos altas concurrentes se serializan y la
+    segunda reevalúa el límite con el contador ya incrementado.
+
+    Args:
+        tenant_id (int): ID del tenant.
+
+    Returns:
+        Tuple[bool, Optional[Dict[str, Any]]]: (reservado, motivo de rechazo para upsell).
+    """
+    plan = get_plan(tenant_id)
+    if not plan:
+        return False, _limit_reason(get_current_subscription(tenant_id))
+    if plan["status_pago"] == "suspendido":
+        return False, _limit_reason({**plan, "devices_registrados": 0})
+
+    stmt = (update(Tenant)
+            .where(Tenant.id == tenant_id)
+            .values(active_devices_count=Tenant.active_devices_count + 1)
+            .execution_options(synchronize_session=False))
+    if plan["max_devices"] is not None:
+        stmt = stmt.where(Tenant.active_devices_count < plan["max_devices"])
+    if db.session.execute(stmt).rowcount == 1:
+        return True, None
+    return False, _limit_reason({**plan, "devices_registrados": _active_devices(tenant_id)})
+
+def release_device_slot(tenant_id: int) -> None:
+    """Libera un cupo tras desactivar un dispositivo (no hace commit)."""
+    db.session.execute(
+        update(Tenant)
+        .where(Tenant.id == tenant_id, Tenant.active_devices_count > 0)
+        .values(active_devices_count=Tenant.active_devices_count - 1)
+        .execution_options(synchronize_session=False)
+    )
+
+def reconcile_device_counts(tenant_id: Optional[int] = None) -> int:
+    """
+    Recalcula `active_devices_count` desde la tabla de dispositivos.
+
+    Necesario una vez tras desplegar la columna (backfill) y útil como verificación
+    periódica (`flask reconcile-device-counts`).
+
+    Args:
+        tenant_id (Optional[int]): Restringe a un tenant.
+
+    Returns:
+        int: Número de tenants corregidos.
+    """
+    counts = dict(
+        db.session.query(Device.tenant_id, func.count(Device.id))
+        .filter(Device.is_active.is_(True))
+        .group_by(Device.tenant_id)
+        .all()
+    )
+    q = Tenant.query
+    if tenant_id is not None:
+        q = q.filter(Tenant.id == tenant_id)
+    repaired = 0
+    for tenant in q.all():
+        expected = int(counts.get(tenant.id, 0))
+        if (tenant.active_devices_count or 0) != expected:
+            tenant.active_devices_count = expected
+            tenant_versions.bump(tenant.id, tenant_versions.DEVICES)
+            repaired += 1
+    db.session.commit()
+    if repaired:
+        logging.info(f"[INFO] subscription_service: contador de dispositivos corregido en {repaired} tenants")
+    return repaired
 
 def create_initial_subscription(tenant_id: int, plan: str = "BASICMAAT") -> Subscription:
     """
@@ -156,4 +268,5 @@ def create_initial_subscription(tenant_id: int, plan: str = "BASICMAAT") -> Subs
         activo_hasta=activo_hasta,
     )
     db.session.add(sub)
+    tenant_versions.bump(tenant_id, tenant_versions.SUBSCRIPTION)
     return sub
@@ -0,0 +1,159 @@
+"""
+Contadores de versión por tenant.
+
+Cada escritura de la capa de servicios incrementa el contador del ámbito afectado
+(dispositivos, alertas, suscripción) dentro de su propia transacción. Las rutas de lectura
+derivan de ellos un ETag débil y responden 304 sin ejecutar las consultas pesadas
+(ver utils/http_cache.py), y la caché de respuestas los incluye en sus claves (ver
+`cached`). Cada incremento invalida además, tras el commit, los espacios de la caché de
+respuestas que dependen del ámbito (ver utils/response_cache.py).
+
+Los contadores viven en `tenant_versions`, una fila por (tenant, ámbito). `bump` solo
+anota el incremento: el UPDATE se emite justo antes del commit, en orden fijo
+(tenant, ámbito), de modo que la fila del contador es siempre el último bloqueo de la
+transacción en todos los caminos (alerta → device_health → versión) y se retiene el
+menor tiempo posible.
+"""
+from typing import Any, Callable, Dict, Iterable, Optional
+from sqlalchemy import event, update
+from sqlalchemy.exc import IntegrityError
+from ..db import db
+from ..models.tenant_version import TenantVersion
+from ..utils import response_cache
+
+DEVICES = "devices"
+ALERTS = "alerts"
+SUBSCRIPTION = "subscription"
+
+SCOPES = (DEVICES, ALERTS, SUBSCRIPTION)
+
+# Espacios de la caché de respuestas afectados por cada ámbito
+_CACHE_NAMESPACES = {
+    DEVICES: (response_cache.DEVICES, response_cache.HEALTH),
+    ALERTS: (response_cache.HEALTH, response_cache.SLA),
+    SUBSCRIPTION: (response_cache.PLAN,),
+}
+
+# Ámbitos de los que depende cada espacio de la caché (inverso del anterior)
+_NAMESPACE_SCOPES = {
+    ns: tuple(s for s in SCOPES if ns in _CACHE_NAMESPACES[s])
+    for ns in (response_cache.DEVICES, response_cache.PLAN, response_cache.HEALTH, response_cache.SLA)
+}
+
+_PENDING_KEY = "pending_version_bumps"
+
+def bump(tenant_id: int, *scopes: str) -> None:
+    """
+    Anota el incremento de los contadores indicados para el commit de la transacción
+    actual (no hace commit) y programa la invalidación de la caché de respuestas.
+
+    Args:
+        tenant_id (int): ID del tenant.
+        *scopes (str): Ámbitos a invalidar (DEVICES, ALERTS, SUBSCRIPTION).
+    """
+    if not scopes:
+        return
+    pending = db.session.info.setdefault(_PENDING_KEY, set())
+    for scope in scopes:
+        if scope not in _CACHE_NAMESPACES:
+            raise ValueError(f"Ámbito de versión desconocido: {scope}")
+        pending.add((int(tenant_id), scope))
+    response_cache.invalidate_after_commit(
+        tenant_id, {ns for s in scopes for ns in _CACHE_NAMESPACES[s]}
+    )
+
+def _apply(session, pending) -> None:
+    rows = [{"tenant_id": t, "scope": s, "version": 1} for t, s in sorted(pending)]
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        insert = None
+
+    if insert is not None:
+        stmt = insert(TenantVersion).values(rows)
+        session.execute(stmt.on_conflict_do_update(
+            index_elements=[TenantVersion.tenant_id, TenantVersion.scope],
+            set_={"version": TenantVersion.version + 1},
+        ))
+        return
+
+    # Fallback genérico (sin ON CONFLICT): UPDATE y alta si la fila aún no existe
+    for row in rows:
+        updated = session.execute(
+            update(TenantVersion)
+            .where(TenantVersion.tenant_id == row["tenant_id"], TenantVersion.scope == row["scope"])
+            .values(version=TenantVersion.version + 1)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if updated:
+            continue
+        try:
+            with session.begin_nested():
+                session.add(TenantVersion(**row))
+        except IntegrityError:
+            session.execute(
+                update(TenantVersion)
+                .where(TenantVersion.tenant_id == row["tenant_id"], TenantVersion.scope == row["scope"])
+                .values(version=TenantVersion.version + 1)
+                .execution_options(synchronize_session=False)
+            )
+
+@event.listens_for(db.session, "before_commit")
+def _flush_pending(session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        _apply(session, pending)
+
+@event.listens_for(db.session, "after_soft_rollback")
+def _drop_pending(session, previous_transaction) -> None:
+    if previous_transaction.parent is None:
+        session.info.pop(_PENDING_KEY, None)
+
+def get_versions(tenant_id: int, scopes: Iterable[str]) -> Dict[str, int]:
+    """
+    Lee los contadores de un tenant (búsqueda por PK).
+
+    Args:
+        tenant_id (int): ID del tenant.
+        scopes (Iterable[str]): Ámbitos a leer.
+
+    Returns:
+        Dict[str, int]: Versión por ámbito (0 si aún no hubo escrituras).
+    """
+    scopes = list(scopes)
+    versions = {s: 0 for s in scopes}
+    rows = db.session.execute(
+        db.select(TenantVersion.scope, TenantVersion.version)
+        .where(TenantVersion.tenant_id == tenant_id, TenantVersion.scope.in_(scopes))
+    ).all()
+    for scope, version in rows:
+        versions[scope] = int(version or 0)
+    return versions
+
+def cached(namespace: str, tenant_id: int, loader: Callable[[], Any], key: str = "", ttl: Optional[int] = None) -> Any:
+    """
+    `response_cache.get_or_load` con las versiones de los ámbitos del espacio en la clave.
+
+    Las versiones se leen antes de ejecutar `loader`, de modo que un cuerpo nunca queda
+    guardado bajo una versión más nueva que los datos con los que se calculó, y tras un
+    incremento ningún worker (ni su LRU local) puede servir el cuerpo anterior bajo el
+    ETag nuevo: la clave ya no coincide.
+
+    Args:
+        namespace (str): Espacio de la caché (response_cache.DEVICES, PLAN, HEALTH, SLA).
+        tenant_id (int): ID del tenant.
+        loader (Callable[[], Any]): Función que calcula el valor.
+        key (str): Discriminador adicional dentro del espacio.
+        ttl (Optional[int]): TTL del nivel Redis en segundos.
+
+    Returns:
+        Any: Valor (copia deserializada).
+    """
+    if not response_cache.is_enabled():
+        return loader()
+    versions = get_versions(tenant_id, _NAMESPACE_SCOPES[namespace])
+    tag = ",".join(f"{s}:{v}" for s, v in sorted(versions.items()))
+    return response_cache.get_or_load(namespace, tenant_id, loader, key=f"{tag}|{key}", ttl=ttl)
@@ -0,0 +1,375 @@
+"""
+Caché direccionada por contenido de diagnósticos de IA.
+
+Si el estado de un router no cambió de forma significativa entre ciclos, el diagnóstico
+anterior sigue siendo válido: se reutiliza en lugar de pagar otra llamada al LLM.
+
+- Clave: SHA-256 de (versión del prompt, proveedor, modelo, contexto forense normalizado).
+  La normalización descarta campos volátiles (timestamp, uptime, contadores de bytes,
+  memoria libre, señal/tasas wifi, hora de los logs), agrupa la carga de CPU y los valores
+  de salud en rangos, reduce los contadores acumulados de errores/descartes a su orden de
+  magnitud, quita las cifras de las heurísticas y ordena listas para que el orden de la
+  API no altere la clave.
+- Backends: disco local (por defecto; escrituras atómicas, LRU por mtime) o Redis
+  (REDIS_URL; índice ZSET para acotar el número de entradas). Ambos con TTL (AI_CACHE_TTL_SEC)
+  y tope de entradas (AI_CACHE_MAX_ENTRIES).
+- Solo se almacenan diagnósticos reales: las respuestas de respaldo (`_mock_response`,
+  marcadas con "fallback" o con confidence_score 0) no se cachean.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import re
+import tempfile
+import threading
+import time
+from hashlib import sha256
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from ..config import Config
+from .. import metrics
+
+logger = logging.getLogger(__name__)
+
+# Campos que cambian en cada ciclo sin alterar el diagnóstico
+VOLATILE_KEYS = frozenset({
+    "timestamp", "uptime", "time",
+    "rx_byte", "tx_byte", "fp_rx_byte", "fp_tx_byte",
+    "free_memory", "signal", "tx_rate", "rx_rate",
+})
+# Métricas que se comparan por rango (ej. CPU 37% y 33% -> mismo rango)
+CPU_BUCKET = 10
+HEALTH_BUCKET = {"temperature": 5, "cpu-temperature": 5, "voltage": 1}
+# Contadores acumulados desde el arranque: crecen en cada ciclo, importa su magnitud
+COUNTER_KEYS = frozenset({
+    "rx_fcs_error", "rx_error", "tx_error", "rx_drop", "tx_drop", "total_fw_drop_packets",
+})
+# Cifras sueltas de las heurísticas ("altos descartes RX (151)"); no las de "ether2"
+_NUMBERS = re.compile(r"(?<![\w.])\d+(?:\.\d+)?")
+# ... salvo el número de puerto ("telnet puerto 23"): identifica el servicio
+_PORT_PREFIX = re.compile(r"\b(?:puerto|port)\s*$", re.IGNORECASE)
+
+_REDIS_PREFIX = "mkmonitor:ai"
+
+
+def is_enabled() -> bool:
+    """Indica si la caché de diagnósticos está habilitada por configuración."""
+    return bool(getattr(Config, "AI_CACHE_ENABLED", True))
+
+
+def _bucket(value: Any, step: float) -> Any:
+    try:
+        return int(float(value) // step * step)
+    except (TypeError, ValueError):
+        return value
+
+
+def _magnitude(value: Any) -> Any:
+    """Orden de magnitud de un contador (0, 1, 10, 100, ...): 151 y 157 -> 100."""
+    try:
+        n = int(float(value))
+    except (TypeError, ValueError):
+        return value
+    return 0 if n <= 0 else 10 ** int(math.log10(n))
+
+
+def _normalize(value: Any) -> Any:
+    """Elimina campos volátiles y ordena recursivamente (forma canónica para el hash)."""
+    if isinstance(value, dict):
+        return {
+            k: _magnitude(v) if k in COUNTER_KEYS else _normalize(v)
+            for k, v in value.items()
+            if k not in VOLATILE_KEYS and v not in (None, "", [], {})
+        }
+    if isinstance(value, list):
+        items = [_normalize(v) for v in value]
+        return sorted(items, key=lambda v: json.dumps(v, sort_keys=True, default=str))
+    return value
+
+
+def normalize_heuristic(text: Any) -> str:
+    """
+    Hallazgo heurístico sin sus cifras sueltas ("altos descartes RX (151)" -> "(#)").
+
+    Conserva los números que forman parte de un nombre ("ether2", "sfp-sfpplus1") y los
+    números de puerto ("puerto 23"), de modo que el mismo hallazgo en otra interfaz o en
+    otro puerto sigue siendo distinto. La compuerta de cambios y la huella de alertas usan
+    la misma normalización (ver services/change_detection.py y services/alert_service.py).
+    """
+    text = str(text)
+    return _NUMBERS.sub(
+        lambda m: m.group(0) if _PORT_PREFIX.search(text, 0, m.start()) else "#", text
+    )
+
+
+def normalize_context(context: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Forma canónica del contexto forense para calcular la clave de caché.
+
+    Args:
+        context (Dict[str, Any]): Salida de DeviceMiner.mine().
+
+    Returns:
+        Dict[str, Any]: Contexto sin campos volátiles, con métricas agrupadas en rangos.
+    """
+    data = dict(context)
+    base = dict(data.get("context") or {})
+    if "cpu_load" in base:
+        base["cpu_load"] = _bucket(base["cpu_load"], CPU_BUCKET)
+    data["context"] = base
+    health = dict(data.get("health") or {})
+    for name, step in HEALTH_BUCKET.items():
+        if name in health:
+            health[name] = _bucket(health[name], step)
+    data["health"] = health
+    # Un mismo mensaje repetido con otra hora no es un cambio de estado
+    data["logs"] = list({
+        (log.get("topics") or "", log.get("message") or ""): {"topics": log.get("topics"), "message": log.get("message")}
+        for log in (data.get("logs") or [])
+    }.values())
+    # Las cifras (conteos, voltajes) cambian en cada ciclo; el hallazgo es el mismo
+    data["heuristics"] = sorted({normalize_heuristic(h) for h in data.get("heuristics") or []})
+    return _normalize(data)
+
+
+def build_key(context: Dict[str, Any], prompt_version: str, provider: str, model: str) -> str:
+    """
+    Clave direccionada por contenido de un análisis.
+
+    Args:
+        context (Dict[str, Any]): Contexto forense del dispositivo.
+        prompt_version (str): Versión del prompt (cambiarla invalida todas las entradas).
+        provider (str): Nombre del proveedor de IA.
+        model (str): Modelo utilizado.
+
+    Returns:
+        str: Digest hexadecimal.
+    """
+    canonical = json.dumps(normalize_context(context), sort_keys=True, separators=(",", ":"), default=str)
+    raw = "\0".join([prompt_version or "", provider or "", model or "", canonical])
+    return sha256(raw.encode("utf-8")).hexdigest()
+
+
+def is_cacheable(result: Dict[str, Any]) -> bool:
+    """
+    Solo diagnósticos reales: las respuestas de respaldo llevan "fallback" y
+    confidence_score 0. Un diagnóstico que omite confidence_score sí es cacheable.
+    """
+    if not result or result.get("fallback"):
+        return False
+    if result.get("confidence_score") is None:
+        return True
+    try:
+        return float(result["confidence_score"]) > 0
+    except (TypeError, ValueError):
+        return False
+
+
+def _ttl() -> int:
+    return int(getattr(Config, "AI_CACHE_TTL_SEC", 3600))
+
+
+def _max_entries() -> int:
+    return max(int(getattr(Config, "AI_CACHE_MAX_ENTRIES", 5000)), 1)
+
+
+class DiskAICache:
+    """Un archivo JSON por entrada; LRU por mtime; seguro entre workers del mismo host."""
+
+    _PRUNE_EVERY = 32
+
+    def __init__(self, directory: Optional[str] = None):
+        base = directory or getattr(Config, "AI_CACHE_DIR", None) or os.path.join(tempfile.gettempdir(), "mkmonitor_ai_cache")
+        self.root = Path(base)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._puts = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self.root / f"{key}.json"
+        try:
+            entry = json.loads(path.read_bytes())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("[WARNING] ai_cache: lectura fallida key=%s: %s", key[:12], e)
+            return None
+        if float(entry.get("expires_at", 0)) <= time.time():
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            return None
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return entry.get("result")
+
+    def put(self, key: str, result: Dict[str, Any], ttl: int) -> None:
+        payload = json.dumps({"expires_at": time.time() + ttl, "result": result}, default=str).encode("utf-8")
+        fd, tmp = tempfile.mkstemp(dir=str(self.root), prefix=".tmp_")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(payload)
+            os.replace(tmp, self.root / f"{key}.json")
+        except OSError as e:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            logger.warning("[WARNING] ai_cache: escritura fallida key=%s: %s", key[:12], e)
+            return
+        with self._lock:
+            self._puts += 1
+            prune = self._puts % self._PRUNE_EVERY == 0
+        if prune:
+            self.prune()
+
+    def prune(self) -> int:
+        """Aplica el tope de entradas descartando las menos usadas; devuelve cuántas borró."""
+        entries = []
+        for p in self.root.glob("*.json"):
+            try:
+                entries.append((p.stat().st_mtime, p))
+            except FileNotFoundError:
+                continue
+        excess = len(entries) - _max_entries()
+        if excess <= 0:
+            return 0
+        entries.sort()
+        for _mtime, p in entries[:excess]:
+            try:
+                p.unlink()
+            except FileNotFoundError:
+                pass
+        return excess
+
+    def clear(self) -> None:
+        for p in self.root.glob("*.json"):
+            try:
+                p.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class RedisAICache:
+    """SET con EX por entrada más un índice ZSET (último uso) para acotar el tamaño."""
+
+    def __init__(self, client):
+        self._r = client
+        self._index = f"{_REDIS_PREFIX}:index"
+
+    def _key(self, key: str) -> str:
+        return f"{_REDIS_PREFIX}:{key}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raw = self._r.get(self._key(key))
+        if raw is None:
+            return None
+        self._r.zadd(self._index, {key: time.time()})
+        return json.loads(raw)
+
+    def put(self, key: str, result: Dict[str, Any], ttl: int) -> None:
+        pipe = self._r.pipeline(transaction=False)
+        pipe.set(self._key(key), json.dumps(result, default=str), ex=ttl)
+        pipe.zadd(self._index, {key: time.time()})
+        pipe.zcard(self._index)
+        size = pipe.execute()[-1]
+        excess = int(size) - _max_entries()
+        if excess > 0:
+            evicted = [m.decode() if isinstance(m, bytes) else m for m, _ in self._r.zpopmin(self._index, excess)]
+            if evicted:
+                self._r.delete(*[self._key(k) for k in evicted])
+
+    def clear(self) -> None:
+        keys = [m.decode() if isinstance(m, bytes) else m for m in self._r.zrange(self._index, 0, -1)]
+        if keys:
+            self._r.delete(*[self._key(k) for k in keys])
+        self._r.delete(self._index)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """Backend configurado (AI_CACHE_BACKEND: auto | disk | redis)."""
+    global _backend
+    if _backend is not None:
+        return _backend
+    with _backend_lock:
+        if _backend is not None:
+            return _backend
+        mode = (getattr(Config, "AI_CACHE_BACKEND", "auto") or "auto").lower()
+        url = (getattr(Config, "REDIS_URL", "") or "").strip()
+        if mode in ("auto", "redis") and url.startswith(("redis://", "rediss://", "unix://")):
+            try:
+                import redis  # type: ignore
+
+                client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+                client.ping()
+                _backend = RedisAICache(client)
+                return _backend
+            except Exception as e:
+                logger.warning("[WARNING] ai_cache: Redis no disponible (%s); usando disco local", e)
+        _backend = DiskAICache()
+        return _backend
+
+
+def reset_backend(backend=None) -> None:
+    """Reemplaza o descarta el backend (pruebas / recarga de configuración)."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+def get(key: str) -> Optional[Dict[str, Any]]:
+    """
+    Diagnóstico cacheado para la clave, o None.
+
+    Args:
+        key (str): Clave generada por `build_key`.
+
+    Returns:
+        Optional[Dict[str, Any]]: Resultado del análisis.
+    """
+    if not is_enabled():
+        return None
+    try:
+        result = get_backend().get(key)
+    except Exception as e:
+        logger.warning("[WARNING] ai_cache: get fallido: %s", e)
+        result = None
+    metrics.inc_ai_cache("hit" if result is not None else "miss")
+    return result
+
+
+def put(key: str, result: Dict[str, Any]) -> bool:
+    """
+    Almacena un diagnóstico si es cacheable (ver `is_cacheable`).
+
+    Returns:
+        bool: True si se almacenó.
+    """
+    if not is_enabled() or not is_cacheable(result):
+        return False
+    try:
+        get_backend().put(key, result, _ttl())
+    except Exception as e:
+        logger.warning("[WARNING] ai_cache: put fallido: %s", e)
+        return False
+    metrics.inc_ai_cache("store")
+    return True
+
+
+def clear() -> None:
+    """Vacía la caché (cambio de prompt fuera de versión, mantenimiento o pruebas)."""
+    try:
+        get_backend().clear()
+    except Exception as e:
+        logger.warning("[WARNING] ai_cache: clear fallido: %s", e)
@@ -0,0 +1,240 @@
+"""
+Compactación del contexto forense antes de enviarlo al proveedor de IA.
+
+La salida de DeviceMiner.mine() incluye campos nulos, todas las interfaces, cada vecino
+y cada cliente wifi, y logs repetidos. Enviarla tal cual infla tokens y latencia sin
+mejorar el diagnóstico. Esta etapa:
+
+- Elimina campos vacíos (None, "", [], {}) y serializa JSON sin espacios.
+- Conserva las AI_CONTEXT_TOP_INTERFACES interfaces con más errores/descartes.
+- Deduplica logs (con contador de repeticiones), trunca mensajes largos y limita la
+  cantidad priorizando error/critical/warning.
+- Limita vecinos, direcciones y clientes wifi (indicando cuántos se omitieron).
+- Aplica un presupuesto duro (AI_CONTEXT_TOKEN_BUDGET) con una estimación local de
+  tokens: reduce los límites por etapas, descarta secciones opcionales y, en último caso,
+  recorta logs e interfaces uno a uno. Si ni así entra, la llamada falla
+  (ContextOverBudget): nunca se envía un contexto fuera de presupuesto.
+"""
+from __future__ import annotations
+
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from ..core.ai.dispatcher import estimate_tokens
+from ..config import Config
+
+logger = logging.getLogger(__name__)
+
+ERROR_COUNTERS = ("rx_fcs_error", "rx_error", "tx_error", "rx_drop", "tx_drop")
+PRIORITY_TOPICS = frozenset({"critical", "error", "warning"})
+# Secciones prescindibles, en el orden en que se descartan si no alcanza el presupuesto
+OPTIONAL_SECTIONS = ("wireless", "layer3")
+# Factores aplicados a los límites configurados en cada intento de ajuste
+_SCALES = (1.0, 0.5, 0.25, 0.1)
+
+
+class ContextOverBudget(ValueError):
+    """El contexto no entra en el presupuesto de tokens ni recortando logs e interfaces."""
+
+
+@dataclass
+class CompactionResult:
+    """Contexto serializado y métricas de la compactación."""
+    text: str
+    tokens_before: int
+    tokens_after: int
+
+
+def _drop_empty(value: Any) -> Any:
+    if isinstance(value, dict):
+        cleaned = {k: _drop_empty(v) for k, v in value.items()}
+        return {k: v for k, v in cleaned.items() if v not in (None, "", [], {})}
+    if isinstance(value, list):
+        cleaned = [_drop_empty(v) for v in value]
+        return [v for v in cleaned if v not in (None, "", [], {})]
+    return value
+
+
+def _to_int(value: Any) -> int:
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _error_total(iface: Dict[str, Any]) -> int:
+    return sum(_to_int(iface.get(c)) for c in ERROR_COUNTERS)
+
+
+def _top_interfaces(interfaces: List[Dict[str, Any]], top_k: int) -> List[Dict[str, Any]]:
+    """Las interfaces con más errores; a igualdad, las activas primero (orden estable)."""
+    ranked = sorted(interfaces, key=lambda i: (-_error_total(i), not i.get("running")))
+    return ranked[:top_k]
+
+
+def _compact_logs(logs: List[Dict[str, Any]], max_logs: int, max_chars: int) -> List[Dict[str, Any]]:
+    merged: Dict[tuple, Dict[str, Any]] = {}
+    for log in logs:
+        message = str(log.get("message") or "")
+        if len(message) > max_chars:
+            message = message[:max_chars] + "…"
+        key = (log.get("topics") or "", message)
+        entry = merged.get(key)
+        if entry is None:
+            merged[key] = {"time": log.get("time"), "topics": log.get("topics"), "message": message}
+        else:
+            # Se conserva la ocurrencia más reciente con el conteo de repeticiones
+            entry["time"] = log.get("time") or entry["time"]
+            entry["repeat"] = entry.get("repeat", 1) + 1
+    entries = list(merged.values())
+    if len(entries) <= max_logs:
+        return entries
+
+    important = [e for e in entries if _is_priority_log(e)]
+    rest = [e for e in entries if not _is_priority_log(e)]
+    # Los más recientes (al final de la lista) dentro de cada grupo
+    keep = important[-max_logs:]
+    room = max_logs - len(keep)
+    if room > 0:
+        keep += rest[-room:]
+    keep_ids = {id(e) for e in keep}
+    return [e for e in entries if id(e) in keep_ids]
+
+
+def compact(context: Dict[str, Any], top_interfaces: int, max_logs: int, log_chars: int,
+            max_items: int, drop_sections: tuple = ()) -> Dict[str, Any]:
+    """
+    Versión compacta del contexto con los límites indicados.
+
+    Args:
+        context (Dict[str, Any]): Salida de DeviceMiner.mine().
+        top_interfaces (int): Interfaces a conservar (por cantidad de errores).
+        max_logs (int): Logs distintos a conservar.
+        log_chars (int): Largo máximo de cada mensaje de log.
+        max_items (int): Tope de vecinos, direcciones y clientes wifi.
+        drop_sections (tuple): Secciones opcionales a descartar por completo.
+
+    Returns:
+        Dict[str, Any]: Contexto compacto (sin campos vacíos).
+    """
+    data = dict(context)
+    omitted: Dict[str, int] = {}
+
+    interfaces = list(data.get("interfaces") or [])
+    data["interfaces"] = _top_interfaces(interfaces, top_interfaces)
+    if len(interfaces) > len(data["interfaces"]):
+        omitted["interfaces"] = len(interfaces) - len(data["interfaces"])
+
+    logs = list(data.get("logs") or [])
+    data["logs"] = _compact_logs(logs, max_logs, log_chars)
+
+    wireless = list(data.get("wireless") or [])
+    data["wireless"] = wireless[:max_items]
+    if len(wireless) > max_items:
+        omitted["wireless"] = len(wireless) - max_items
+
+    layer3 = dict(data.get("layer3") or {})
+    for name in ("neighbors", "addresses"):
+        items = list(layer3.get(name) or [])
+        layer3[name] = items[:max_items]
+        if len(items) > max_items:
+            omitted[name] = len(items) - max_items
+    data["layer3"] = layer3
+
+    for section in drop_sections:
+        if data.pop(section, None):
+            omitted[section] = 1
+    if omitted:
+        data["omitted"] = omitted
+    return _drop_empty(data)
+
+
+def _serialize(data: Dict[str, Any]) -> str:
+    return json.dumps(data, separators=(",", ":"), default=str)
+
+
+def _is_priority_log(entry: Dict[str, Any]) -> bool:
+    return bool({t.strip() for t in str(entry.get("topics") or "").split(",")} & PRIORITY_TOPICS)
+
+
+def _truncate_to_budget(data: Dict[str, Any], budget: int) -> Optional[str]:
+    """
+    Último recurso: quita logs (primero los más antiguos sin prioridad) y luego las
+    interfaces con menos errores, uno a uno, hasta entrar en el presupuesto.
+
+    Returns:
+        Optional[str]: JSON dentro del presupuesto, o None si ni vacías alcanza.
+    """
+    data = dict(data)
+    logs = list(data.get("logs") or [])
+    interfaces = list(data.get("interfaces") or [])
+    omitted = dict(data.get("omitted") or {})
+    while True:
+        data["logs"], data["interfaces"], data["omitted"] = logs, interfaces, omitted
+        text = _serialize(_drop_empty(data))
+        if estimate_tokens(text) <= budget:
+            return text
+        if logs:
+            idx = next((i for i, e in enumerate(logs) if not _is_priority_log(e)), 0)
+            logs.pop(idx)
+            omitted["logs"] = omitted.get("logs", 0) + 1
+        elif interfaces:
+            # Ordenadas por errores: la última es la menos relevante
+            interfaces.pop()
+            omitted["interfaces"] = omitted.get("interfaces", 0) + 1
+        else:
+            return None
+
+
+def compact_to_budget(context: Dict[str, Any], token_budget: Optional[int] = None) -> CompactionResult:
+    """
+    Compacta y serializa el contexto dentro del presupuesto de tokens.
+
+    Prueba los límites configurados y versiones progresivamente más estrictas; si aún
+    excede, descarta secciones opcionales (wireless, layer3) y, en último caso, recorta
+    logs e interfaces hasta que entre.
+
+    Args:
+        context (Dict[str, Any]): Salida de DeviceMiner.mine().
+        token_budget (Optional[int]): Tokens máximos (default AI_CONTEXT_TOKEN_BUDGET).
+
+    Returns:
+        CompactionResult: JSON compacto y tokens estimados antes/después.
+
+    Raises:
+        ContextOverBudget: Si ni sin logs ni interfaces entra en el presupuesto.
+    """
+    budget = int(token_budget if token_budget is not None else getattr(Config, "AI_CONTEXT_TOKEN_BUDGET", 3000))
+    # Referencia: el formato que se enviaba antes (JSON indentado del contexto completo)
+    before = estimate_tokens(json.dumps(context, indent=2, default=str))
+
+    limits = (
+        int(getattr(Config, "AI_CONTEXT_TOP_INTERFACES", 8)),
+        int(getattr(Config, "AI_CONTEXT_MAX_LOGS", 50)),
+        int(getattr(Config, "AI_CONTEXT_LOG_CHARS", 240)),
+        int(getattr(Config, "AI_CONTEXT_MAX_ITEMS", 20)),
+    )
+    attempts = [(scale, ()) for scale in _SCALES]
+    attempts += [(_SCALES[-1], OPTIONAL_SECTIONS[:i]) for i in range(1, len(OPTIONAL_SECTIONS) + 1)]
+
+    data: Dict[str, Any] = {}
+    for scale, drop in attempts:
+        scaled = [max(int(limit * scale), 1) for limit in limits]
+        data = compact(context, *scaled, drop_sections=drop)
+        text = _serialize(data)
+        after = estimate_tokens(text)
+        if after <= budget:
+            return CompactionResult(text=text, tokens_before=before, tokens_after=after)
+
+    text = _truncate_to_budget(data, budget)
+    if text is None:
+        raise ContextOverBudget(
+            f"device_id={context.get('device_id')}: el contexto mínimo excede el presupuesto de {budget} tokens"
+        )
+    logger.warning(
+        "[WARNING] context_compaction: device_id=%s recortado a logs/interfaces para el presupuesto (%s tokens)",
+        context.get("device_id"), budget,
+    )
+    return CompactionResult(text=text, tokens_before=before, tokens_after=estimate_tokens(text))
@@ -0,0 +1,303 @@
+"""
+Caché en disco de exportaciones de logs (CSV/PDF).
+
+Los reportes de logs ("últimas 24h del equipo X") se exportan repetidamente desde el NOC.
+Este módulo guarda el artefacto final en disco local para servir exportaciones repetidas
+sin consultar la base de datos ni invocar ReportLab.
+
+- Clave: (tenant, dispositivo, rango normalizado, búsqueda, formato, variante).
+- Evicción LRU (por mtime) con presupuesto de tamaño total (EXPORT_CACHE_MAX_MB).
+- Invalidación selectiva: solo se descartan las entradas cuyo rango se solapa con
+  logs recién ingeridos (ver `invalidate_range`).
+- Generación por dispositivo: la ruta la lee antes de consultar los logs y `put` descarta
+  el artefacto si cambió entretanto (logs confirmados e invalidados durante la consulta).
+
+Notas:
+- Cada entrada se compone de un archivo de datos (.bin) y un sidecar de metadatos (.json).
+- Las escrituras son atómicas (archivo temporal + os.replace), por lo que varios workers
+  del mismo host pueden compartir el directorio.
+- La API y el poller de monitoreo deben compartir EXPORT_CACHE_DIR (mismo host o volumen
+  compartido): `invalidate_range` se ejecuta en el poller al ingerir logs y solo borra
+  entradas del directorio que ve. Si la API usa otro directorio (otro contenedor sin
+  volumen común), sus exportaciones cacheadas no se invalidan y sirven datos viejos.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import tempfile
+import uuid
+from datetime import datetime, timezone
+from hashlib import sha256
+from pathlib import Path
+from threading import Lock
+from typing import Optional
+
+from ..config import Config
+
+logger = logging.getLogger(__name__)
+
+_lock = Lock()
+
+
+def _cache_dir() -> Path:
+    """Directorio raíz de la caché (se crea si no existe)."""
+    base = getattr(Config, "EXPORT_CACHE_DIR", None) or os.path.join(tempfile.gettempdir(), "mkmonitor_export_cache")
+    path = Path(base)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def is_enabled() -> bool:
+    """Indica si la caché de exportaciones está habilitada por configuración."""
+    return bool(getattr(Config, "EXPORT_CACHE_ENABLED", True))
+
+
+def normalize_dt(value: Optional[datetime]) -> Optional[datetime]:
+    """
+    Normaliza un datetime a UTC naive con precisión de segundos.
+
+    Args:
+        value (Optional[datetime]): Fecha con o sin zona horaria.
+
+    Returns:
+        Optional[datetime]: Fecha UTC sin tzinfo, o None.
+    """
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.replace(microsecond=0)
+
+
+def _iso(value: Optional[datetime]) -> str:
+    norm = normalize_dt(value)
+    return norm.isoformat() if norm else ""
+
+
+def _prefix(tenant_id: int, device_id: int) -> str:
+    return f"t{int(tenant_id)}_d{int(device_id)}_"
+
+
+def _generation_path(tenant_id: int, device_id: int) -> Path:
+    # Sufijo .gen: fuera de los globs de entradas (*.bin / *.json)
+    return _cache_dir() / f"{_prefix(tenant_id, device_id)}generation.gen"
+
+
+def generation(tenant_id: int, device_id: int) -> str:
+    """
+    Generación actual de las exportaciones de un dispositivo (cambia en cada `invalidate_range`).
+
+    Leerla antes de consultar los logs y pasarla a `put`: si logs nuevos se confirmaron
+    e invalidaron durante la consulta, el artefacto (ya desactualizado) no se guarda.
+
+    Args:
+        tenant_id (int): ID del tenant.
+        device_id (int): ID del dispositivo.
+
+    Returns:
+        str: Marca opaca de generación ("" si nunca se invalidó).
+    """
+    try:
+        return _generation_path(tenant_id, device_id).read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return ""
+    except OSError as e:
+        logger.warning("[WARNING] export_cache: lectura de generación fallida device_id=%s: %s", device_id, e)
+        return ""
+
+
+def build_key(
+    tenant_id: int,
+    device_id: int,
+    range_start: Optional[datetime],
+    range_end: Optional[datetime],
+    query: str,
+    fmt: str,
+    variant: str = "",
+) -> str:
+    """
+    Construye la clave de caché para una exportación.
+
+    Args:
+        tenant_id (int): ID del tenant.
+        device_id (int): ID del dispositivo.
+        range_start (Optional[datetime]): Inicio del rango (None = sin límite).
+        range_end (Optional[datetime]): Fin del rango (None = sin límite).
+        query (str): Término de búsqueda (se normaliza a minúsculas).
+        fmt (str): Formato de salida ('csv', 'pdf').
+        variant (str): Discriminador adicional (ej. endpoint legacy + límite de filas).
+
+    Returns:
+        str: Nombre base de la entrada (prefijo tenant/dispositivo + digest).
+    """
+    raw = "|".join([
+        _iso(range_start),
+        _iso(range_end),
+        (query or "").strip().lower(),
+        (fmt or "").lower(),
+        variant or "",
+    ])
+    return _prefix(tenant_id, device_id) + sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+def get(key: str) -> Optional[bytes]:
+    """
+    Obtiene el artefacto cacheado y actualiza su marca LRU.
+
+    Args:
+        key (str): Clave generada por `build_key`.
+
+    Returns:
+        Optional[bytes]: Contenido del artefacto, o None si no existe.
+    """
+    if not is_enabled():
+        return None
+    data_path = _cache_dir() / f"{key}.bin"
+    try:
+        data = data_path.read_bytes()
+        os.utime(data_path, None)
+        return data
+    except FileNotFoundError:
+        return None
+    except OSError as e:
+        logger.warning("[WARNING] export_cache: lectura fallida key=%s: %s", key, e)
+        return None
+
+
+def _atomic_write(path: Path, payload: bytes) -> None:
+    fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix=".tmp_")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(payload)
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def put(key: str, data: bytes, range_start: Optional[datetime], range_end: Optional[datetime],
+        tenant_id: Optional[int] = None, device_id: Optional[int] = None,
+        expected_generation: Optional[str] = None) -> None:
+    """
+    Almacena un artefacto en la caché y aplica el presupuesto de tamaño.
+
+    Args:
+        key (str): Clave generada por `build_key`.
+        data (bytes): Contenido del artefacto (CSV/PDF).
+        range_start (Optional[datetime]): Inicio del rango cubierto por el artefacto.
+        range_end (Optional[datetime]): Fin del rango cubierto por el artefacto.
+        tenant_id (Optional[int]): Tenant del artefacto (para verificar la generación).
+        device_id (Optional[int]): Dispositivo del artefacto (para verificar la generación).
+        expected_generation (Optional[str]): `generation()` leída antes de la consulta; si
+            cambió, el artefacto no se guarda.
+    """
+    if not is_enabled():
+        return
+    check = expected_generation is not None and tenant_id is not None and device_id is not None
+    if check and generation(tenant_id, device_id) != expected_generation:
+        logger.debug("[DEBUG] export_cache: generación cambiada, no se guarda key=%s", key)
+        return
+    max_bytes = int(getattr(Config, "EXPORT_CACHE_MAX_MB", 256)) * 1024 * 1024
+    if len(data) > max_bytes:
+        return
+    root = _cache_dir()
+    meta = {"start": _iso(range_start) or None, "end": _iso(range_end) or None}
+    try:
+        _atomic_write(root / f"{key}.json", json.dumps(meta).encode("utf-8"))
+        _atomic_write(root / f"{key}.bin", data)
+    except OSError as e:
+        logger.warning("[WARNING] export_cache: escritura fallida key=%s: %s", key, e)
+        return
+    # Una invalidación entre la verificación y la escritura pudo no ver esta entrada
+    # (invalidate_range cambia la generación antes de recorrer el directorio)
+    if check and generation(tenant_id, device_id) != expected_generation:
+        _remove(root, key)
+        return
+    _evict(max_bytes)
+
+
+def _remove(root: Path, key: str) -> None:
+    for suffix in (".bin", ".json"):
+        try:
+            (root / f"{key}{suffix}").unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _evict(max_bytes: int) -> None:
+    """Elimina las entradas menos usadas hasta respetar el presupuesto."""
+    root = _cache_dir()
+    with _lock:
+        entries = []
+        total = 0
+        for p in root.glob("*.bin"):
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p.stem))
+            total += st.st_size
+        if total <= max_bytes:
+            return
+        entries.sort()
+        for _mtime, size, key in entries:
+            if total <= max_bytes:
+                break
+            _remove(root, key)
+            total -= size
+            logger.debug("[DEBUG] export_cache: evicted key=%s size=%s", key, size)
+
+
+def invalidate_range(tenant_id: int, device_id: int, start: datetime, end: datetime) -> int:
+    """
+    Invalida las exportaciones cuyo rango se solapa con logs recién ingeridos.
+
+    Args:
+        tenant_id (int): ID del tenant.
+        device_id (int): ID del dispositivo.
+        start (datetime): Timestamp mínimo de los logs nuevos.
+        end (datetime): Timestamp máximo de los logs nuevos.
+
+    Returns:
+        int: Número de entradas invalidadas.
+    """
+    new_start = normalize_dt(start)
+    new_end = normalize_dt(end)
+    root = _cache_dir()
+    # Primero la generación: las exportaciones en curso dejan de poder guardarse
+    try:
+        _atomic_write(_generation_path(tenant_id, device_id), uuid.uuid4().hex.encode("utf-8"))
+    except OSError as e:
+        logger.warning("[WARNING] export_cache: escritura de generación fallida device_id=%s: %s", device_id, e)
+    removed = 0
+    for meta_path in root.glob(f"{_prefix(tenant_id, device_id)}*.json"):
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            meta = {}
+        c_start = datetime.fromisoformat(meta["start"]) if meta.get("start") else None
+        c_end = datetime.fromisoformat(meta["end"]) if meta.get("end") else None
+        overlaps = (c_end is None or new_start <= c_end) and (c_start is None or new_end >= c_start)
+        if overlaps:
+            _remove(root, meta_path.stem)
+            removed += 1
+    if removed:
+        logger.info(
+            "[INFO] export_cache: invalidadas %s entradas tenant_id=%s device_id=%s", removed, tenant_id, device_id
+        )
+    return removed
+
+
+def clear() -> None:
+    """Vacía completamente la caché (uso en mantenimiento/pruebas)."""
+    root = _cache_dir()
+    for p in list(root.glob("*.bin")) + list(root.glob("*.json")):
+        try:
+            p.unlink()
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,50 @@
+"""
+GET condicionales (ETag débil + If-None-Match) para endpoints de listado.
+
+El ETag se deriva de los contadores de versión del tenant (services/tenant_versions.py)
+más la URL completa, de modo que el 304 se resuelve con una búsqueda por PK antes de
+ejecutar las consultas y la serialización del endpoint.
+"""
+from functools import wraps
+from hashlib import sha256
+from flask import g, make_response, request
+from ..services import tenant_versions
+
+def _opaque(tag: str) -> str:
+    """Comparación débil (RFC 9110): se ignora el prefijo W/."""
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+def _parse_if_none_match(header: str) -> set:
+    return {_opaque(tag) for tag in (header or "").split(",") if tag.strip()}
+
+def conditional_etag(*scopes: str):
+    """
+    Decorador que añade un ETag débil y responde 304 si el cliente ya tiene la versión.
+
+    Debe aplicarse debajo de `require_auth` (necesita g.tenant_id).
+
+    Args:
+        *scopes (str): Ámbitos de versión de los que depende la respuesta.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            versions = tenant_versions.get_versions(g.tenant_id, scopes)
+            # "tv2": los contadores viven ahora en tenant_versions (reiniciados en 0)
+            raw = "|".join(["tv2", str(g.tenant_id), request.full_path] + [f"{s}:{versions[s]}" for s in scopes])
+            etag = f'W/"{sha256(raw.encode("utf-8")).hexdigest()[:32]}"'
+
+            candidates = _parse_if_none_match(request.headers.get("If-None-Match", ""))
+            if _opaque(etag) in candidates or "*" in candidates:
+                resp = make_response("", 304)
+            else:
+                resp = make_response(fn(*args, **kwargs))
+                if resp.status_code != 200:
+                    return resp
+            resp.headers["ETag"] = etag
+            # Siempre revalidar: el cliente puede guardar la respuesta pero debe preguntar
+            resp.headers["Cache-Control"] = "private, no-cache"
+            return resp
+        return wrapper
+    return decorator
@@ -0,0 +1,122 @@
+"""
+Serialización JSON rápida para respuestas de la API.
+
+- Usa orjson si está instalado (serialización en C, datetime/date/UUID/dataclass nativos).
+- Fallback a la librería estándar con el mismo formato de salida (fechas ISO 8601).
+
+`OrjsonProvider` se registra en la app (app.json), de modo que `jsonify` de todos los
+blueprints pasa por aquí; las rutas pueden entregar datetimes directamente sin
+convertirlos con `.isoformat()` fila por fila.
+"""
+from __future__ import annotations
+
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any
+
+from flask import current_app
+from flask.json.provider import DefaultJSONProvider
+
+try:  # pragma: no cover - depende del entorno
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover
+    orjson = None
+
+HAS_ORJSON = orjson is not None
+
+
+def _default(value: Any) -> Any:
+    """Tipos no soportados nativamente por el encoder."""
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if hasattr(value, "tolist"):  # escalares/arrays numpy (analítica SLA)
+        return value.tolist()
+    if hasattr(value, "__html__"):
+        return str(value.__html__())
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any, sort_keys: bool = False, indent: bool = False) -> bytes:
+    """
+    Serializa a JSON (UTF-8).
+
+    Args:
+        obj (Any): Objeto a serializar.
+        sort_keys (bool): Ordenar claves de los diccionarios.
+        indent (bool): Indentación de 2 espacios (modo debug).
+
+    Returns:
+        bytes: Documento JSON.
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_default, option=option)
+    return json.dumps(
+        obj,
+        default=_default,
+        ensure_ascii=False,
+        sort_keys=sort_keys,
+        indent=2 if indent else None,
+        separators=None if indent else (",", ":"),
+    ).encode("utf-8")
+
+
+def loads(data: Any) -> Any:
+    """Deserializa JSON desde str o bytes."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_response(payload: Any, status: int = 200, headers: dict | None = None):
+    """
+    Construye una respuesta JSON serializando directamente a bytes.
+
+    Equivalente a `jsonify(payload), status` para listados grandes (alertas, logs):
+    evita la conversión intermedia a str y acepta datetimes sin `.isoformat()`.
+
+    Args:
+        payload (Any): Cuerpo de la respuesta.
+        status (int): Código HTTP.
+        headers (dict | None): Headers adicionales.
+
+    Returns:
+        Response: Respuesta Flask con mimetype application/json.
+    """
+    return current_app.response_class(
+        dumps(payload, sort_keys=current_app.json.sort_keys),
+        status=status,
+        headers=headers,
+        mimetype="application/json",
+    )
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Proveedor JSON de Flask respaldado por `dumps`/`loads` de este módulo.
+
+    Respeta `sort_keys` y `compact` de DefaultJSONProvider (en debug se indenta).
+    """
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return dumps(obj, sort_keys=kwargs.get("sort_keys", self.sort_keys)).decode("utf-8")
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        return loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        return self._app.response_class(
+            dumps(obj, sort_keys=self.sort_keys, indent=indent),
+            mimetype=self.mimetype,
+        )
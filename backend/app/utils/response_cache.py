@@ -0,0 +1,235 @@
+"""
+Caché de respuestas por tenant para lecturas frecuentes de los dashboards.
+
+Dos niveles:
+- Local: LRU en memoria del proceso con TTL corto (RESPONSE_CACHE_LOCAL_TTL_SEC).
+- Redis (opcional, reutiliza REDIS_URL): un hash por (espacio, tenant) con TTL explícito
+  por entrada (RESPONSE_CACHE_TTL_SEC); compartido entre workers.
+
+Invalidación: las escrituras de la capa de servicios llaman a `tenant_versions.bump`, que
+programa `invalidate_after_commit` para los espacios afectados. Tras el commit se borran
+la entrada local de este proceso y el hash de Redis. Los servicios leen a través de
+`tenant_versions.cached`, que incluye las versiones en la clave: el LRU local de otros
+workers deja de coincidir en cuanto cambia la versión, sin esperar el TTL.
+
+Los valores se almacenan serializados en JSON (solo tipos JSON: dict/list/str/números),
+de modo que cada lectura devuelve una copia independiente.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, Optional, Tuple
+
+from sqlalchemy import event
+
+from ..config import Config
+from ..db import db
+from .. import metrics
+from .json_response import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+# Espacios de caché
+DEVICES = "devices"
+PLAN = "plan"
+HEALTH = "health"
+SLA = "sla"
+
+_PENDING_KEY = "pending_cache_invalidations"
+_PREFIX = "mkmonitor:rc"
+
+_lock = threading.Lock()
+_local: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+_redis = None
+_redis_checked = False
+
+
+def is_enabled() -> bool:
+    """Indica si la caché de respuestas está habilitada por configuración."""
+    return bool(getattr(Config, "RESPONSE_CACHE_ENABLED", True))
+
+
+def _redis_client():
+    """Cliente Redis del nivel compartido, o None si no está configurado/disponible."""
+    global _redis, _redis_checked
+    if _redis_checked:
+        return _redis
+    with _lock:
+        if _redis_checked:
+            return _redis
+        _redis_checked = True
+        url = (getattr(Config, "REDIS_URL", "") or "").strip()
+        if getattr(Config, "RESPONSE_CACHE_REDIS", True) and url.startswith(("redis://", "rediss://", "unix://")):
+            try:
+                import redis  # type: ignore
+
+                client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+                client.ping()
+                _redis = client
+            except Exception as e:
+                logger.warning("[WARNING] response_cache: Redis no disponible (%s); solo nivel local", e)
+        return _redis
+
+
+def _hash_key(namespace: str, tenant_id: int) -> str:
+    return f"{_PREFIX}:{namespace}:t{int(tenant_id)}"
+
+
+def _local_key(namespace: str, tenant_id: int, key: str) -> str:
+    return f"{_hash_key(namespace, tenant_id)}:{key}"
+
+
+def _local_get(lkey: str) -> Optional[str]:
+    with _lock:
+        item = _local.get(lkey)
+        if item is None:
+            return None
+        expires_at, payload = item
+        if expires_at <= time.monotonic():
+            del _local[lkey]
+            return None
+        _local.move_to_end(lkey)
+        return payload
+
+
+def _local_put(lkey: str, payload: str) -> None:
+    ttl = float(getattr(Config, "RESPONSE_CACHE_LOCAL_TTL_SEC", 5))
+    max_entries = int(getattr(Config, "RESPONSE_CACHE_MAX_ENTRIES", 2048))
+    with _lock:
+        _local[lkey] = (time.monotonic() + ttl, payload)
+        _local.move_to_end(lkey)
+        while len(_local) > max_entries:
+            _local.popitem(last=False)
+
+
+def _redis_get(namespace: str, tenant_id: int, key: str) -> Optional[str]:
+    client = _redis_client()
+    if client is None:
+        return None
+    try:
+        raw = client.hget(_hash_key(namespace, tenant_id), key)
+    except Exception as e:
+        logger.warning("[WARNING] response_cache: hget fallido: %s", e)
+        return None
+    if raw is None:
+        return None
+    expires_at, _, payload = (raw.decode() if isinstance(raw, bytes) else raw).partition("|")
+    try:
+        if float(expires_at) <= time.time():
+            return None
+    except ValueError:
+        return None
+    return payload
+
+
+def _redis_put(namespace: str, tenant_id: int, key: str, payload: str, ttl: int) -> None:
+    client = _redis_client()
+    if client is None:
+        return
+    hkey = _hash_key(namespace, tenant_id)
+    try:
+        pipe = client.pipeline()
+        pipe.hset(hkey, key, f"{time.time() + ttl}|{payload}")
+        # Cada entrada lleva su propia expiración; el hash se recolecta tras la última escritura
+        pipe.expire(hkey, ttl)
+        pipe.execute()
+    except Exception as e:
+        logger.warning("[WARNING] response_cache: hset fallido: %s", e)
+
+
+def get_or_load(namespace: str, tenant_id: int, loader: Callable[[], Any], key: str = "", ttl: Optional[int] = None) -> Any:
+    """
+    Devuelve el valor cacheado o lo calcula con `loader` y lo almacena en ambos niveles.
+
+    Args:
+        namespace (str): Espacio de la caché (DEVICES, PLAN, HEALTH, SLA).
+        tenant_id (int): ID del tenant.
+        loader (Callable[[], Any]): Función que calcula el valor (serializable a JSON).
+        key (str): Discriminador adicional dentro del espacio (ej. parámetros).
+        ttl (Optional[int]): TTL del nivel Redis en segundos (default RESPONSE_CACHE_TTL_SEC).
+
+    Returns:
+        Any: Valor (copia deserializada).
+    """
+    if not is_enabled():
+        return loader()
+
+    lkey = _local_key(namespace, tenant_id, key)
+    payload = _local_get(lkey)
+    metrics.inc_cache_lookup(namespace, "local", payload is not None)
+    if payload is not None:
+        return loads(payload)
+
+    if _redis_client() is not None:
+        payload = _redis_get(namespace, tenant_id, key)
+        metrics.inc_cache_lookup(namespace, "redis", payload is not None)
+        if payload is not None:
+            _local_put(lkey, payload)
+            return loads(payload)
+
+    value = loader()
+    payload = dumps(value).decode("utf-8")
+    _local_put(lkey, payload)
+    _redis_put(namespace, tenant_id, key, payload, int(ttl or getattr(Config, "RESPONSE_CACHE_TTL_SEC", 30)))
+    return loads(payload)
+
+
+def invalidate(tenant_id: int, namespaces: Iterable[str]) -> None:
+    """
+    Borra inmediatamente las entradas del tenant en los espacios indicados.
+
+    Args:
+        tenant_id (int): ID del tenant.
+        namespaces (Iterable[str]): Espacios a invalidar.
+    """
+    hkeys = [_hash_key(ns, tenant_id) for ns in namespaces]
+    prefixes = tuple(f"{h}:" for h in hkeys)
+    with _lock:
+        for lkey in [k for k in _local if k.startswith(prefixes)]:
+            del _local[lkey]
+    client = _redis_client()
+    if client is not None and hkeys:
+        try:
+            client.delete(*hkeys)
+        except Exception as e:
+            logger.warning("[WARNING] response_cache: delete fallido: %s", e)
+
+
+def invalidate_after_commit(tenant_id: int, namespaces: Iterable[str]) -> None:
+    """
+    Programa la invalidación para cuando confirme la transacción actual.
+
+    Invalidar antes del commit permitiría que otra lectura repoblara la caché con
+    datos previos a la escritura.
+    """
+    pending = db.session.info.setdefault(_PENDING_KEY, set())
+    for ns in namespaces:
+        pending.add((int(tenant_id), ns))
+
+
+@event.listens_for(db.session, "after_commit")
+def _flush_pending(session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    by_tenant = {}
+    for tenant_id, ns in pending:
+        by_tenant.setdefault(tenant_id, []).append(ns)
+    for tenant_id, namespaces in by_tenant.items():
+        invalidate(tenant_id, namespaces)
+
+
+@event.listens_for(db.session, "after_soft_rollback")
+def _drop_pending(session, previous_transaction) -> None:
+    if previous_transaction.parent is None:
+        session.info.pop(_PENDING_KEY, None)
+
+
+def clear() -> None:
+    """Vacía el nivel local (uso en mantenimiento/pruebas)."""
+    with _lock:
+        _local.clear()
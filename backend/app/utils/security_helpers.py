@@ -4,22 +4,181 @@ Utilidades de Seguridad y Autenticación.
 Provee funciones auxiliares para fortalecer la seguridad del sistema:
 - Extracción confiable de dirección IP del cliente.
 - Mecanismos de bloqueo temporal (Lockout) para prevenir ataques de fuerza bruta
-  en login y registro.
+  en login y registro. Los contadores viven en Redis (compartidos entre workers,
+  LOCKOUT_BACKEND=auto|redis) o, si no hay Redis, en memoria con TTL y tamaño acotado.
 - Configuración dinámica de políticas de intentos fallidos.
 """
 
+import threading
 import time
 import logging
+from collections import OrderedDict
+from hashlib import sha256
+from typing import Optional
 from flask import request
 
-# Almacenamiento en memoria para protección anti-abuso (TODO: Migrar a Redis en prod)
-FAILED_REGISTRATIONS: dict[tuple[str, str], dict] = {}
-FAILED_LOGINS: dict[tuple[str, str], dict] = {}
+from ..config import Config
+
+logger = logging.getLogger(__name__)
 
 # Valores por defecto (Seguros)
 MAX_FAILED_ATTEMPTS = 5
 LOCKOUT_SECONDS = 300  # 5 minutos
 
+
+class MemoryLockoutStore:
+    """
+    Contadores de fallos en memoria del proceso, con TTL y tamaño acotado.
+
+    Cada fallo renueva el TTL de su llave (LOCKOUT_SECONDS), así que el orden por última
+    actualización coincide con el orden de expiración: la purga de vencidas y la evicción
+    por tamaño (LOCKOUT_MAX_ENTRIES) se hacen desde la cabeza en O(1) amortizado.
+    """
+
+    def __init__(self, max_entries: int):
+        self._max_entries = max(int(max_entries), 1)
+        self._data: "OrderedDict[str, tuple[int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _purge(self, now: float) -> None:
+        while self._data:
+            _key, (_count, expires_at) = next(iter(self._data.items()))
+            if expires_at > now:
+                break
+            self._data.popitem(last=False)
+
+    def incr(self, key: str, ttl: int) -> int:
+        now = time.time()
+        with self._lock:
+            self._purge(now)
+            count, expires_at = self._data.get(key, (0, 0.0))
+            count = (count if expires_at > now else 0) + 1
+            self._data[key] = (count, now + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self._max_entries:
+                self._data.popitem(last=False)
+            return count
+
+    def get(self, key: str) -> int:
+        now = time.time()
+        with self._lock:
+            count, expires_at = self._data.get(key, (0, 0.0))
+            return count if expires_at > now else 0
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class RedisLockoutStore:
+    """
+    Contadores compartidos entre workers: INCR + EXPIRE en una transacción (MULTI/EXEC).
+    """
+
+    def __init__(self, client):
+        self._r = client
+
+    def incr(self, key: str, ttl: int) -> int:
+        pipe = self._r.pipeline(transaction=True)
+        pipe.incr(key)
+        pipe.expire(key, ttl)
+        count, _ = pipe.execute()
+        return int(count)
+
+    def get(self, key: str) -> int:
+        value = self._r.get(key)
+        return int(value) if value else 0
+
+    def reset(self, key: str) -> None:
+        self._r.delete(key)
+
+
+_store = None
+_fallback: Optional[MemoryLockoutStore] = None
+_store_lock = threading.Lock()
+
+
+def _memory_store() -> MemoryLockoutStore:
+    global _fallback
+    if _fallback is None:
+        _fallback = MemoryLockoutStore(int(getattr(Config, "LOCKOUT_MAX_ENTRIES", 100000)))
+    return _fallback
+
+
+def get_lockout_store():
+    """Devuelve el backend de lockout configurado (LOCKOUT_BACKEND: auto | memory | redis)."""
+    global _store
+    if _store is not None:
+        return _store
+    with _store_lock:
+        if _store is not None:
+            return _store
+        mode = (getattr(Config, "LOCKOUT_BACKEND", "auto") or "auto").lower()
+        url = (getattr(Config, "REDIS_URL", "") or "").strip()
+        if mode in ("auto", "redis") and url.startswith(("redis://", "rediss://", "unix://")):
+            try:
+                import redis  # type: ignore
+
+                client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+                client.ping()
+                _store = RedisLockoutStore(client)
+                return _store
+            except Exception as e:
+                logger.warning("[WARNING] lockout: Redis no disponible (%s); usando memoria local", e)
+        _store = _memory_store()
+        return _store
+
+
+def set_lockout_store(store) -> None:
+    """Reemplaza el backend de lockout (pruebas o configuración explícita)."""
+    global _store
+    with _store_lock:
+        _store = store
+
+
+def _key(scope: str, key: tuple[str, str]) -> str:
+    # Digest: no guardar IP/email en claro en el backend compartido
+    digest = sha256("|".join(key).encode("utf-8")).hexdigest()[:32]
+    return f"mkmonitor:lockout:{scope}:{digest}"
+
+
+def _call(op: str, *args):
+    """Invoca el backend; si Redis falla se degrada al store en memoria del proceso."""
+    store = get_lockout_store()
+    try:
+        return getattr(store, op)(*args)
+    except Exception as e:
+        if isinstance(store, MemoryLockoutStore):
+            raise
+        logger.warning("[WARNING] lockout: backend falló (%s); usando memoria local", e)
+        return getattr(_memory_store(), op)(*args)
+
+
+def _is_locked(scope: str, key: tuple[str, str]) -> bool:
+    return _call("get", _key(scope, key)) >= MAX_FAILED_ATTEMPTS
+
+
+def _register_failure(scope: str, key: tuple[str, str]) -> int:
+    # El TTL se renueva en cada fallo: el contador se reinicia tras LOCKOUT_SECONDS sin
+    # fallos y, una vez alcanzado el umbral, el bloqueo dura LOCKOUT_SECONDS desde el último.
+    return _call("incr", _key(scope, key), int(LOCKOUT_SECONDS))
+
+
+def _reset(scope: str, key: tuple[str, str]) -> None:
+    _call("reset", _key(scope, key))
+
+
+def clear_lockouts() -> None:
+    """Vacía los contadores en memoria del proceso (uso en pruebas/mantenimiento)."""
+    global _store, _fallback
+    with _store_lock:
+        if _store is _fallback:
+            _store = None
+        _fallback = None
+
 def configure_security(max_attempts: int, lockout_sec: int):
     """
     Actualiza los parámetros de seguridad globales desde la configuración.
@@ -55,11 +214,7 @@ def is_login_locked(key: tuple[str, str]) -> bool:
     Returns:
         bool: True si está bloqueado, False en caso contrario.
     """
-    entry = FAILED_LOGINS.get(key)
-    if not entry:
-        return False
-    until = entry.get("blocked_until", 0)
-    return until and until > int(time.time())
+    return _is_locked("login", key)
 
 def register_login_failure(key: tuple[str, str]) -> int:
     """
@@ -72,22 +227,7 @@ def register_login_failure(key: tuple[str, str]) -> int:
     Returns:
         int: Número actual de intentos fallidos.
     """
-    now = int(time.time())
-    entry = FAILED_LOGINS.get(key) or {"count": 0, "blocked_until": 0}
-    last = entry.get("last_failed", 0)
-
-    # Reiniciar contador si ha pasado el tiempo de bloqueo desde el último fallo
-    if last and now - last > LOCKOUT_SECONDS:
-        entry["count"] = 0
-
-    entry["count"] += 1
-    entry["last_failed"] = now
-
-    if entry["count"] >= MAX_FAILED_ATTEMPTS:
-        entry["blocked_until"] = now + LOCKOUT_SECONDS
-
-    FAILED_LOGINS[key] = entry
-    return entry["count"]
+    return _register_failure("login", key)
 
 def reset_login_lock(key: tuple[str, str]) -> None:
     """
@@ -96,7 +236,7 @@ def reset_login_lock(key: tuple[str, str]) -> None:
     Args:
         key (tuple[str, str]): Identificador del intento.
     """
-    FAILED_LOGINS.pop(key, None)
+    _reset("login", key)
 
 # --- Helpers para Bloqueo de Registro ---
 
@@ -110,11 +250,7 @@ def is_registration_locked(key: tuple[str, str]) -> bool:
     Returns:
         bool: True si está bloqueado.
     """
-    entry = FAILED_REGISTRATIONS.get(key)
-    if not entry:
-        return False
-    until = entry.get("blocked_until", 0)
-    return until and until > int(time.time())
+    return _is_locked("register", key)
 
 def register_registration_failure(key: tuple[str, str]) -> int:
     """
@@ -126,21 +262,7 @@ def register_registration_failure(key: tuple[str, str]) -> int:
     Returns:
         int: Número actual de intentos fallidos.
     """
-    now = int(time.time())
-    entry = FAILED_REGISTRATIONS.get(key) or {"count": 0, "blocked_until": 0}
-    last = entry.get("last_failed", 0)
-
-    if last and now - last > LOCKOUT_SECONDS:
-        entry["count"] = 0
-
-    entry["count"] += 1
-    entry["last_failed"] = now
-
-    if entry["count"] >= MAX_FAILED_ATTEMPTS:
-        entry["blocked_until"] = now + LOCKOUT_SECONDS
-
-    FAILED_REGISTRATIONS[key] = entry
-    return entry["count"]
+    return _register_failure("register", key)
 
 def reset_registration_lock(key: tuple[str, str]) -> None:
     """
@@ -149,4 +271,4 @@ def reset_registration_lock(key: tuple[str, str]) -> None:
     Args:
         key (tuple[str, str]): Identificador del intento.
     """
-    FAILED_REGISTRATIONS.pop(key, None)
+    _reset("register", key)
@@ -0,0 +1,27 @@
+"""
+Configuración de gunicorn para producción.
+
+Worker `gthread`: cada proceso atiende GUNICORN_THREADS peticiones a la vez. Con el worker
+sync por defecto (1 proceso, 1 hilo) un solo cliente SSE (/events/stream, hasta
+EVENTS_MAX_STREAM_SEC) bloquea la API entera; con hilos, cada stream ocupa un hilo y el
+resto de peticiones sigue atendiéndose. Los hilos también permiten que el pool de bcrypt
+(auth/password.py) acote el trabajo de CPU sin detener el proceso.
+
+Capacidad aproximada: GUNICORN_WORKERS * GUNICORN_THREADS conexiones simultáneas,
+incluidos los streams abiertos.
+"""
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+worker_class = "gthread"
+workers = int(os.getenv("GUNICORN_WORKERS", "2"))
+threads = int(os.getenv("GUNICORN_THREADS", "32"))
+# Con gthread el latido del worker no depende de la duración de cada petición,
+# así que los streams largos no disparan el timeout
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+accesslog = "-"
+# %(U)s: ruta sin query string (no registrar tickets ni parámetros de búsqueda)
+access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(m)s %(U)s %(H)s" %(s)s %(b)s %(L)s'
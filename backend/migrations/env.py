@@ -65,6 +65,12 @@ try:
         alert,
         log_entry,
         alert_status_history,
+        device_health,
+        sla_rollup,
+        refresh_token,
+        device_snapshot,
+        ai_gate_decision,
+        tenant_version,
     )
 except ImportError as e:
     print(f"[Alembic] Error importando modelos: {e}")
@@ -292,6 +292,7 @@ class GandalfBrain:
         Queries the AI provider.
         """
         from backend.app.core.ai.factory import AIFactory
+        from backend.app.core.ai.base import AIRateLimited
         from backend.app.config import Config
 
         # Use configuration provider if set to specific engine, or override with argument
@@ -321,5 +322,9 @@ class GandalfBrain:
             "If this is a free query, put the answer in 'technical_analysis'."
         )
 
-        response = await ai_provider.analyze(context_str, full_system_prompt)
+        try:
+            response = await ai_provider.analyze(context_str, full_system_prompt)
+        except AIRateLimited as e:
+            wait = f" (retry after {e.retry_after:.0f}s)" if e.retry_after is not None else ""
+            return ai_provider._mock_response(error=f"HTTP 429: rate limited{wait}")
         return response
@@ -1,7 +1,9 @@
 import client from './client'
 
 // GET /api/alerts -> app.routes.alert_routes.list_alerts
+// Una página por llamada: el cursor de la siguiente llega en el header X-Next-Cursor
+// y el total (con include_total) en X-Total-Count.
 export const getAlerts = (params = {}) => client.get('/alerts', { params })
 
 // PATCH /api/alerts/:id/status -> app.routes.noc_routes.update_alert_status
-export const updateAlertStatus = (alertId, body) => client.patch(`/alerts/${alertId}/status`, body)
\ No newline at end of file
+export const updateAlertStatus = (alertId, body) => client.patch(`/alerts/${alertId}/status`, body)
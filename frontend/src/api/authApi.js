@@ -2,4 +2,10 @@
 import client from './client'
 
 // POST /api/auth/login -> app.routes.auth_routes.login
-export const login = (email, password) => client.post('/auth/login', { email, password })
\ No newline at end of file
+export const login = (email, password) => client.post('/auth/login', { email, password })
+
+// POST /api/auth/refresh -> app.routes.auth_routes.refresh (rota el refresh token)
+export const refresh = (refreshToken) => client.post('/auth/refresh', { refresh_token: refreshToken })
+
+// POST /api/auth/logout -> app.routes.auth_routes.logout
+export const logout = (refreshToken) => client.post('/auth/logout', { refresh_token: refreshToken })
@@ -3,6 +3,7 @@
  *
  * Gestiona:
  * - Inyección automática del token de autenticación.
+ * - Renovación transparente del JWT con el refresh token al recibir 401 expirado.
  * - Manejo global de errores (401 Expirado, 402 Pago Requerido, 403 Suspendido).
  */
 import axios from 'axios'
@@ -21,6 +22,55 @@ client.interceptors.request.use((config) => {
   return config
 })
 
+// Renovación de sesión: una sola petición /auth/refresh en vuelo, compartida por
+// todas las solicitudes que fallen con 401 expirado (el refresh token es de un solo uso).
+//
+// Entre pestañas, el refresh se serializa con un Web Lock: la pestaña que espera el lock
+// vuelve a leer localStorage y, si otra ya renovó, adopta ese token en lugar de reenviar
+// el refresh token rotado (el backend lo trataría como reutilización y revocaría la
+// sesión). Sin Web Locks, si el refresh falla se relee localStorage por si otra pestaña
+// lo renovó en paralelo.
+const REFRESH_LOCK = 'mk-monitor-auth-refresh'
+const withRefreshLock = (fn) => (navigator.locks?.request ? navigator.locks.request(REFRESH_LOCK, fn) : fn())
+
+let refreshInFlight = null
+const adoptStoredToken = (staleToken) => {
+  const current = localStorage.getItem('auth_token')
+  if (!current || current === staleToken) return null
+  window.dispatchEvent(new CustomEvent('auth:refreshed', { detail: { token: current } }))
+  return current
+}
+
+const refreshSession = (staleToken) => {
+  if (!refreshInFlight) {
+    refreshInFlight = withRefreshLock(async () => {
+      const adopted = adoptStoredToken(staleToken)
+      if (adopted) return adopted
+      const refreshToken = localStorage.getItem('refresh_token')
+      if (!refreshToken) return null
+      try {
+        const res = await axios.post(`${client.defaults.baseURL}/auth/refresh`, { refresh_token: refreshToken })
+        const { token, refresh_token: nextRefresh } = res.data || {}
+        localStorage.setItem('auth_token', token)
+        localStorage.setItem('refresh_token', nextRefresh)
+        window.dispatchEvent(new CustomEvent('auth:refreshed', { detail: res.data }))
+        return token
+      } catch {
+        const latest = adoptStoredToken(staleToken)
+        if (latest) return latest
+        // Solo se descarta si nadie lo reemplazó mientras tanto
+        if (localStorage.getItem('refresh_token') === refreshToken) {
+          localStorage.removeItem('refresh_token')
+        }
+        return null
+      }
+    }).finally(() => {
+      refreshInFlight = null
+    })
+  }
+  return refreshInFlight
+}
+
 // Helper para evitar rebotes de eventos en errores simultáneos
 let lastHandledKey = null
 const alreadyHandled = (key) => {
@@ -41,7 +91,7 @@ client.interceptors.response.use(
 
     const status = response.status
     const requestUrl = config?.url || ''
-    const isAuthRoute = requestUrl.includes('/auth/login') || requestUrl.includes('/auth/register')
+    const isAuthRoute = /\/auth\/(login|register|refresh|logout)/.test(requestUrl)
     const t = localStorage.getItem('auth_token')
     const authReady = window.__AUTH_READY === true
 
@@ -50,6 +100,16 @@ client.interceptors.response.use(
       const reason = response.data?.reason
       const message = response.data?.message || ''
       if (reason === 'expired' || /token expirado/i.test(message)) {
+        if (!isAuthRoute && !config.__refreshed) {
+          const sent = String(config.headers?.Authorization || '').replace(/^Bearer\s+/, '')
+          const fresh = await refreshSession(sent || t)
+          if (fresh) {
+            config.__refreshed = true
+            config.headers = config.headers || {}
+            config.headers.Authorization = `Bearer ${fresh}`
+            return client(config)
+          }
+        }
         if (!alreadyHandled('401-expired')) {
           window.dispatchEvent(new CustomEvent('auth:expired', { detail: { reason: 'expired' } }))
         }
@@ -0,0 +1,86 @@
+// API de eventos en tiempo real (SSE).
+import client from './client'
+
+// Eventos del stream (EVENT_TYPES y RESYNC_EVENT en app.services.event_bus)
+const EVENT_TYPES = ['alert-created', 'alert-status-changed', 'device-health-changed', 'resync']
+const RECONNECT_MS = 3000
+
+// POST /api/events/ticket -> app.routes.event_routes.stream_ticket
+export const getStreamTicket = () => client.post('/events/ticket')
+
+// Una sola conexión por pestaña, compartida por todos los suscriptores: cada stream
+// abierto retiene un hilo del worker en el backend.
+const listeners = new Set()
+let source = null
+let lastEventId = null
+let retryTimer = null
+let connecting = false
+
+const dispatch = (type, e) => {
+  if (e.lastEventId) lastEventId = e.lastEventId
+  let data = {}
+  try {
+    data = JSON.parse(e.data || '{}')
+  } catch {
+    // Payload vacío o inválido: el tipo basta para refrescar
+  }
+  listeners.forEach((fn) => fn(type, data))
+}
+
+const scheduleReconnect = () => {
+  if (listeners.size && !retryTimer) {
+    retryTimer = setTimeout(() => {
+      retryTimer = null
+      connect()
+    }, RECONNECT_MS)
+  }
+}
+
+const connect = async () => {
+  if (source || connecting || !listeners.size) return
+  connecting = true
+  try {
+    const res = await getStreamTicket()
+    if (!listeners.size) return
+    const params = new URLSearchParams({ ticket: res.data.ticket })
+    if (lastEventId) params.set('last_event_id', lastEventId)
+    source = new EventSource(`${client.defaults.baseURL}/events/stream?${params.toString()}`)
+    EVENT_TYPES.forEach((type) => source.addEventListener(type, (e) => dispatch(type, e)))
+    source.onerror = () => {
+      // El ticket solo vale al conectar: en lugar de la reconexión automática de
+      // EventSource (misma URL, ticket vencido) se pide uno nuevo y se reanuda
+      // desde el último ID recibido.
+      source.close()
+      source = null
+      scheduleReconnect()
+    }
+  } catch {
+    scheduleReconnect()
+  } finally {
+    connecting = false
+  }
+}
+
+/**
+ * Suscribe `onEvent(type, data)` al stream /api/events/stream del tenant.
+ *
+ * Tipos: alert-created, alert-status-changed, device-health-changed y resync (el
+ * buffer del backend descartó eventos: recargar los datos completos).
+ *
+ * @param {Function} onEvent - Callback por evento.
+ * @returns {Function} Cancela la suscripción (cierra el stream con el último suscriptor).
+ */
+export function subscribeEvents(onEvent) {
+  listeners.add(onEvent)
+  connect()
+  return () => {
+    listeners.delete(onEvent)
+    if (!listeners.size) {
+      clearTimeout(retryTimer)
+      retryTimer = null
+      source?.close()
+      source = null
+      lastEventId = null
+    }
+  }
+}
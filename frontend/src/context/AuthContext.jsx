@@ -1,12 +1,12 @@
 import React, { createContext, useCallback, useEffect, useMemo, useState } from 'react'
-import { login as apiLogin } from '../api/authApi.js'
+import { login as apiLogin, logout as apiLogout } from '../api/authApi.js'
 import client from '../api/client.js'
 
 /**
  * Contexto de Autenticación.
  *
  * Gestiona el estado global de la sesión del usuario, incluyendo:
- * - token (JWT)
+ * - token (JWT) y refresh token rotativo (renovado por el cliente HTTP)
  * - role (rol del usuario)
  * - tenantStatus (estado de pago de la cuenta)
  * - authReady (bandera de inicialización)
@@ -25,6 +25,7 @@ export const AuthContext = createContext({
 })
 
 const TOKEN_KEY = 'auth_token'
+const REFRESH_KEY = 'refresh_token'
 // Claves legadas para migración transparente
 const LEGACY_KEYS = ['access_token', 'token']
 
@@ -86,13 +87,14 @@ export function AuthProvider({ children }) {
   const login = useCallback(async (email, password) => {
     try {
         const res = await apiLogin(email, password)
-        const { token: jwt, role: userRole, tenant_status } = res.data || {}
+        const { token: jwt, refresh_token: refreshToken, role: userRole, tenant_status } = res.data || {}
         setToken(jwt || null)
         setRole(userRole || null)
         setTenantStatus(tenant_status || 'activo')
         if (jwt) {
           client.defaults.headers.common.Authorization = `Bearer ${jwt}`
           localStorage.setItem(TOKEN_KEY, jwt)
+          if (refreshToken) localStorage.setItem(REFRESH_KEY, refreshToken)
           window.__AUTH_READY = true
           setAuthReady(true)
           setExpiredSession(false)
@@ -108,6 +110,9 @@ export function AuthProvider({ children }) {
    * Cierra la sesión del usuario y limpia el estado local.
    */
   const logout = useCallback(() => {
+    const refreshToken = localStorage.getItem(REFRESH_KEY)
+    if (refreshToken) apiLogout(refreshToken).catch(() => {})
+    localStorage.removeItem(REFRESH_KEY)
     setToken(null)
     setRole(null)
     setTenantStatus('activo')
@@ -149,6 +154,21 @@ export function AuthProvider({ children }) {
     return () => window.removeEventListener('tenant:status', handleTenantStatus)
   }, [])
 
+  // Listener: Token renovado por el interceptor HTTP (/auth/refresh)
+  useEffect(() => {
+    function handleRefreshed(e) {
+      const { token: jwt, role: userRole, tenant_status } = e.detail || {}
+      if (!jwt) return
+      client.defaults.headers.common.Authorization = `Bearer ${jwt}`
+      setToken(jwt)
+      if (userRole) setRole(userRole)
+      if (tenant_status) setTenantStatus(tenant_status)
+      setExpiredSession(false)
+    }
+    window.addEventListener('auth:refreshed', handleRefreshed)
+    return () => window.removeEventListener('auth:refreshed', handleRefreshed)
+  }, [])
+
   // Listener: Expiración de sesión desde interceptores HTTP
   useEffect(() => {
     function handleExpired() {
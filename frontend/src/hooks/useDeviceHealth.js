@@ -1,12 +1,16 @@
-import { useEffect, useState } from 'react'
+import { useCallback, useEffect, useState } from 'react'
 import client from '../api/client'
 import useAuth from '../hooks/useAuth.js'
+import useEventStream from '../hooks/useEventStream.js'
+
+const HEALTH_EVENTS = ['device-health-changed', 'resync']
 
 /**
  * Hook personalizado para obtener el estado de salud de los dispositivos.
  *
  * Consulta el endpoint /api/health/devices y gestiona los estados de carga y error.
- * Requiere que la autenticación esté lista.
+ * Requiere que la autenticación esté lista. Se refresca al recibir cambios de salud por
+ * el stream SSE (sin polling).
  *
  * @returns {Object} { devices: Array, loading: Boolean, error: Error }
  */
@@ -16,26 +20,30 @@ export default function useDeviceHealth() {
   const [error, setError] = useState(null)
   const { token, authReady } = useAuth()
 
-  useEffect(() => {
-    const load = async () => {
-      // Evitar fetch si la autenticación no está lista
-      if (!authReady || !token) {
-        return
-      }
-      setLoading(true)
-      setError(null)
-      try {
-        const res = await client.get('/health/devices')
-        setDevices(res.data || [])
-      } catch (e) {
-        setError(e)
-      } finally {
-        setLoading(false)
-      }
+  // `silent`: refresco por evento, sin volver al estado de carga
+  const load = useCallback(async ({ silent = false } = {}) => {
+    // Evitar fetch si la autenticación no está lista
+    if (!authReady || !token) {
+      return
+    }
+    if (!silent) setLoading(true)
+    setError(null)
+    try {
+      const res = await client.get('/health/devices')
+      setDevices(res.data || [])
+    } catch (e) {
+      setError(e)
+    } finally {
+      setLoading(false)
     }
-    load()
   }, [authReady, token])
 
+  useEffect(() => {
+    load()
+  }, [load])
+
+  useEventStream(HEALTH_EVENTS, () => load({ silent: true }))
+
   // Considerar cargando mientras se espera la autenticación
   return { devices, loading: loading || (!authReady || !token), error }
 }
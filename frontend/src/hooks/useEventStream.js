@@ -0,0 +1,41 @@
+import { useEffect, useRef } from 'react'
+import { subscribeEvents } from '../api/eventsApi.js'
+import useAuth from '../hooks/useAuth.js'
+
+// Agrupa ráfagas de eventos (ej. cambio masivo de estados) en un solo refresco
+const DEBOUNCE_MS = 500
+
+/**
+ * Hook para reaccionar a eventos del stream SSE del tenant.
+ *
+ * Invoca `onEvent` (con debounce) cuando llega alguno de `types`, en lugar de consultar
+ * periódicamente. Requiere que la autenticación esté lista.
+ *
+ * @param {Array<string>} types - Tipos de evento (ej. ['alert-created', 'resync']).
+ * @param {Function} onEvent - Callback a invocar.
+ */
+export default function useEventStream(types, onEvent) {
+  const { token, authReady } = useAuth()
+  const signedIn = authReady && Boolean(token)
+  const handler = useRef(onEvent)
+  const key = types.join(',')
+
+  useEffect(() => {
+    handler.current = onEvent
+  }, [onEvent])
+
+  useEffect(() => {
+    if (!signedIn) return undefined
+    const wanted = new Set(key.split(','))
+    let timer = null
+    const unsubscribe = subscribeEvents((type) => {
+      if (!wanted.has(type)) return
+      clearTimeout(timer)
+      timer = setTimeout(() => handler.current(), DEBOUNCE_MS)
+    })
+    return () => {
+      clearTimeout(timer)
+      unsubscribe()
+    }
+  }, [signedIn, key])
+}
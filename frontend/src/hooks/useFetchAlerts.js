@@ -1,42 +1,96 @@
 import { useCallback, useEffect, useState } from 'react'
 import { getAlerts } from '../api/alertApi.js'
 import useAuth from '../hooks/useAuth.js'
+import useEventStream from '../hooks/useEventStream.js'
+
+// Tamaño de página por defecto (ALERTS_PAGE_SIZE en el backend)
+const DEFAULT_PAGE_SIZE = 50
+const ALERT_EVENTS = ['alert-created', 'alert-status-changed', 'resync']
 
 /**
  * Hook personalizado para consultar alertas.
  *
  * Permite filtrar alertas, refrescar datos y gestionar estados de carga.
+ * Carga una sola página; `loadMore` pide la siguiente con el cursor X-Next-Cursor.
+ * Se refresca al recibir eventos de alertas por el stream SSE (sin polling).
  *
  * @param {Object} initialFilters - Filtros iniciales (estado, dispositivo, etc.).
- * @returns {Object} { alerts, loading, error, refetch, setFilters }
+ * @param {Object} options - { pageSize, includeTotal, fields } de la consulta.
+ * @returns {Object} { alerts, total, hasMore, loadMore, loadingMore, loading, error, refetch, setFilters }
  */
-export default function useFetchAlerts(initialFilters = {}) {
+export default function useFetchAlerts(initialFilters = {}, options = {}) {
+  const { pageSize = DEFAULT_PAGE_SIZE, includeTotal = false, fields } = options
   const [alerts, setAlerts] = useState([])
   const [filters, setFilters] = useState(initialFilters)
+  const [nextCursor, setNextCursor] = useState(null)
+  const [total, setTotal] = useState(null)
   const [loading, setLoading] = useState(false)
+  const [loadingMore, setLoadingMore] = useState(false)
   const [error, setError] = useState(null)
   const { token, authReady } = useAuth()
 
-  const fetchAlerts = useCallback(async () => {
+  const fetchPage = useCallback((cursor) => getAlerts({
+    ...filters,
+    limit: pageSize,
+    ...(fields ? { fields } : {}),
+    ...(includeTotal ? { include_total: 1 } : {}),
+    ...(cursor ? { cursor } : {}),
+  }), [filters, pageSize, fields, includeTotal])
+
+  const applyHeaders = (res) => {
+    setNextCursor(res.headers?.['x-next-cursor'] || null)
+    const count = res.headers?.['x-total-count']
+    if (count !== undefined) setTotal(Number(count))
+  }
+
+  // `silent`: refresco por evento, sin volver al estado de carga
+  const fetchAlerts = useCallback(async ({ silent = false } = {}) => {
     // Verificación estricta de autenticación
     if (!authReady || !token) {
       return
     }
-    setLoading(true)
+    if (!silent) setLoading(true)
     setError(null)
     try {
-      const res = await getAlerts(filters)
+      const res = await fetchPage(null)
       setAlerts(res.data || [])
+      applyHeaders(res)
     } catch (e) {
       setError(e)
     } finally {
       setLoading(false)
     }
-  }, [filters, authReady, token])
+  }, [fetchPage, authReady, token])
+
+  const loadMore = useCallback(async () => {
+    if (!nextCursor || loadingMore) return
+    setLoadingMore(true)
+    try {
+      const res = await fetchPage(nextCursor)
+      setAlerts(prev => [...prev, ...(res.data || [])])
+      applyHeaders(res)
+    } catch (e) {
+      setError(e)
+    } finally {
+      setLoadingMore(false)
+    }
+  }, [fetchPage, nextCursor, loadingMore])
 
   useEffect(() => {
     fetchAlerts()
   }, [fetchAlerts])
 
-  return { alerts, loading: loading || (!authReady || !token), error, refetch: fetchAlerts, setFilters }
+  useEventStream(ALERT_EVENTS, () => fetchAlerts({ silent: true }))
+
+  return {
+    alerts,
+    total,
+    hasMore: Boolean(nextCursor),
+    loadMore,
+    loadingMore,
+    loading: loading || (!authReady || !token),
+    error,
+    refetch: () => fetchAlerts(),
+    setFilters,
+  }
 }
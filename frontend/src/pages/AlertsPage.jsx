@@ -15,7 +15,7 @@ import Card from '../components/ui/Card.jsx'
 export default function AlertsPage() {
   const { tenantStatus } = useAuth()
   const [filters, setFilters] = useState({ estado: '', device_id: '', status_operativo: '' })
-  const { alerts, loading, error, refetch } = useFetchAlerts(filters)
+  const { alerts, loading, error, refetch, hasMore, loadMore, loadingMore } = useFetchAlerts(filters)
 
   const isSuspended = tenantStatus === 'suspendido'
 
@@ -100,6 +100,12 @@ export default function AlertsPage() {
             isSuspended={isSuspended}
           />
         ))}
+
+        {!loading && hasMore && (
+          <div style={{ textAlign: 'center' }}>
+            <Button onClick={loadMore} variant="secondary" loading={loadingMore}>Cargar más</Button>
+          </div>
+        )}
       </div>
     </div>
   )
@@ -4,6 +4,8 @@ import useDeviceHealth from '../hooks/useDeviceHealth.js'
 import useAuth from '../hooks/useAuth.js'
 import Card from '../components/ui/Card.jsx'
 
+const COUNT_ONLY = { pageSize: 1, includeTotal: true, fields: 'id' }
+
 /**
  * Dashboard Page (Rediseñado)
  *
@@ -12,13 +14,15 @@ import Card from '../components/ui/Card.jsx'
  */
 export default function DashboardPage() {
   const { token, authReady } = useAuth()
-  const { alerts } = useFetchAlerts()
+  // Solo se necesitan los conteos: una fila por consulta y el total en X-Total-Count
+  const { total: alertsTotal } = useFetchAlerts({}, COUNT_ONLY)
+  const { total: criticalTotal } = useFetchAlerts({ estado: 'Alerta Crítica' }, COUNT_ONLY)
   const { devices, loading: loadingHealth } = useDeviceHealth()
   const [slaMin, setSlaMin] = useState(null)
 
   // Métricas Computadas
-  const activeAlerts = alerts.length
-  const criticalAlerts = alerts.filter(a => a.estado === 'Alerta Crítica').length
+  const activeAlerts = alertsTotal ?? 0
+  const criticalAlerts = criticalTotal ?? 0
 
   const globalHealth = useMemo(() => {
     if (!devices.length) return 'unknown'
@@ -16,6 +16,9 @@ import NetworkTopology from '../components/NetworkTopology.jsx'
 // Estilos globales de la página (layout)
 import '../styles/pages/detail.css'
 
+// Alertas por página en la tarjeta de alertas activas
+const ALERTS_PREVIEW = 3
+
 /**
  * Device Detail Page (Rediseñada - Fase 2)
  *
@@ -27,6 +30,8 @@ export default function DeviceDetailPage() {
   const { tenantStatus } = useAuth()
   const [device, setDevice] = useState(null)
   const [alerts, setAlerts] = useState([])
+  const [alertsTotal, setAlertsTotal] = useState(0)
+  const [alertsCursor, setAlertsCursor] = useState(null)
   const [logs, setLogs] = useState([])
   const [limit, setLimit] = useState(10)
   const [fechaInicio, setFechaInicio] = useState('')
@@ -94,8 +99,7 @@ export default function DeviceDetailPage() {
             }
 
             // Cargar Alertas
-            const alertsRes = await getAlerts({ device_id: Number(deviceId) })
-            setAlerts(alertsRes.data || [])
+            await loadAlerts()
 
             // Cargar Logs
             await loadLogs()
@@ -109,6 +113,21 @@ export default function DeviceDetailPage() {
     fetchAll()
   }, [deviceId]) // eslint-disable-line react-hooks/exhaustive-deps
 
+  // Una página de alertas; `cursor` (X-Next-Cursor) agrega la siguiente a la lista
+  const loadAlerts = async (cursor = null) => {
+    const alertsRes = await getAlerts({
+      device_id: Number(deviceId),
+      limit: ALERTS_PREVIEW,
+      include_total: 1,
+      ...(cursor ? { cursor } : {}),
+    })
+    const page = alertsRes.data || []
+    setAlerts(prev => (cursor ? [...prev, ...page] : page))
+    setAlertsCursor(alertsRes.headers?.['x-next-cursor'] || null)
+    const count = alertsRes.headers?.['x-total-count']
+    if (count !== undefined) setAlertsTotal(Number(count))
+  }
+
   const loadLogs = async () => {
     try {
         const params = new URLSearchParams()
@@ -142,8 +161,7 @@ export default function DeviceDetailPage() {
   const handleAction = async (alertId, newStatus) => {
     if (isSuspended) return
     await updateAlertStatus(alertId, { status_operativo: newStatus })
-    const alertsRes = await getAlerts({ device_id: Number(deviceId) })
-    setAlerts(alertsRes.data || [])
+    await loadAlerts()
   }
 
   // Safe accessors
@@ -277,14 +295,17 @@ export default function DeviceDetailPage() {
                      </div>
                 </div>
 
-                <h4 className="body-sm" style={{ fontWeight: 600, marginBottom: '12px' }}>Alertas Activas ({alerts.length})</h4>
+                <h4 className="body-sm" style={{ fontWeight: 600, marginBottom: '12px' }}>Alertas Activas ({alertsTotal})</h4>
                 <div style={{ display: 'flex', flexDirection: 'column', gap: '8px' }}>
-                    {alerts.slice(0, 3).map(a => (
+                    {alerts.map(a => (
                         <div key={a.id} style={{ padding: '8px', background: 'var(--color-bg-secondary)', borderRadius: '6px', fontSize: '12px', borderLeft: '3px solid var(--color-accent-warning)' }}>
                             {a.mensaje}
                         </div>
                     ))}
                     {alerts.length === 0 && <span className="text-muted" style={{ fontSize: '12px' }}>Todo en orden.</span>}
+                    {alertsCursor && (
+                        <Button size="sm" variant="ghost" onClick={() => loadAlerts(alertsCursor)}>Ver más</Button>
+                    )}
                 </div>
             </Card>
 
@@ -1,6 +1,7 @@
 import React from 'react'
 import useFetchAlerts from '../hooks/useFetchAlerts.js'
 import Card from '../components/ui/Card.jsx'
+import Button from '../components/ui/Button.jsx'
 
 /**
  * NocActivityPage (Rediseñada)
@@ -9,7 +10,7 @@ import Card from '../components/ui/Card.jsx'
  * Enfocada en incidentes activos ("En curso") con alta visibilidad.
  */
 export default function NocActivityPage() {
-  const { alerts, loading } = useFetchAlerts({ status_operativo: 'En curso' })
+  const { alerts, loading, hasMore, loadMore, loadingMore } = useFetchAlerts({ status_operativo: 'En curso' })
 
   return (
     <div className="fade-in" style={{ display: 'flex', flexDirection: 'column', gap: '24px' }}>
@@ -60,6 +61,12 @@ export default function NocActivityPage() {
           </Card>
         ))}
       </div>
+
+      {!loading && hasMore && (
+        <div style={{ textAlign: 'center' }}>
+          <Button onClick={loadMore} variant="secondary" loading={loadingMore}>Cargar más</Button>
+        </div>
+      )}
     </div>
   )
 }
@@ -31,6 +31,7 @@ from cli.ui import GandalfUI
 from cli.session import GandalfSession
 from cli.core import async_ping, async_mine_data, GandalfBrain, save_key_to_env, load_or_create_env, async_verify_connection
 from backend.app.config import Config
+from backend.app.core.ai.http import close_session
 
 async def main():
     ui = GandalfUI()
@@ -290,6 +291,9 @@ async def main():
             # traceback.print_exc()
             await asyncio.sleep(2)
 
+    # Liberar las conexiones HTTP reutilizadas con el proveedor de IA
+    await close_session()
+
 if __name__ == "__main__":
     try:
         # Run the async main loop
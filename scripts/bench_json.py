@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark de serialización JSON de respuestas grandes
+-----------------------------------------------------
+Compara el camino anterior (`.isoformat()` por fila + encoder stdlib como `jsonify`)
+con `app.utils.json_response.dumps` (orjson con datetimes nativos, o fallback stdlib)
+para listados de 10k alertas y 10k logs. No requiere base de datos.
+
+Uso:
+    python scripts/bench_json.py [--rows 10000] [--repeat 7]
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from app.utils import json_response  # noqa: E402
+
+INFO_PREFIX = "[INFO]"
+
+
+def _alert_rows(n):
+    base = datetime(2024, 1, 1)
+    return [{
+        "id": i,
+        "device_id": i % 40,
+        "estado": "Alerta Menor",
+        "titulo": f"FCS errors on ether{i % 8}",
+        "descripcion": "Errores de CRC crecientes en la interfaz; revisar cableado y SFP." * 2,
+        "accion_recomendada": "Reemplazar patch cord",
+        "status_operativo": "Pendiente",
+        "comentario_ultimo": None,
+        "occurrence_count": 1 + i % 5,
+        "created_at": base + timedelta(minutes=i),
+        "updated_at": base + timedelta(minutes=i, seconds=30),
+        "last_seen_at": base + timedelta(minutes=i, seconds=45),
+    } for i in range(n)]
+
+
+def _log_rows(n):
+    base = datetime(2024, 1, 1)
+    return [{
+        "id": i,
+        "raw_log": f"pppoe,ppp,info <pppoe-cliente{i}>: authenticated (ñandú)",
+        "log_level": "info",
+        "timestamp_equipo": base + timedelta(seconds=i),
+        "created_at": base + timedelta(seconds=i, microseconds=1234),
+    } for i in range(n)]
+
+
+def _before(rows):
+    """Camino previo: conversión manual de fechas + json stdlib (defaults de jsonify)."""
+    converted = [
+        {k: (v.isoformat() if isinstance(v, datetime) else v) for k, v in row.items()}
+        for row in rows
+    ]
+    return json.dumps(converted, sort_keys=True, ensure_ascii=True, separators=(",", ":")).encode("utf-8")
+
+
+def _after(rows):
+    return json_response.dumps(rows, sort_keys=True)
+
+
+def _measure(fn, rows, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(rows)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de serialización JSON")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+
+    encoder = "orjson" if json_response.HAS_ORJSON else "stdlib (fallback)"
+    print(f"{INFO_PREFIX} encoder={encoder} rows={args.rows} repeat={args.repeat}")
+    for name, rows in (("alerts", _alert_rows(args.rows)), ("logs", _log_rows(args.rows))):
+        assert json.loads(_before(rows)) == json.loads(_after(rows)), "salidas no equivalentes"
+        before = _measure(_before, rows, args.repeat)
+        after = _measure(_after, rows, args.repeat)
+        print(f"{INFO_PREFIX} {name:<6} antes={before:8.2f} ms  después={after:8.2f} ms  x{before / after:5.1f}")
+
+
+if __name__ == "__main__":
+    main()
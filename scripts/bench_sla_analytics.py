@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark de extracción de filas para la analítica de SLA
+--------------------------------------------------------
+Compara el camino anterior (`.all()` -> Row por fila -> `np.array`) con
+`sla_analytics_service._cursor_to_array` (tuplas del cursor DBAPI por tramos) sobre
+una tabla SQLite en memoria con la misma forma que la consulta de MTTA/MTTR
+(device_id, severidad, created, ack, resolved; ack/resolved con NULL). No requiere la
+base de datos de la aplicación.
+
+Uso:
+    python scripts/bench_sla_analytics.py [--rows 500000] [--repeat 5]
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import Column, Float, Integer, MetaData, Table, create_engine, insert, select
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from app.services import sla_analytics_service  # noqa: E402
+
+INFO_PREFIX = "[INFO]"
+
+_metadata = MetaData()
+_rows_table = Table(
+    "bench_sla", _metadata,
+    Column("device_id", Integer),
+    Column("severity", Integer),
+    Column("created", Float),
+    Column("ack", Float),
+    Column("resolved", Float),
+)
+
+
+def _load(conn, n):
+    base = 1_700_000_000.0
+    conn.execute(insert(_rows_table), [{
+        "device_id": i % 400,
+        "severity": i % 4,
+        "created": base + i * 60.0,
+        "ack": base + i * 60.0 + 300.0 if i % 3 else None,
+        "resolved": base + i * 60.0 + 1800.0 if i % 5 else None,
+    } for i in range(n)])
+
+
+def _before(conn, stmt):
+    """Camino previo: Rows de SQLAlchemy materializados con `.all()`."""
+    rows = conn.execute(stmt).all()
+    if not rows:
+        return np.empty((0, 5), dtype=np.float64)
+    return np.array(rows, dtype=np.float64)
+
+
+def _after(conn, stmt):
+    return sla_analytics_service._cursor_to_array(conn.execute(stmt), 5)
+
+
+def _measure(fn, conn, stmt, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(conn, stmt)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de extracción de filas (analítica SLA)")
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    _metadata.create_all(engine)
+    with engine.begin() as conn:
+        _load(conn, args.rows)
+    stmt = select(*_rows_table.c)
+
+    print(f"{INFO_PREFIX} rows={args.rows} repeat={args.repeat} chunk={sla_analytics_service.FETCH_CHUNK}")
+    with engine.connect() as conn:
+        assert np.array_equal(_before(conn, stmt), _after(conn, stmt), equal_nan=True), "salidas no equivalentes"
+        before = _measure(_before, conn, stmt, args.repeat)
+        after = _measure(_after, conn, stmt, args.repeat)
+    print(f"{INFO_PREFIX} antes={before:8.2f} ms  después={after:8.2f} ms  x{before / after:5.1f}")
+
+
+if __name__ == "__main__":
+    main()
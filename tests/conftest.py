@@ -25,6 +25,7 @@ os.environ.setdefault("APP_ENV", "dev")
 os.environ.setdefault("RATELIMIT_ENABLED", "0")  # desactiva rate limiting
 os.environ.setdefault("REDIS_URL", "memory://")
 os.environ.setdefault("JWT_SECRET", "pytest-secret")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")  # costo mínimo: las pruebas no miden bcrypt
 # Clave Fernet válida para cifrado de credenciales (en dev)
 os.environ.setdefault("ENCRYPTION_KEY", Fernet.generate_key().decode())
 
@@ -36,8 +37,9 @@ if not TEST_DB_URL:
     TEST_DB_URL = f"sqlite:///{tmpdb.as_posix()}"
 os.environ["DATABASE_URL"] = TEST_DB_URL
 
-from app.__init__ import create_app  # noqa: E402
+from app.__init__ import create_app, limiter  # noqa: E402
 from app.db import db  # noqa: E402
+from app.utils import response_cache  # noqa: E402
 from app.models.tenant import Tenant  # noqa: E402
 from app.models.user import User  # noqa: E402
 from app.auth.password import hash_password  # noqa: E402
@@ -58,6 +60,8 @@ def app():
     app.config["TESTING"] = True
     # En caso de que el Limiter leyera el flag
     app.config["RATELIMIT_ENABLED"] = False
+    # init_app ya leyó la config: desactivar explícitamente en la instancia global
+    limiter.enabled = False
     return app
 
 
@@ -67,6 +71,8 @@ def _db_clean(app):
     with app.app_context():
         db.drop_all()
         db.create_all()
+        # La caché de respuestas sobrevive al drop/create: vaciarla para no mezclar tests
+        response_cache.clear()
         yield
         db.session.remove()
 
@@ -97,6 +103,9 @@ def admin_user(app, tenant):
         )
         db.session.add(u)
         db.session.commit()
+        # Cargar atributos y desligar de la sesión para usarlos fuera de este contexto
+        db.session.refresh(u)
+        db.session.expunge(u)
         return u
 
 
@@ -111,6 +120,9 @@ def noc_user(app, tenant):
         )
         db.session.add(u)
         db.session.commit()
+        # Cargar atributos y desligar de la sesión para usarlos fuera de este contexto
+        db.session.refresh(u)
+        db.session.expunge(u)
         return u
 
 
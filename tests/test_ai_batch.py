@@ -0,0 +1,91 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from app.config import Config  # noqa: E402
+from app.core.ai.base import BaseAIProvider  # noqa: E402
+from app.services import ai_analysis_service as svc  # noqa: E402
+
+
+def _diagnosis(device_id):
+    return {"status": "WARNING", "summary": f"router {device_id}", "confidence_score": 0.8}
+
+
+class BatchProvider(BaseAIProvider):
+    name = "fake"
+
+    def __init__(self, omit=()):
+        self.omit = set(omit)
+        self.batches = []
+        self.singles = []
+
+    async def analyze(self, context, prompt_template):
+        data = json.loads(context)
+        if "devices" in data:
+            self.batches.append(sorted(data["devices"]))
+            return {"results": {d: _diagnosis(d) for d in data["devices"] if d not in self.omit}}
+        self.singles.append(data["device_id"])
+        return _diagnosis(str(data["device_id"]))
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    monkeypatch.setattr(Config, "AI_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "AI_DISPATCH_ENABLED", False)
+    fake = BatchProvider(omit={"3"})
+    monkeypatch.setattr(svc, "get_ai_provider", lambda: fake)
+    return fake
+
+
+def test_pack_batches_respects_budget_and_size():
+    items = [(i, "x" * 400) for i in range(5)]  # ~101 tokens each
+    assert [len(b) for b in svc.pack_batches(items, token_budget=250, max_devices=10)] == [2, 2, 1]
+    assert [len(b) for b in svc.pack_batches(items, token_budget=10_000, max_devices=3)] == [3, 2]
+    assert [len(b) for b in svc.pack_batches([(1, "x" * 4000)], token_budget=10, max_devices=3)] == [1]
+
+
+def test_batch_results_are_validated_and_omissions_retried(provider, monkeypatch):
+    monkeypatch.setattr(Config, "AI_BATCH_MAX_DEVICES", 4)
+    contexts = [{"device_id": i, "heuristics": []} for i in range(1, 6)]
+    results = asyncio.run(svc.analyze_device_contexts(contexts))
+
+    assert provider.batches == [["1", "2", "3", "4"]]
+    assert sorted(provider.singles) == [3, 5]
+    assert set(results) == {1, 2, 3, 4, 5}
+    assert all(svc.valid_diagnosis(r) for r in results.values())
+    assert not svc.valid_diagnosis({"status": "FINE", "summary": "x", "confidence_score": 1})
+
+
+def test_dispatched_calls_reach_the_app_metrics(provider, monkeypatch):
+    from app import metrics
+
+    monkeypatch.setattr(Config, "AI_DISPATCH_ENABLED", True)
+    before = metrics.snapshot()["ai_dispatch_total"].get("fake:completed", 0)
+    asyncio.run(svc.analyze_device_contexts([{"device_id": 1, "heuristics": []}]))
+    assert metrics.snapshot()["ai_dispatch_total"]["fake:completed"] == before + 1
+
+
+def test_contexts_require_unique_device_ids(provider):
+    with pytest.raises(ValueError):
+        asyncio.run(svc.analyze_device_contexts([{"device_id": 1}, {"device_id": 1}]))
+
+
+def test_concurrent_single_calls_are_batched_without_reserializing(provider, monkeypatch):
+    monkeypatch.setattr(Config, "AI_BATCH_MAX_DEVICES", 8)
+    monkeypatch.setattr(Config, "AI_BATCH_WINDOW_MS", 20)
+    serialized = []
+    original = svc.serialize_context
+    monkeypatch.setattr(svc, "serialize_context", lambda c: serialized.append(c["device_id"]) or original(c))
+
+    async def _cycle():
+        contexts = [{"device_id": i, "heuristics": []} for i in range(1, 5)]
+        return await asyncio.gather(*(svc.analyze_device_context(c) for c in contexts))
+
+    results = asyncio.run(_cycle())
+    assert provider.batches == [["1", "2", "3", "4"]]
+    assert provider.singles == [3]  # omitido en el lote, reintentado solo
+    assert sorted(serialized) == [1, 2, 3, 4]
+    assert [r["summary"] for r in results] == ["router 1", "router 2", "router 3", "router 4"]
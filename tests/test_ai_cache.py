@@ -0,0 +1,100 @@
+import copy
+
+import pytest
+
+from app.config import Config  # noqa: E402
+from app.utils import ai_cache  # noqa: E402
+
+CONTEXT = {
+    "device_id": 7,
+    "timestamp": "2026-01-01T00:00:00",
+    "context": {"uptime": "1d2h", "cpu_load": "31", "free_memory": "1000", "version": "7.14"},
+    "health": {"voltage": "24.1", "temperature": "41"},
+    "interfaces": [
+        {"name": "ether1", "rx_byte": 100, "tx_byte": 200, "rx_fcs_error": 0},
+        {"name": "ether2", "rx_byte": 5, "tx_byte": 6, "rx_fcs_error": 3},
+    ],
+    "logs": [{"time": "10:00", "topics": "system", "message": "login failure"}],
+    "heuristics": [],
+}
+DIAGNOSIS = {"status": "WARNING", "summary": "FCS en ether2", "confidence_score": 0.9}
+
+
+@pytest.fixture
+def disk_cache(tmp_path):
+    backend = ai_cache.DiskAICache(str(tmp_path))
+    ai_cache.reset_backend(backend)
+    yield backend
+    ai_cache.reset_backend()
+
+
+def _key(context):
+    return ai_cache.build_key(context, "v1", "DeepSeekProvider", "deepseek-chat")
+
+
+def test_volatile_fields_do_not_change_the_key():
+    later = copy.deepcopy(CONTEXT)
+    later["timestamp"] = "2026-01-01T00:05:00"
+    later["context"].update(uptime="1d2h5m", cpu_load="38", free_memory="900")
+    later["interfaces"].reverse()
+    later["interfaces"][0]["rx_byte"] = 999
+    later["logs"].append({"time": "10:04", "topics": "system", "message": "login failure"})
+    assert _key(later) == _key(CONTEXT)
+
+    changed = copy.deepcopy(CONTEXT)
+    changed["interfaces"][1]["rx_fcs_error"] = 50
+    assert _key(changed) != _key(CONTEXT)
+    assert ai_cache.build_key(CONTEXT, "v2", "DeepSeekProvider", "deepseek-chat") != _key(CONTEXT)
+
+
+def _sample(minute, fcs, rx_drop, fw_drops, uptime):
+    """Salida de DeviceMiner.mine() tal como llega en ciclos consecutivos."""
+    return {
+        "device_id": 7,
+        "timestamp": f"2026-01-01T10:{minute:02d}:00",
+        "context": {"uptime": uptime, "cpu_load": "12", "free_memory": "81234944", "version": "7.14"},
+        "health": {"voltage": "24.1", "temperature": "38"},
+        "interfaces": [
+            {"name": "ether1", "running": True, "rx_byte": 9_812_331 + minute, "tx_byte": 1_203_442 + minute,
+             "rx_error": 0, "rx_drop": 0, "rx_fcs_error": 0},
+            {"name": "ether2", "running": True, "rx_byte": 51_334 + minute, "tx_byte": 40_120 + minute,
+             "rx_error": fcs, "rx_drop": rx_drop, "rx_fcs_error": fcs},
+        ],
+        "security": {"total_fw_drop_packets": fw_drops, "open_ports": [{"name": "winbox", "port": "8291"}]},
+        "logs": [{"time": f"10:{minute:02d}", "topics": "system,error,critical", "message": "login failure for user admin"}],
+        "heuristics": [
+            f"Interfaz ether2 tiene {fcs} errores FCS. Sugiere daño físico en cable/conector.",
+            f"Interfaz ether2 tiene altos descartes RX ({rx_drop}). Posible congestión o problema de control de flujo.",
+        ],
+    }
+
+
+def test_consecutive_samples_share_a_key():
+    first = _sample(0, fcs=412, rx_drop=151, fw_drops=18_230, uptime="3d4h10m")
+    second = _sample(5, fcs=437, rx_drop=157, fw_drops=18_911, uptime="3d4h15m")
+    assert _key(first) == _key(second)
+
+    # Otra interfaz o un salto de magnitud sí es un cambio de estado
+    assert _key(_sample(5, fcs=4_370, rx_drop=157, fw_drops=18_911, uptime="3d4h15m")) != _key(first)
+    moved = _sample(5, fcs=437, rx_drop=157, fw_drops=18_911, uptime="3d4h15m")
+    moved["heuristics"][0] = moved["heuristics"][0].replace("ether2", "ether3")
+    assert _key(moved) != _key(first)
+
+
+def test_round_trip_skips_fallback_responses(disk_cache):
+    key = _key(CONTEXT)
+    assert ai_cache.get(key) is None
+    assert not ai_cache.put(key, {"status": "WARNING", "summary": "AI Analysis Unavailable", "confidence_score": 0.0})
+    assert ai_cache.put(key, DIAGNOSIS)
+    assert ai_cache.get(key) == DIAGNOSIS
+
+
+def test_disk_backend_is_bounded_and_expires(disk_cache, monkeypatch):
+    monkeypatch.setattr(Config, "AI_CACHE_MAX_ENTRIES", 3)
+    for i in range(6):
+        disk_cache.put(f"k{i}", DIAGNOSIS, ttl=60)
+    assert disk_cache.prune() == 3
+    assert len(list(disk_cache.root.glob("*.json"))) == 3
+
+    disk_cache.put("short", DIAGNOSIS, ttl=-1)
+    assert disk_cache.get("short") is None
@@ -0,0 +1,107 @@
+import asyncio
+
+from app.core.ai.base import AIRateLimited, BaseAIProvider, parse_retry_after
+from app.config import Config
+from app.core.ai.dispatcher import AIDispatcher, AIDispatchExpired, TokenBucket, get_dispatcher, reset_buckets
+
+
+class FakeProvider(BaseAIProvider):
+    name = "fake"
+
+    def __init__(self, rate_limited=0):
+        self.calls = []
+        self.rate_limited = rate_limited
+
+    async def analyze(self, context, prompt_template):
+        self.calls.append(context)
+        if self.rate_limited:
+            self.rate_limited -= 1
+            raise AIRateLimited(self.name, 0.01)
+        await asyncio.sleep(0)
+        return {"summary": context, "confidence_score": 0.9}
+
+
+def _dispatcher(**kw):
+    opts = dict(rpm=0, tpm=0, concurrency=1, max_wait_sec=30, max_retries=2)
+    opts.update(kw)
+    return AIDispatcher("fake", **opts)
+
+
+def test_token_bucket_delay_and_pause():
+    now = [0.0]
+    bucket = TokenBucket(60, clock=lambda: now[0])
+    bucket.consume(60)
+    assert bucket.delay(1) == 1.0
+    assert bucket.delay(1000) == 60.0  # capped at capacity
+    now[0] = 1.0
+    assert bucket.delay(1) == 0.0
+    bucket.pause(5)
+    assert bucket.delay(1) == 5.0
+    assert TokenBucket(0).delay(10 ** 9) == 0.0
+
+
+def test_priority_order_and_coalescing():
+    provider = FakeProvider()
+    dispatcher = _dispatcher()
+
+    async def _run():
+        # The worker picks the first job as soon as the loop yields; the rest queue up
+        first = asyncio.create_task(dispatcher.submit(provider, "d1", "p", priority=2, key=1))
+        await asyncio.sleep(0)
+        normal = asyncio.create_task(dispatcher.submit(provider, "d2-old", "p", priority=2, key=2))
+        critical = asyncio.create_task(dispatcher.submit(provider, "d3", "p", priority=0, key=3))
+        newer = asyncio.create_task(dispatcher.submit(provider, "d2-new", "p", priority=2, key=2))
+        results = await asyncio.gather(first, normal, critical, newer)
+        await dispatcher.shutdown()
+        return results
+
+    results = asyncio.run(_run())
+    assert provider.calls == ["d1", "d3", "d2-new"]
+    assert results[1] is results[3] and results[1]["summary"] == "d2-new"
+
+
+def test_rate_limited_jobs_are_retried_then_expire():
+    async def _run(provider, **kw):
+        dispatcher = _dispatcher(**kw)
+        try:
+            return await dispatcher.submit(provider, "ctx", "p")
+        finally:
+            await dispatcher.shutdown()
+
+    provider = FakeProvider(rate_limited=2)
+    assert asyncio.run(_run(provider))["confidence_score"] == 0.9
+    assert len(provider.calls) == 3
+
+    provider = FakeProvider(rate_limited=5)
+    try:
+        asyncio.run(_run(provider, max_retries=1))
+    except AIDispatchExpired:
+        pass
+    else:
+        raise AssertionError("expected AIDispatchExpired")
+    assert len(provider.calls) == 2
+
+
+def test_budget_and_pause_survive_event_loops(monkeypatch):
+    monkeypatch.setattr(Config, "FAKE_RPM", 1, raising=False)
+    reset_buckets()
+
+    async def _buckets():
+        dispatcher = get_dispatcher("fake")
+        return dispatcher.rpm, dispatcher.tpm
+
+    try:
+        rpm, _ = asyncio.run(_buckets())
+        rpm.consume(1)
+        again, tpm = asyncio.run(_buckets())
+        assert again is rpm and again.delay(1) > 0
+        tpm.pause(30)
+        assert asyncio.run(_buckets())[1].delay(1) > 29
+    finally:
+        reset_buckets()
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("7") == 7.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("garbage") is None
@@ -0,0 +1,31 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from app.config import Config  # noqa: E402
+from app.core.ai import factory, http  # noqa: E402
+
+
+def test_one_session_per_event_loop():
+    async def _twice():
+        first, second = http.get_session(), http.get_session()
+        await http.close_session()
+        return first, second
+
+    first, second = asyncio.run(_twice())
+    assert first is second and first.closed
+    other, _ = asyncio.run(_twice())
+    assert other is not first
+
+
+def test_provider_instances_are_reused(monkeypatch):
+    factory.reset_providers()
+    monkeypatch.setenv("AI_PROVIDER", "deepseek")
+    assert factory.get_ai_provider() is factory.get_ai_provider()
+
+    provider = factory.get_ai_provider()
+    monkeypatch.setattr(Config, "DEEPSEEK_API_KEY", "rotated-key")
+    assert factory.get_ai_provider() is not provider
+    factory.reset_providers()
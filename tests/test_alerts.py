@@ -0,0 +1,232 @@
+from datetime import datetime, timedelta
+
+from app.db import db  # noqa: E402
+from app.models.alert import Alert  # noqa: E402
+from app.models.device import Device  # noqa: E402
+
+
+def _seed_alerts(tenant_id: int, n: int) -> Device:
+    d = Device(
+        tenant_id=tenant_id, name="R1", ip_address="192.0.2.1", port=8728,
+        username_encrypted="u", password_encrypted="p",
+    )
+    db.session.add(d)
+    db.session.flush()
+    base = datetime(2024, 1, 1)
+    for i in range(n):
+        db.session.add(Alert(
+            tenant_id=tenant_id, device_id=d.id, estado="Aviso", titulo=f"alerta {i}",
+            descripcion="d", accion_recomendada="a", status_operativo="Pendiente",
+            created_at=base + timedelta(hours=i),
+        ))
+    db.session.commit()
+    return d
+
+
+def test_alerts_cursor_pagination_covers_all_rows(client, auth_headers, tenant):
+    _seed_alerts(tenant, 7)
+
+    seen = []
+    cursor = None
+    for _ in range(10):
+        params = {"limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        res = client.get("/api/alerts", headers=auth_headers, query_string=params)
+        assert res.status_code == 200
+        seen.extend(a["titulo"] for a in res.get_json())
+        cursor = res.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert seen == [f"alerta {i}" for i in range(6, -1, -1)]
+
+
+def test_alerts_sparse_fields_range_and_total(client, auth_headers, tenant):
+    _seed_alerts(tenant, 5)
+
+    res = client.get("/api/alerts", headers=auth_headers, query_string={
+        "fields": "titulo",
+        "from": "2024-01-01T01:00:00",
+        "to": "2024-01-01T03:00:00",
+        "include_total": "1",
+    })
+    assert res.status_code == 200
+    data = res.get_json()
+    assert [set(a) for a in data] == [{"id", "titulo"}] * 3
+    assert res.headers["X-Total-Count"] == "3"
+    assert "X-Next-Cursor" not in res.headers
+
+
+def test_alerts_rejects_unknown_fields(client, auth_headers, tenant):
+    res = client.get("/api/alerts", headers=auth_headers, query_string={"fields": "password"})
+    assert res.status_code == 400
+
+
+def test_alerts_rejects_unparseable_dates(client, auth_headers, tenant):
+    res = client.get("/api/alerts", headers=auth_headers, query_string={"from": "ayer"})
+    assert res.status_code == 400
+
+
+def test_upsert_alert_deduplicates_open_alerts(tenant):
+    from app.services import alert_service
+
+    d = _seed_alerts(tenant, 0)
+    first_id, created = alert_service.upsert_alert(
+        tenant, d.id, "Alerta Menor", "FCS errors on ether2 (12)", "desc", "cambiar cable")
+    assert created
+    again_id, created_again = alert_service.upsert_alert(
+        tenant, d.id, "Alerta Menor", "fcs errors on  ether2 (57)", "desc", "cambiar cable")
+    db.session.commit()
+    assert again_id == first_id and not created_again
+
+    alert = db.session.get(Alert, first_id)
+    db.session.refresh(alert)
+    assert alert.occurrence_count == 2
+    assert alert.last_seen_at is not None
+
+    # Una vez resuelta, la misma incidencia abre una alerta nueva
+    alert.status_operativo = "Resuelta"
+    db.session.commit()
+    new_id, created_new = alert_service.upsert_alert(
+        tenant, d.id, "Alerta Menor", "FCS errors on ether2 (99)", "desc", "cambiar cable")
+    db.session.commit()
+    assert created_new and new_id != first_id
+
+
+def test_fingerprint_keeps_interface_and_port_numbers():
+    from app.services import alert_service
+
+    fp = alert_service.alert_fingerprint
+    assert fp(1, "FCS errors on ether2 (12)", "Aviso") == fp(1, "FCS errors on ether2 (57)", "Aviso")
+    assert fp(1, "FCS errors on ether2 (12)", "Aviso") != fp(1, "FCS errors on ether5 (12)", "Aviso")
+    assert fp(1, "Servicio inseguro: puerto 22", "Aviso") != fp(1, "Servicio inseguro: puerto 23", "Aviso")
+
+
+def test_bulk_status_update_by_filter_writes_history_and_rollups(client, auth_headers, tenant):
+    from app.models.alert_status_history import AlertStatusHistory
+    from app.models.sla_rollup import SlaRollup
+
+    d = _seed_alerts(tenant, 4)
+    res = client.patch("/api/alerts/status", headers=auth_headers, json={
+        "status_operativo": "Resuelta",
+        "comentario": "mantenimiento",
+        "filter": {"device_id": d.id, "older_than": "2024-01-01T03:00:00"},
+    })
+    assert res.status_code == 200
+    assert res.get_json()["updated"] == 3
+
+    db.session.expire_all()
+    statuses = sorted(a.status_operativo for a in Alert.query.filter_by(tenant_id=tenant))
+    assert statuses == ["Pendiente", "Resuelta", "Resuelta", "Resuelta"]
+    assert AlertStatusHistory.query.count() == 3
+    assert sum(r.resolved_count for r in SlaRollup.query.filter_by(tenant_id=tenant)) == 3
+
+    # Repetir la operación no duplica histórico: ya están resueltas
+    res = client.patch("/api/alerts/status", headers=auth_headers, json={
+        "status_operativo": "Resuelta", "filter": {"device_id": d.id, "older_than": "2024-01-01T03:00:00"},
+    })
+    assert res.get_json()["updated"] == 0
+    assert AlertStatusHistory.query.count() == 3
+
+
+def test_bulk_status_update_requires_ids_or_filter(client, auth_headers, tenant):
+    res = client.patch("/api/alerts/status", headers=auth_headers, json={"status_operativo": "En curso"})
+    assert res.status_code == 400
+    res = client.patch("/api/alerts/status", headers=auth_headers, json={"status_operativo": "En curso", "filter": {}})
+    assert res.status_code == 400
+
+
+def test_alerts_conditional_get_returns_304_until_write(client, auth_headers, tenant):
+    d = _seed_alerts(tenant, 2)
+
+    first = client.get("/api/alerts", headers=auth_headers)
+    etag = first.headers["ETag"]
+    assert etag.startswith('W/"')
+
+    again = client.get("/api/alerts", headers={**auth_headers, "If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.get_data() == b""
+    # Otra URL (otros filtros) tiene su propio ETag
+    other = client.get("/api/alerts?limit=1", headers={**auth_headers, "If-None-Match": etag})
+    assert other.status_code == 200
+
+    alert_id = first.get_json()[0]["id"]
+    client.patch(f"/api/alerts/{alert_id}/status", headers=auth_headers, json={"status_operativo": "En curso"})
+    changed = client.get("/api/alerts", headers={**auth_headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert d.id == changed.get_json()[0]["device_id"]
+
+
+def test_reopen_conflicts_with_open_alert_of_same_fingerprint(client, auth_headers, tenant):
+    from app.services import alert_service
+
+    d = _seed_alerts(tenant, 0)
+    old_id, _ = alert_service.upsert_alert(tenant, d.id, "Alerta Menor", "FCS en ether2", "desc", "cable")
+    db.session.commit()
+    res = client.patch(f"/api/alerts/{old_id}/status", headers=auth_headers, json={"status_operativo": "Resuelta"})
+    assert res.status_code == 200
+    new_id, created = alert_service.upsert_alert(tenant, d.id, "Alerta Menor", "FCS en ether2", "desc", "cable")
+    db.session.commit()
+    assert created
+
+    res = client.patch(f"/api/alerts/{old_id}/status", headers=auth_headers, json={"status_operativo": "Pendiente"})
+    assert res.status_code == 409
+    assert res.get_json()["open_alert_id"] == new_id
+    db.session.expire_all()
+    assert db.session.get(Alert, old_id).status_operativo == "Resuelta"
+
+
+def test_bulk_reopen_reports_fingerprint_conflicts(client, auth_headers, tenant):
+    from app.services import alert_service
+
+    d = _seed_alerts(tenant, 0)
+    ids = []
+    for _ in range(3):
+        alert_id, _ = alert_service.upsert_alert(tenant, d.id, "Alerta Menor", "FCS en ether2", "desc", "cable")
+        db.session.commit()
+        client.patch(f"/api/alerts/{alert_id}/status", headers=auth_headers, json={"status_operativo": "Resuelta"})
+        ids.append(alert_id)
+    open_id, _ = alert_service.upsert_alert(tenant, d.id, "Alerta Menor", "Loop en bridge", "desc", "stp")
+    db.session.commit()
+    client.patch(f"/api/alerts/{open_id}/status", headers=auth_headers, json={"status_operativo": "Resuelta"})
+    twin_id, _ = alert_service.upsert_alert(tenant, d.id, "Alerta Menor", "Loop en bridge", "desc", "stp")
+    db.session.commit()
+
+    res = client.patch("/api/alerts/status", headers=auth_headers, json={
+        "status_operativo": "Pendiente", "ids": ids + [open_id],
+    })
+    assert res.status_code == 200
+    body = res.get_json()
+    # Se reabre solo la más nueva de las tres; la otra huella ya tiene una alerta abierta
+    assert body["ids"] == [ids[-1]]
+    assert body["conflicts"] == sorted(
+        [{"id": ids[0], "open_alert_id": ids[-1]}, {"id": ids[1], "open_alert_id": ids[-1]},
+         {"id": open_id, "open_alert_id": twin_id}],
+        key=lambda c: c["id"],
+    )
+
+
+def test_version_bump_is_the_last_write_of_the_transaction(client, auth_headers, tenant):
+    from sqlalchemy import event
+
+    _seed_alerts(tenant, 1)
+    alert = Alert.query.first()
+    writes = []
+
+    def _capture(conn, cursor, statement, params, context, executemany):
+        if not statement.lstrip().upper().startswith("SELECT"):
+            writes.append(statement.split()[0:3])
+
+    engine = db.engine
+    event.listen(engine, "before_cursor_execute", _capture)
+    try:
+        res = client.patch(f"/api/alerts/{alert.id}/status", headers=auth_headers,
+                           json={"status_operativo": "Resuelta"})
+    finally:
+        event.remove(engine, "before_cursor_execute", _capture)
+
+    assert res.status_code == 200
+    assert "tenant_versions" in " ".join(writes[-1])
+    assert not any("tenants" in w for w in writes)
@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+
+from app.config import Config  # noqa: E402
+from app.models.ai_gate_decision import AIGateDecision  # noqa: E402
+from app.services import change_detection, device_service  # noqa: E402
+
+
+def _data(uptime="1d00:00:00", fcs=0, logs=(), heuristics=(), ports=()):
+    return {
+        "context": {"uptime": uptime},
+        "interfaces": [{"name": "ether1", "rx_fcs_error": fcs, "rx_drop": "0"}],
+        "logs": [{"time": "10:00", "topics": t, "message": m} for t, m in logs],
+        "heuristics": list(heuristics),
+        "security": {"open_ports": [{"name": n, "port": p} for n, p in ports]},
+    }
+
+
+def test_parse_uptime():
+    assert change_detection.parse_uptime("1w2d03:04:05") == 604800 + 2 * 86400 + 3 * 3600 + 4 * 60 + 5
+    assert change_detection.parse_uptime("3h4m5s") == 3 * 3600 + 4 * 60 + 5
+    assert change_detection.parse_uptime(None) is None
+
+
+def test_diff_reports_material_changes_only():
+    prev = change_detection.summarize(_data(heuristics=["Interfaz ether1 tiene 3 errores FCS."]))
+    same = change_detection.summarize(_data(
+        uptime="1d00:05:00", fcs=1,
+        logs=[("system,info", "config changed")],
+        heuristics=["Interfaz ether1 tiene 4 errores FCS."],
+    ))
+    assert change_detection.diff(prev, same, elapsed_sec=300) == []
+
+    changed = change_detection.summarize(_data(
+        uptime="00:01:00", fcs=0,
+        logs=[("system,error,critical", "router rebooted without proper shutdown")],
+        ports=[("telnet", "23")],
+    ))
+    reasons = change_detection.diff(prev, changed, elapsed_sec=300)
+    assert reasons == ["reboot", "new_error_logs:1", "new_open_ports:telnet:23"]
+
+    burst = change_detection.summarize(_data(fcs=500))
+    assert change_detection.diff(prev, burst, elapsed_sec=60) == ["counter_rate:ether1.rx_fcs_error=500.0/min"]
+
+
+def test_reboot_and_error_bursts_bypass_the_ai_cache():
+    assert change_detection.GateDecision(True, ["max_staleness"]).use_cache
+    assert not change_detection.GateDecision(True, ["reboot"]).use_cache
+    assert not change_detection.GateDecision(True, ["counter_rate:ether1.rx_fcs_error=500.0/min"]).use_cache
+    assert not change_detection.GateDecision(True, ["first_snapshot"]).use_cache
+
+
+def test_same_finding_on_another_interface_is_new():
+    prev = change_detection.summarize(_data(heuristics=["Errores FCS en ether2 (12)"]))
+    curr = change_detection.summarize(_data(heuristics=["Errores FCS en ether5 (40)"]))
+    assert change_detection.diff(prev, curr, elapsed_sec=300) == ["new_heuristics:1"]
+
+
+def test_evaluate_gates_and_records_decisions(app, tenant):
+    device = device_service.create_device(tenant, {
+        "name": "r1", "ip_address": "10.0.0.1", "username": "u", "password": "p",
+    })
+    t0 = datetime(2026, 1, 1, 12, 0, 0)
+
+    first = change_detection.evaluate(device, _data(), now=t0)
+    assert first.analyze and first.reasons == ["first_snapshot"]
+    change_detection.record_analysis(device.id, succeeded=True, now=t0)
+
+    quiet = change_detection.evaluate(device, _data(uptime="1d00:05:00"), now=t0 + timedelta(minutes=5))
+    assert not quiet.analyze and quiet.reasons == ["no_material_change"]
+
+    stale_at = t0 + timedelta(seconds=Config.AI_GATE_MAX_STALENESS_SEC)
+    stale = change_detection.evaluate(device, _data(uptime="1d06:00:00"), now=stale_at)
+    assert stale.analyze and stale.reasons == ["max_staleness"]
+    assert stale.use_cache
+
+    # Análisis fallido: el siguiente ciclo reintenta aunque no haya cambios
+    change_detection.record_analysis(device.id, succeeded=False)
+    retry = change_detection.evaluate(device, _data(uptime="1d06:05:00"), now=stale_at + timedelta(minutes=5))
+    assert retry.reasons == ["retry_pending"]
+
+    rows = AIGateDecision.query.filter_by(device_id=device.id).order_by(AIGateDecision.id).all()
+    assert [r.analyze for r in rows] == [True, False, True, True]
@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+from app.utils import context_compaction  # noqa: E402
+
+
+def _context(interfaces=12, logs=30, neighbors=40):
+    return {
+        "device_id": 9,
+        "timestamp": "2026-01-01T00:00:00",
+        "context": {"uptime": "1d", "cpu_load": 20, "version": "7.14", "board_name": None},
+        "health": {},
+        "interfaces": [
+            {"name": f"ether{i}", "running": True, "rx_byte": 10, "rx_fcs_error": i * 3 if i in (4, 7) else 0,
+             "speed": None, "auto_negotiation": ""}
+            for i in range(interfaces)
+        ],
+        "layer3": {"neighbors": [{"ip": f"10.0.0.{i}", "identity": None} for i in range(neighbors)]},
+        "wireless": [],
+        "logs": [{"time": f"10:{i:02d}", "topics": "system,info", "message": "login failure for user admin"} for i in range(logs)]
+        + [{"time": "11:00", "topics": "system,error", "message": "x" * 1000}],
+        "heuristics": ["Errores FCS en ether7"],
+    }
+
+
+def test_compact_drops_empties_and_keeps_worst_interfaces():
+    data = context_compaction.compact(_context(), top_interfaces=2, max_logs=50, log_chars=100, max_items=5)
+
+    assert [i["name"] for i in data["interfaces"]] == ["ether7", "ether4"]
+    assert "health" not in data and "wireless" not in data
+    assert "board_name" not in data["context"]
+    assert "speed" not in data["interfaces"][0]
+    assert data["omitted"] == {"interfaces": 10, "neighbors": 35}
+    info, error = data["logs"]
+    assert info["repeat"] == 30 and info["time"] == "10:29"
+    assert len(error["message"]) == 101
+
+
+def test_log_cap_prefers_errors():
+    context = _context(logs=0)
+    context["logs"] = [{"topics": "info", "message": f"m{i}"} for i in range(10)] + [{"topics": "system,error", "message": "boom"}]
+    data = context_compaction.compact(context, top_interfaces=1, max_logs=3, log_chars=50, max_items=1)
+    assert [log["message"] for log in data["logs"]] == ["m8", "m9", "boom"]
+
+
+def test_compact_to_budget_shrinks_until_it_fits():
+    context = _context(interfaces=60, logs=0, neighbors=300)
+    result = context_compaction.compact_to_budget(context, token_budget=400)
+
+    assert result.tokens_after <= 400 < result.tokens_before
+    data = json.loads(result.text)
+    assert data["heuristics"] == ["Errores FCS en ether7"]
+    assert data["interfaces"][0]["name"] == "ether7"
+
+
+
+def test_compact_to_budget_truncates_logs_and_interfaces_or_fails():
+    context = _context(interfaces=60, logs=0, neighbors=300)
+    context["logs"] = [{"topics": "info", "message": f"{i}-" + "y" * 300} for i in range(40)]
+    context["logs"].append({"topics": "system,error", "message": "boom"})
+    skeleton = context_compaction.estimate_tokens(context_compaction._serialize(context_compaction.compact(
+        dict(context, logs=[], interfaces=[]), 1, 1, 1, 1, drop_sections=context_compaction.OPTIONAL_SECTIONS)))
+
+    result = context_compaction.compact_to_budget(context, token_budget=skeleton + 60)
+    assert result.tokens_after <= skeleton + 60
+    data = json.loads(result.text)
+    assert "layer3" not in data
+    assert data["logs"][-1]["message"] == "boom"
+    assert data["omitted"]["logs"] >= 1
+
+    with pytest.raises(context_compaction.ContextOverBudget):
+        context_compaction.compact_to_budget(context, token_budget=5)
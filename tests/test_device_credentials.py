@@ -0,0 +1,71 @@
+import pytest
+from cryptography.fernet import Fernet
+
+from app.config import Config  # noqa: E402
+from app.db import db  # noqa: E402
+from app.services import device_service  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def _clear_credentials():
+    device_service.invalidate_device_credentials()
+    yield
+    device_service.invalidate_device_credentials()
+
+
+def _device(tenant):
+    return device_service.create_device(tenant, {
+        "name": "r1", "ip_address": "10.0.0.1", "port": 8728, "username": "admin", "password": "s3cret",
+    })
+
+
+def test_cipher_is_built_once(app):
+    assert device_service._get_fernet() is device_service._get_fernet()
+
+
+def test_old_key_still_decrypts_after_rotation(app, tenant, monkeypatch):
+    device = _device(tenant)
+    old_key = Config.ENCRYPTION_KEY
+    monkeypatch.setattr(Config, "ENCRYPTION_KEY", Fernet.generate_key().decode())
+    monkeypatch.setattr(Config, "ENCRYPTION_KEYS_OLD", old_key)
+
+    assert device_service.decrypt_secret(device.password_encrypted) == "s3cret"
+    assert device_service.rotate_device_credentials() == (1, [])
+
+    monkeypatch.setattr(Config, "ENCRYPTION_KEYS_OLD", "")
+    db.session.expire_all()
+    refreshed = db.session.get(type(device), device.id)
+    assert device_service.decrypt_secret(refreshed.password_encrypted) == "s3cret"
+
+
+def test_rotation_reports_undecryptable_devices_and_continues(app, tenant):
+    good = _device(tenant)
+    bad = device_service.create_device(tenant, {
+        "name": "r2", "ip_address": "10.0.0.2", "port": 8728, "username": "admin", "password": "x",
+    })
+    bad.password_encrypted = Fernet(Fernet.generate_key()).encrypt(b"x").decode()
+    db.session.commit()
+
+    assert device_service.rotate_device_credentials(batch_size=1) == (1, [bad.id])
+    db.session.expire_all()
+    assert device_service.decrypt_secret(db.session.get(type(good), good.id).password_encrypted) == "s3cret"
+
+
+def test_credentials_are_cached_until_device_changes(app, tenant, monkeypatch):
+    device = _device(tenant)
+    assert device_service.get_device_credentials(device) == ("admin", "s3cret")
+
+    calls = []
+    real_decrypt = device_service.decrypt_secret
+    monkeypatch.setattr(device_service, "decrypt_secret", lambda ct: calls.append(ct) or real_decrypt(ct))
+    assert device_service.get_device_credentials(device) == ("admin", "s3cret")
+    assert calls == []
+
+    # Credenciales nuevas: el digest no coincide y se vuelve a descifrar
+    device.password_encrypted = device_service.encrypt_secret("otra")
+    db.session.commit()
+    assert device_service.get_device_credentials(device) == ("admin", "otra")
+    assert len(calls) == 2
+
+    assert device_service.delete_device(tenant, device.id)
+    assert device.id not in device_service._credentials
@@ -0,0 +1,105 @@
+import pytest
+
+from app.config import Config  # noqa: E402
+from app.db import db  # noqa: E402
+from app.models.alert import Alert  # noqa: E402
+from app.models.device import Device  # noqa: E402
+from app.services import event_bus  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def memory_bus(monkeypatch):
+    monkeypatch.setattr(Config, "EVENTS_BACKEND", "memory", raising=False)
+    monkeypatch.setattr(Config, "EVENTS_HEARTBEAT_SEC", 1, raising=False)
+    monkeypatch.setattr(Config, "EVENTS_MAX_STREAM_SEC", 1, raising=False)
+    event_bus.reset_backend()
+    yield
+    event_bus.reset_backend()
+
+
+def _device_with_alert(tenant_id: int) -> Alert:
+    d = Device(
+        tenant_id=tenant_id, name="R1", ip_address="192.0.2.1", port=8728,
+        username_encrypted="u", password_encrypted="p",
+    )
+    db.session.add(d)
+    db.session.flush()
+    a = Alert(
+        tenant_id=tenant_id, device_id=d.id, estado="Alerta Severa", titulo="caída",
+        descripcion="d", accion_recomendada="a", status_operativo="Pendiente",
+    )
+    db.session.add(a)
+    db.session.commit()
+    return a
+
+
+def test_events_are_published_only_after_commit(tenant):
+    db.session.execute(db.select(Alert.id))  # transacción abierta, como en los servicios
+    event_bus.publish_after_commit(tenant, "alert-created", {"id": 1})
+    db.session.rollback()
+    db.session.execute(db.select(Alert.id))
+    event_bus.publish_after_commit(tenant, "alert-created", {"id": 2})
+    db.session.commit()
+
+    events, gap, _cursor = event_bus.read(tenant, "0", timeout=0)
+    assert [(t, d["id"]) for _id, t, d in events] == [("alert-created", 2)]
+    assert not gap
+
+
+def test_stream_resumes_from_last_event_id(client, auth_headers, tenant):
+    alert = _device_with_alert(tenant)
+    client.patch(f"/api/alerts/{alert.id}/status", headers=auth_headers, json={"status_operativo": "En curso"})
+    client.patch(f"/api/alerts/{alert.id}/status", headers=auth_headers, json={"status_operativo": "Resuelta"})
+
+    events, _gap, _cursor = event_bus.read(tenant, "0", timeout=0)
+    types = [t for _id, t, _d in events]
+    assert types == [
+        "alert-status-changed", "device-health-changed",  # Pendiente -> En curso (salud pasa a rojo)
+        "alert-status-changed", "device-health-changed",  # En curso -> Resuelta (vuelve a verde)
+    ]
+    assert events[3][2] == {"device_id": alert.device_id, "health_status": "verde", "previous_health_status": "rojo"}
+
+    res = client.get("/api/events/stream", headers={**auth_headers, "Last-Event-ID": events[1][0]})
+    body = res.get_data(as_text=True)
+    assert res.mimetype == "text/event-stream"
+    assert f"id: {events[1][0]}\n" not in body
+    assert f"id: {events[2][0]}\nevent: alert-status-changed" in body
+    assert f"id: {events[3][0]}\nevent: device-health-changed" in body
+
+
+def test_stream_signals_resync_when_buffer_overflowed(client, auth_headers, tenant, monkeypatch):
+    monkeypatch.setattr(Config, "EVENTS_STREAM_MAXLEN", 2, raising=False)
+    event_bus.reset_backend()
+    for i in range(5):
+        event_bus.publish(tenant, "alert-created", {"id": i})
+
+    res = client.get("/api/events/stream", headers={**auth_headers, "Last-Event-ID": "1"})
+    assert "event: resync" in res.get_data(as_text=True)
+
+
+def test_other_tenants_events_do_not_trigger_resync(tenant, monkeypatch):
+    monkeypatch.setattr(Config, "EVENTS_STREAM_MAXLEN", 2, raising=False)
+    event_bus.reset_backend()
+    other = tenant + 1000
+    seen = event_bus.publish(tenant, "alert-created", {"id": 1})
+    for i in (2, 3):
+        event_bus.publish(other, "alert-created", {"id": i})
+        event_bus.publish(tenant, "alert-created", {"id": i})
+
+    # El buffer descartó el evento 1 (ya recibido), pero no falta ninguno posterior
+    events, gap, _cursor = event_bus.read(tenant, seen, timeout=0)
+    assert [d["id"] for _id, _t, d in events] == [2, 3]
+    assert not gap
+
+
+def test_stream_accepts_tickets_but_not_session_tokens_in_url(client, auth_headers, tenant):
+    token = auth_headers["Authorization"].split(" ", 1)[1]
+    assert client.get(f"/api/events/stream?access_token={token}").status_code == 401
+    assert client.get(f"/api/events/stream?ticket={token}").status_code == 401
+
+    ticket = client.post("/api/events/ticket", headers=auth_headers).get_json()["ticket"]
+    res = client.get(f"/api/events/stream?ticket={ticket}")
+    assert res.status_code == 200 and res.mimetype == "text/event-stream"
+
+    # El ticket no sirve como credencial general
+    assert client.get("/api/alerts", headers={"Authorization": f"Bearer {ticket}"}).status_code == 401
@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.config import Config  # noqa: E402
+from app.utils import export_cache  # noqa: E402
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "EXPORT_CACHE_DIR", str(tmp_path), raising=False)
+    monkeypatch.setattr(Config, "EXPORT_CACHE_ENABLED", True, raising=False)
+    return tmp_path
+
+
+def test_put_and_get_roundtrip(cache_dir):
+    start = datetime(2024, 1, 1)
+    end = datetime(2024, 1, 2)
+    key = export_cache.build_key(1, 7, start, end, "PPPoE", "pdf")
+    assert export_cache.get(key) is None
+
+    export_cache.put(key, b"%PDF-fake", start, end)
+    assert export_cache.get(key) == b"%PDF-fake"
+    # La búsqueda se normaliza (case-insensitive)
+    assert export_cache.build_key(1, 7, start, end, "pppoe", "pdf") == key
+
+
+def test_invalidate_only_overlapping_ranges(cache_dir):
+    day1 = (datetime(2024, 1, 1), datetime(2024, 1, 2))
+    day3 = (datetime(2024, 1, 3), datetime(2024, 1, 4))
+    k1 = export_cache.build_key(1, 7, *day1, "", "csv")
+    k3 = export_cache.build_key(1, 7, *day3, "", "csv")
+    k_open = export_cache.build_key(1, 7, day1[0], None, "", "csv")
+    export_cache.put(k1, b"a", *day1)
+    export_cache.put(k3, b"b", *day3)
+    export_cache.put(k_open, b"c", day1[0], None)
+
+    removed = export_cache.invalidate_range(1, 7, datetime(2024, 1, 3, 12), datetime(2024, 1, 3, 13))
+
+    assert removed == 2
+    assert export_cache.get(k1) == b"a"
+    assert export_cache.get(k3) is None
+    assert export_cache.get(k_open) is None
+
+
+def test_eviction_respects_size_budget(cache_dir, monkeypatch):
+    monkeypatch.setattr(Config, "EXPORT_CACHE_MAX_MB", 1, raising=False)
+    chunk = b"x" * (400 * 1024)
+    base = datetime(2024, 1, 1)
+    keys = []
+    for i in range(4):
+        start = base + timedelta(days=i)
+        key = export_cache.build_key(1, 7, start, start + timedelta(days=1), "", "pdf")
+        export_cache.put(key, chunk, start, start + timedelta(days=1))
+        keys.append(key)
+
+    total = sum(p.stat().st_size for p in cache_dir.glob("*.bin"))
+    assert total <= 1024 * 1024
+    # La entrada más reciente siempre sobrevive
+    assert export_cache.get(keys[-1]) == chunk
+
+
+def test_put_is_skipped_when_generation_changed(cache_dir):
+    start, end = datetime(2024, 1, 1), datetime(2024, 1, 2)
+    key = export_cache.build_key(1, 7, start, end, "", "pdf")
+    seen = export_cache.generation(1, 7)
+    # Logs confirmados e invalidados mientras la exportación consultaba la base
+    export_cache.invalidate_range(1, 7, start, start)
+    export_cache.put(key, b"%PDF-stale", start, end, 1, 7, seen)
+    assert export_cache.get(key) is None
+
+    export_cache.put(key, b"%PDF-fresh", start, end, 1, 7, export_cache.generation(1, 7))
+    assert export_cache.get(key) == b"%PDF-fresh"
+
+
+def test_cached_export_requires_device_ownership(cache_dir, client, auth_headers, tenant):
+    from app.db import db
+    from app.models.device import Device
+
+    d = Device(
+        tenant_id=tenant, name="R1", ip_address="192.0.2.1", port=8728,
+        username_encrypted="u", password_encrypted="p",
+    )
+    db.session.add(d)
+    db.session.commit()
+    key = export_cache.build_key(tenant, d.id, None, None, "", "pdf", "formato")
+    export_cache.put(key, b"%PDF-cached", None, None)
+
+    res = client.get(f"/api/devices/{d.id}/logs?formato=pdf", headers=auth_headers)
+    assert res.status_code == 200 and res.data == b"%PDF-cached"
+
+    # Dado de baja (soft delete): sus logs siguen consultables, como antes
+    d.is_active = False
+    db.session.commit()
+    assert client.get(f"/api/devices/{d.id}/logs", headers=auth_headers).status_code == 200
+
+    db.session.delete(d)
+    db.session.commit()
+    res = client.get(f"/api/devices/{d.id}/logs?formato=pdf", headers=auth_headers)
+    assert res.status_code == 404
@@ -63,3 +63,71 @@ def test_health_devices_with_one(client, auth_headers, tenant):
     assert entry["device_id"] == d.id
     assert entry["name"] == "Router Principal"
     assert entry["health_status"] in {"verde", "amarillo", "rojo"}
+
+
+def _make_device(tenant_id: int, name: str) -> Device:
+    enc_key = os.environ["ENCRYPTION_KEY"]
+    d = Device(
+        tenant_id=tenant_id,
+        name=name,
+        ip_address="192.0.2.10",
+        port=8728,
+        username_encrypted=_encrypt("admin", enc_key),
+        password_encrypted=_encrypt("password123", enc_key),
+    )
+    db.session.add(d)
+    db.session.flush()
+    return d
+
+
+def test_health_devices_batched_colors(client, auth_headers, tenant):
+    from app.models.alert import Alert
+
+    rojo = _make_device(tenant, "R1")
+    amarillo = _make_device(tenant, "R2")
+    verde = _make_device(tenant, "R3")
+
+    def _alert(device, estado, status="Pendiente"):
+        db.session.add(Alert(
+            tenant_id=tenant, device_id=device.id, estado=estado, titulo="t",
+            descripcion="d", accion_recomendada="a", status_operativo=status,
+        ))
+
+    _alert(rojo, "Alerta Crítica")
+    _alert(rojo, "Alerta Menor")
+    _alert(amarillo, "Alerta Menor")
+    _alert(verde, "Alerta Severa", status="Resuelta")
+    db.session.commit()
+    # Alertas insertadas sin pasar por el servicio: el reconciliador repara la vista
+    from app.services import alert_service
+    assert alert_service.reconcile_device_health(tenant) == 3
+
+    res = client.get("/api/health/devices", headers=auth_headers)
+    assert res.status_code == 200
+    by_id = {e["device_id"]: e["health_status"] for e in res.get_json()}
+    assert by_id == {rojo.id: "rojo", amarillo.id: "amarillo", verde.id: "verde"}
+
+
+def test_update_alert_status_refreshes_materialized_health(client, auth_headers, tenant, admin_user):
+    from app.models.alert import Alert
+    from app.models.device_health import DeviceHealth
+    from app.services import alert_service
+
+    d = _make_device(tenant, "R1")
+    a = Alert(
+        tenant_id=tenant, device_id=d.id, estado="Alerta Severa", titulo="t",
+        descripcion="d", accion_recomendada="a", status_operativo="Pendiente",
+    )
+    db.session.add(a)
+    db.session.commit()
+    alert_service.reconcile_device_health(tenant)
+    assert db.session.get(DeviceHealth, d.id).health_status == "rojo"
+
+    res = client.patch(
+        f"/api/alerts/{a.id}/status",
+        json={"status_operativo": "Resuelta"},
+        headers=auth_headers,
+    )
+    assert res.status_code == 200
+    db.session.expire_all()
+    assert db.session.get(DeviceHealth, d.id).health_status == "verde"
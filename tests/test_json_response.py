@@ -0,0 +1,27 @@
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from app.utils import json_response  # noqa: E402
+
+
+def test_dumps_matches_isoformat_for_datetimes():
+    naive = datetime(2024, 1, 2, 3, 4, 5, 678000)
+    aware = datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+    out = json.loads(json_response.dumps({"a": naive, "b": aware, "c": Decimal("1.5"), "d": "ñ"}))
+    assert out == {"a": naive.isoformat(), "b": aware.isoformat(), "c": 1.5, "d": "ñ"}
+
+
+def test_stdlib_fallback_produces_same_document(monkeypatch):
+    payload = [{"id": 1, "created_at": datetime(2024, 1, 1), "n": None}]
+    fast = json_response.dumps(payload)
+    monkeypatch.setattr(json_response, "orjson", None)
+    assert json.loads(json_response.dumps(payload)) == json.loads(fast)
+
+
+def test_jsonify_uses_iso_dates(app):
+    from flask import jsonify
+
+    with app.test_request_context():
+        body = jsonify({"ts": datetime(2024, 5, 1, 12, 0)}).get_json()
+    assert body == {"ts": "2024-05-01T12:00:00"}
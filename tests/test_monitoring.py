@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from app.db import db  # noqa: E402
+from app.models.alert import Alert  # noqa: E402
+from app.models.device_snapshot import DeviceSnapshot  # noqa: E402
+from app.services import device_service, monitoring_service  # noqa: E402
+
+UNAVAILABLE = {"status": "WARNING", "summary": "AI Analysis Unavailable", "confidence_score": 0.0, "fallback": True}
+
+
+def _run_cycle(monkeypatch, device, heuristics, result):
+    class Miner:
+        def __init__(self, _device):
+            pass
+
+        def mine(self):
+            return {"device_id": device.id, "context": {"uptime": "1d"}, "logs": [], "heuristics": heuristics}
+
+    async def _analyze(_data, use_cache=True):
+        return result
+
+    monkeypatch.setattr(monitoring_service, "DeviceMiner", Miner)
+    monkeypatch.setattr(monitoring_service, "analyze_device_context", _analyze)
+    asyncio.run(monitoring_service.analyze_and_generate_alerts(device))
+
+
+def test_ai_outage_only_alerts_on_critical_local_findings(app, tenant, monkeypatch):
+    device = device_service.create_device(tenant, {
+        "name": "r1", "ip_address": "10.0.0.1", "username": "u", "password": "p",
+    })
+
+    _run_cycle(monkeypatch, device, ["Servicio inseguro activo: telnet puerto 23."], UNAVAILABLE)
+    assert Alert.query.count() == 0
+    assert db.session.get(DeviceSnapshot, device.id).pending_analysis
+
+    _run_cycle(monkeypatch, device, ["Uso de CPU crítico (>90%)."], UNAVAILABLE)
+    alert = Alert.query.one()
+    assert alert.estado == "Alerta Crítica"
+    assert "heurística local" in alert.comentario_ultimo
+
+
+def test_diagnosis_without_confidence_is_not_a_fallback(app, tenant, monkeypatch):
+    device = device_service.create_device(tenant, {
+        "name": "r1", "ip_address": "10.0.0.1", "username": "u", "password": "p",
+    })
+    _run_cycle(monkeypatch, device, [], {"status": "WARNING", "summary": "FCS en ether2", "technical_analysis": "cable"})
+
+    assert Alert.query.one().estado == "Alerta Menor"
+    assert not db.session.get(DeviceSnapshot, device.id).pending_analysis
@@ -0,0 +1,31 @@
+import threading
+
+from app.auth import password  # noqa: E402
+from app.db import db  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+
+def test_login_returns_503_when_bcrypt_pool_is_saturated(client, admin_user, monkeypatch):
+    executor, _slots = password._pool()
+    full = threading.BoundedSemaphore(1)
+    full.acquire()
+    monkeypatch.setattr(password, "_pool", lambda: (executor, full))
+
+    res = client.post("/api/auth/login", json={"email": "admin@example.com", "password": "secret123"})
+    assert res.status_code == 503
+    assert res.headers["Retry-After"] == "1"
+
+
+def test_login_rehashes_when_cost_changes(client, admin_user):
+    user = db.session.get(User, admin_user.id)
+    user.password_hash = password._hash("secret123", 5)
+    db.session.commit()
+    assert password.needs_rehash(user.password_hash)
+
+    res = client.post("/api/auth/login", json={"email": "admin@example.com", "password": "secret123"})
+    assert res.status_code == 200
+
+    db.session.expire_all()
+    new_hash = db.session.get(User, admin_user.id).password_hash
+    assert not password.needs_rehash(new_hash)
+    assert password.verify_password("secret123", new_hash)
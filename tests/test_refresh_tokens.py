@@ -0,0 +1,52 @@
+from app.auth import password  # noqa: E402
+
+
+def _login(client):
+    res = client.post("/api/auth/login", json={"email": "admin@example.com", "password": "secret123"})
+    assert res.status_code == 200
+    return res.get_json()
+
+
+def test_refresh_rotates_without_password_check(client, admin_user, monkeypatch):
+    session = _login(client)
+    assert session["refresh_token"] and session["expires_in"] > 0
+
+    def _no_bcrypt(*_args):
+        raise AssertionError("refresh no debe usar bcrypt")
+
+    monkeypatch.setattr(password, "_run", _no_bcrypt)
+    res = client.post("/api/auth/refresh", json={"refresh_token": session["refresh_token"]})
+    assert res.status_code == 200
+    body = res.get_json()
+    assert body["refresh_token"] != session["refresh_token"]
+    assert body["role"] == "admin"
+
+    me = client.get("/api/auth/me", headers={"Authorization": f"Bearer {body['token']}"})
+    assert me.status_code == 200
+
+    # El nuevo token sigue sirviendo para la siguiente rotación
+    res = client.post("/api/auth/refresh", json={"refresh_token": body["refresh_token"]})
+    assert res.status_code == 200
+
+
+def test_reused_refresh_token_revokes_session(client, admin_user):
+    session = _login(client)
+    first = client.post("/api/auth/refresh", json={"refresh_token": session["refresh_token"]}).get_json()
+
+    replay = client.post("/api/auth/refresh", json={"refresh_token": session["refresh_token"]})
+    assert replay.status_code == 401
+    assert replay.get_json()["error"] == "session_revoked"
+
+    # La rotación legítima también quedó revocada
+    res = client.post("/api/auth/refresh", json={"refresh_token": first["refresh_token"]})
+    assert res.status_code == 401
+
+
+def test_logout_revokes_refresh_token(client, admin_user):
+    session = _login(client)
+    res = client.post("/api/auth/logout", json={"refresh_token": session["refresh_token"]})
+    assert res.status_code == 200
+
+    res = client.post("/api/auth/refresh", json={"refresh_token": session["refresh_token"]})
+    assert res.status_code == 401
+    assert res.get_json()["error"] == "invalid_refresh_token"
@@ -0,0 +1,59 @@
+from app import metrics  # noqa: E402
+from app.db import db  # noqa: E402
+from app.services import device_service  # noqa: E402
+from app.utils import response_cache  # noqa: E402
+
+
+def test_get_or_load_serves_local_hits():
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return {"n": len(calls)}
+
+    assert response_cache.get_or_load(response_cache.SLA, 99, loader, key="k") == {"n": 1}
+    assert response_cache.get_or_load(response_cache.SLA, 99, loader, key="k") == {"n": 1}
+    assert len(calls) == 1
+    assert metrics.snapshot()["cache_lookups_total"]["sla:local:hit"] >= 1
+
+
+def test_invalidation_waits_for_commit():
+    response_cache.get_or_load(response_cache.DEVICES, 7, lambda: ["viejo"])
+
+    db.session.execute(db.text("SELECT 1"))
+    response_cache.invalidate_after_commit(7, [response_cache.DEVICES])
+    db.session.rollback()
+    assert response_cache.get_or_load(response_cache.DEVICES, 7, lambda: ["nuevo"]) == ["viejo"]
+
+    db.session.execute(db.text("SELECT 1"))
+    response_cache.invalidate_after_commit(7, [response_cache.DEVICES])
+    db.session.commit()
+    assert response_cache.get_or_load(response_cache.DEVICES, 7, lambda: ["nuevo"]) == ["nuevo"]
+
+
+def test_device_writes_invalidate_cached_listing(client, auth_headers, tenant):
+    assert client.get("/api/devices", headers=auth_headers).get_json() == []
+
+    device_service.create_device(tenant, {
+        "name": "R1", "ip_address": "192.0.2.1", "port": 8728, "username": "u", "password": "p",
+    })
+    listed = client.get("/api/devices", headers=auth_headers).get_json()
+    assert [d["name"] for d in listed] == ["R1"]
+    assert listed[0]["health_status"] == "verde"
+    assert "password_encrypted" not in listed[0]
+
+    res = client.get("/api/subscription/status", headers=auth_headers)
+    assert res.get_json()["used"] == 1
+
+
+def test_version_bump_from_another_worker_misses_local_entry(tenant):
+    from app.services import tenant_versions
+
+    assert tenant_versions.cached(response_cache.DEVICES, tenant, lambda: ["viejo"]) == ["viejo"]
+
+    # Otro worker confirma una escritura: aquí no corre su invalidación local
+    db.session.execute(db.text(
+        "INSERT INTO tenant_versions (tenant_id, scope, version) VALUES (:t, 'devices', 1)"
+    ), {"t": tenant})
+    db.session.commit()
+    assert tenant_versions.cached(response_cache.DEVICES, tenant, lambda: ["nuevo"]) == ["nuevo"]
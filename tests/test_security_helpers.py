@@ -0,0 +1,50 @@
+import pytest
+
+from app.utils import security_helpers  # noqa: E402
+from app.utils.security_helpers import MemoryLockoutStore  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def _memory_store():
+    store = MemoryLockoutStore(max_entries=1000)
+    security_helpers.set_lockout_store(store)
+    yield store
+    security_helpers.clear_lockouts()
+
+
+def test_login_lock_and_reset(app):
+    key = ("10.0.0.1", "a@example.com")
+    max_attempts = security_helpers.MAX_FAILED_ATTEMPTS
+    for i in range(1, max_attempts):
+        assert security_helpers.register_login_failure(key) == i
+        assert not security_helpers.is_login_locked(key)
+    assert security_helpers.register_login_failure(key) == max_attempts
+    assert security_helpers.is_login_locked(key)
+    # Login y registro usan contadores independientes
+    assert not security_helpers.is_registration_locked(key)
+
+    security_helpers.reset_login_lock(key)
+    assert not security_helpers.is_login_locked(key)
+
+
+def test_counters_expire_after_lockout_window(app, _memory_store, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(security_helpers.time, "time", lambda: now[0])
+    key = ("10.0.0.2", "b@example.com")
+    for _ in range(security_helpers.MAX_FAILED_ATTEMPTS):
+        security_helpers.register_login_failure(key)
+    assert security_helpers.is_login_locked(key)
+
+    now[0] += security_helpers.LOCKOUT_SECONDS + 1
+    assert not security_helpers.is_login_locked(key)
+    # La siguiente escritura purga las llaves vencidas: la memoria no crece con IPs viejas
+    security_helpers.register_login_failure(("10.0.0.3", "c@example.com"))
+    assert len(_memory_store) == 1
+
+
+def test_memory_store_is_bounded():
+    store = MemoryLockoutStore(max_entries=3)
+    for i in range(10):
+        store.incr(f"k{i}", 60)
+    assert len(store) == 3
+    assert store.get("k0") == 0 and store.get("k9") == 1
@@ -0,0 +1,139 @@
+from datetime import datetime, timedelta
+
+from app.db import db  # noqa: E402
+from app.models.alert import Alert  # noqa: E402
+from app.models.alert_status_history import AlertStatusHistory  # noqa: E402
+from app.models.device import Device  # noqa: E402
+
+
+def _device(tenant_id: int) -> Device:
+    d = Device(
+        tenant_id=tenant_id, name="R1", ip_address="192.0.2.1", port=8728,
+        username_encrypted="u", password_encrypted="p",
+    )
+    db.session.add(d)
+    db.session.flush()
+    return d
+
+
+def _alert_with_history(tenant_id, device_id, user_id, estado, created_at, transitions):
+    a = Alert(
+        tenant_id=tenant_id, device_id=device_id, estado=estado, titulo="t",
+        descripcion="d", accion_recomendada="a", status_operativo="Pendiente",
+        created_at=created_at,
+    )
+    db.session.add(a)
+    db.session.flush()
+    prev = "Pendiente"
+    for status, minutes in transitions:
+        db.session.add(AlertStatusHistory(
+            alert_id=a.id, previous_status_operativo=prev, new_status_operativo=status,
+            changed_by_user_id=user_id, changed_at=created_at + timedelta(minutes=minutes),
+        ))
+        prev = status
+    return a
+
+
+def test_sla_metrics_uses_first_resolution(client, auth_headers, tenant, admin_user):
+    d = _device(tenant)
+    now = datetime.utcnow()
+    base = datetime(now.year, now.month, 1) + timedelta(minutes=1)
+    # Primera resolución a los 30 min (la re-resolución posterior se ignora)
+    _alert_with_history(tenant, d.id, admin_user.id, "Alerta Severa", base,
+                        [("En curso", 10), ("Resuelta", 30), ("Pendiente", 40), ("Resuelta", 90)])
+    _alert_with_history(tenant, d.id, admin_user.id, "Alerta Crítica", base, [("Resuelta", 60)])
+    # Fuera de alcance: severidad menor y alerta sin resolver
+    _alert_with_history(tenant, d.id, admin_user.id, "Alerta Menor", base, [("Resuelta", 5)])
+    _alert_with_history(tenant, d.id, admin_user.id, "Alerta Severa", base, [("En curso", 5)])
+    db.session.commit()
+    # Histórico insertado directamente: los rollups se regeneran con el comando de reparación
+    from app.services.sla_service import rebuild_sla_rollups
+    assert rebuild_sla_rollups(tenant) == 3
+
+    res = client.get("/api/sla/metrics", headers=auth_headers)
+    assert res.status_code == 200
+    assert res.get_json()["tiempo_promedio_resolucion_severa_min"] == 45.0
+
+
+def test_status_update_maintains_rollups(client, auth_headers, tenant, admin_user):
+    d = _device(tenant)
+    a = _alert_with_history(tenant, d.id, admin_user.id, "Alerta Crítica",
+                            datetime.utcnow() - timedelta(minutes=20), [])
+    db.session.commit()
+
+    for status in ("Resuelta", "Pendiente", "Resuelta"):
+        res = client.patch(f"/api/alerts/{a.id}/status", json={"status_operativo": status},
+                           headers=auth_headers)
+        assert res.status_code == 200
+
+    res = client.get("/api/sla/rollups", headers=auth_headers)
+    assert res.status_code == 200
+    summary = res.get_json()
+    # Solo la primera resolución cuenta
+    assert summary["resueltas"] == 1
+    assert 19.0 <= summary["promedio_min"] <= 21.0
+    assert summary["p50_min_estimado"] == 30.0
+
+
+def test_sla_analytics_percentiles_by_severity(client, auth_headers, tenant, admin_user):
+    d = _device(tenant)
+    base = datetime.utcnow() - timedelta(days=1)
+    for minutes in (10, 20, 30, 40):
+        _alert_with_history(tenant, d.id, admin_user.id, "Alerta Severa", base,
+                            [("En curso", minutes / 2), ("Resuelta", minutes)])
+    _alert_with_history(tenant, d.id, admin_user.id, "Alerta Menor", base, [])
+    db.session.commit()
+
+    res = client.get("/api/sla/analytics", headers=auth_headers, query_string={"group_by": "severity"})
+    assert res.status_code == 200
+    data = res.get_json()
+    assert data["overall"]["alerts"] == 5
+    groups = {g["key"]: g for g in data["groups"]}
+    severa = groups["Alerta Severa"]
+    assert severa["mttr_min"]["n"] == 4
+    assert abs(severa["mttr_min"]["p50"] - 25.0) < 0.01
+    assert abs(severa["mtta_min"]["mean"] - 12.5) < 0.01
+    # Alerta sin transiciones: cuenta como alerta pero sin muestras
+    assert groups["Alerta Menor"]["mttr_min"]["n"] == 0
+
+
+def test_rollups_are_backfilled_by_rebuild_and_cap_open_bucket(client, auth_headers, tenant, admin_user):
+    from app.services import sla_service
+
+    d = _device(tenant)
+    base = datetime(2024, 3, 1)
+    # Resuelta tras más de una semana: cae en el bucket abierto del histograma
+    _alert_with_history(tenant, d.id, admin_user.id, "Alerta Severa", base, [("Resuelta", 20000)])
+    db.session.commit()
+
+    query = {"desde": "2024-03", "hasta": "2024-03"}
+    # Las lecturas no reconstruyen: el histórico previo se carga con rebuild-sla-rollups
+    res = client.get("/api/sla/rollups", headers=auth_headers, query_string=query)
+    assert res.status_code == 200
+    assert res.get_json()["resueltas"] == 0
+
+    assert sla_service.rebuild_sla_rollups(tenant) == 1
+    res = client.get("/api/sla/rollups", headers=auth_headers, query_string=query)
+    body = res.get_json()
+    assert body["resueltas"] == 1
+    assert body["p90_min_estimado"] == float(sla_service.HISTOGRAM_BOUNDS_MIN[-1])
+
+
+def test_sla_analytics_reads_in_chunks_and_rejects_bad_dates(client, auth_headers, tenant, admin_user, monkeypatch):
+    from app.services import sla_analytics_service
+
+    d = _device(tenant)
+    base = datetime.utcnow() - timedelta(days=1)
+    for minutes in (10, 20, 30):
+        _alert_with_history(tenant, d.id, admin_user.id, "Alerta Severa", base, [("Resuelta", minutes)])
+    db.session.commit()
+    monkeypatch.setattr(sla_analytics_service, "FETCH_CHUNK", 2)
+
+    res = client.get("/api/sla/analytics", headers=auth_headers, query_string={"group_by": "device"})
+    assert res.status_code == 200
+    overall = res.get_json()["overall"]
+    assert overall["alerts"] == 3
+    assert abs(overall["mttr_min"]["mean"] - 20.0) < 0.01
+
+    res = client.get("/api/sla/analytics", headers=auth_headers, query_string={"from": "ayer"})
+    assert res.status_code == 400
@@ -0,0 +1,41 @@
+import pytest
+
+from app.db import db  # noqa: E402
+from app.models.device import Device  # noqa: E402
+from app.models.tenant import Tenant  # noqa: E402
+from app.services import device_service, subscription_service  # noqa: E402
+from app.services.device_service import DeviceLimitReached  # noqa: E402
+
+
+def _payload(i: int) -> dict:
+    return {"name": f"R{i}", "ip_address": f"192.0.2.{i}", "port": 8728, "username": "u", "password": "p"}
+
+
+def test_device_limit_uses_active_counter(client, auth_headers, tenant):
+    ids = [device_service.create_device(tenant, _payload(i)).id for i in range(5)]
+    with pytest.raises(DeviceLimitReached):
+        device_service.create_device(tenant, _payload(6))
+
+    # La baja lógica libera el cupo (antes el conteo incluía dispositivos inactivos)
+    assert device_service.delete_device(tenant, ids[0])
+    assert device_service.delete_device(tenant, ids[0])  # idempotente: no descuenta dos veces
+    device_service.create_device(tenant, _payload(7))
+
+    res = client.get("/api/subscription/status", headers=auth_headers)
+    assert res.get_json()["used"] == 5
+    # Sin ETag: un vencimiento o una suspensión no pasan por los contadores de versión
+    assert "ETag" not in res.headers
+    assert db.session.get(Tenant, tenant).active_devices_count == 5
+
+
+def test_reconcile_device_counts_backfills_counter(tenant):
+    for i in range(3):
+        db.session.add(Device(tenant_id=tenant, is_active=i < 2, **{
+            "name": f"R{i}", "ip_address": f"192.0.2.{i}", "port": 8728,
+            "username_encrypted": "u", "password_encrypted": "p",
+        }))
+    db.session.commit()
+
+    assert subscription_service.reconcile_device_counts() == 1
+    assert subscription_service.get_current_subscription(tenant)["devices_registrados"] == 2
+    assert subscription_service.reconcile_device_counts() == 0
@@ -0,0 +1,51 @@
+import pytest
+
+from app import metrics  # noqa: E402
+from app.auth import token_cache  # noqa: E402
+from app.auth.errors import AuthTokenExpired, AuthTokenInvalid  # noqa: E402
+from app.auth.jwt_utils import create_jwt  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    token_cache.clear()
+    yield
+    token_cache.clear()
+
+
+def _counts():
+    return dict(metrics.snapshot()["jwt_cache_total"])
+
+
+def test_valid_token_is_verified_once(app, monkeypatch):
+    token = create_jwt(1, 1, "admin", expires_minutes=5)
+    before = _counts()
+
+    calls = []
+    real_decode = token_cache.decode_jwt
+    monkeypatch.setattr(token_cache, "decode_jwt", lambda t: calls.append(t) or real_decode(t))
+
+    first = token_cache.decode(token)
+    second = token_cache.decode(token)
+    assert first == second and first["tenant_id"] == 1
+    assert len(calls) == 1
+    after = _counts()
+    assert after.get("hit", 0) - before.get("hit", 0) == 1
+
+    # Vencido el `exp`, el veredicto pasa a expirado sin reverificar la firma
+    monkeypatch.setattr(token_cache.time, "time", lambda: first["exp"] + 1)
+    with pytest.raises(AuthTokenExpired):
+        token_cache.decode(token)
+    assert len(calls) == 1
+
+
+def test_rejected_tokens_are_negatively_cached(app):
+    bad = create_jwt(1, 1, "admin", expires_minutes=5)[:-2] + "xx"
+    with pytest.raises(AuthTokenInvalid) as first:
+        token_cache.decode(bad)
+    assert not getattr(first.value, "cached", False)
+
+    with pytest.raises(AuthTokenInvalid) as again:
+        token_cache.decode(bad)
+    assert again.value.cached is True
+    assert token_cache.stats()["negative_entries"] == 1